@@ -0,0 +1,147 @@
+"""Incremental parsing of a json object holding one large array, such as the "data" array of searchResults responses.
+
+The response body is read chunk by chunk and every entry of the array is yielded as soon as it is complete, so only the
+entry being parsed (plus one chunk) is held in memory instead of the whole body and its whole parsed tree. The other
+members of the object (e.g. "success", "totalCount") are parsed as a whole, they are expected to be small.
+"""
+
+import codecs
+import json
+import re
+
+
+class __Buffer:
+    __whitespace = re.compile(r"[ \t\n\r]*")
+    __json_decoder = json.JSONDecoder()
+
+    def __init__(self, chunks):
+        """Text buffer over an iterator of utf-8 encoded chunks, refilled on demand."""
+        self.__chunks = iter(chunks)
+        self.__text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.position = 0
+        self.exhausted = False
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping the text already consumed. False once every chunk was read."""
+        if self.exhausted:
+            return False
+
+        chunk = next(self.__chunks, None)
+
+        if chunk is None:
+            self.exhausted = True
+            self.text = self.text[self.position:] + self.__text_decoder.decode(b"", final=True)
+        else:
+            self.text = self.text[self.position:] + self.__text_decoder.decode(chunk)
+
+        self.position = 0
+        return True
+
+    def skip_whitespace(self) -> int:
+        """Position of the next character of the buffer that is not whitespace, len(text) when there is none."""
+        return self.__whitespace.match(self.text, self.position).end()
+
+    def peek(self) -> str:
+        """Next character that is not whitespace, without consuming it."""
+        while True:
+            self.position = self.skip_whitespace()
+
+            if self.position < len(self.text):
+                return self.text[self.position]
+
+            if not self.fill():
+                raise ValueError("Unexpected end of json stream")
+
+    def expect(self, character: str):
+        if self.peek() != character:
+            raise ValueError(f"Expected \"{character}\" in json stream, found \"{self.text[self.position]}\"")
+
+        self.position += 1
+
+    def decode_value(self):
+        """Decode the next complete json value, reading more chunks while it is truncated."""
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.__json_decoder.raw_decode(self.text, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A number ending the buffer may continue in the next chunk
+            if end == len(self.text) and not self.exhausted:
+                self.fill()
+                continue
+
+            self.position = end
+            return value
+
+
+def iter_json_array(chunks, array_key: str, fields: dict | None = None):
+    """Yield the entries of an array member of a json object, parsing the object incrementally.
+
+    Args:
+        chunks: Iterable of utf-8 encoded bytes chunks of the json object, e.g. requests.Response.iter_content().
+        array_key: Key of the array member to stream.
+        fields: Optional dict filled with the other members of the object as they are parsed, and with array_key when
+            its value is not an array (e.g. null).
+
+    Raises:
+        ValueError: The chunks are not a json object or are truncated.
+
+    Yields:
+        Decoded entries of the array, in order.
+    """
+    if fields is None:
+        fields = {}
+
+    buffer = __Buffer(chunks)
+    buffer.expect("{")
+    is_object_done = buffer.peek() == "}"
+
+    if is_object_done:
+        buffer.position += 1
+
+    while not is_object_done:
+        key = buffer.decode_value()
+
+        if not isinstance(key, str):
+            raise ValueError(f"Expected a json object key, found {key!r}")
+
+        buffer.expect(":")
+
+        if key == array_key and buffer.peek() == "[":
+            buffer.position += 1
+
+            if buffer.peek() == "]":
+                buffer.position += 1
+            else:
+                while True:
+                    yield buffer.decode_value()
+
+                    if buffer.peek() == ",":
+                        buffer.position += 1
+                    else:
+                        buffer.expect("]")
+                        break
+        else:
+            fields[key] = buffer.decode_value()
+
+        if buffer.peek() == ",":
+            buffer.position += 1
+        else:
+            buffer.expect("}")
+            is_object_done = True
+
+    # Read to the end of the chunks, only whitespace may follow the object
+    while True:
+        buffer.position = buffer.skip_whitespace()
+
+        if buffer.position < len(buffer.text):
+            raise ValueError("Extra data after the json object of the json stream")
+
+        if not buffer.fill():
+            return
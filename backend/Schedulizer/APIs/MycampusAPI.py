@@ -8,15 +8,24 @@
 If you want to check the course registration website in guest mode:
     https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/termSelection?mode=search&mepCode=UOIT
 
+Requests 1) and 2) are the session handshake, done once per pooled session (MycampusSession.py) rather than once per
+API call, so an API call on a warm session only costs request 3).
+
+Responses are kept in the on-disk response cache (MycampusResponseCache.py), which also serves them without network
+access in replay mode.
+
 Error raising:
     1)  In the event a get request cannot be fulfilled (MyCampus/Banner is down) a requests.exceptions.ConnectionError
         exception is raised.
 """
 
-import requests
+from Schedulizer.APIs.MycampusSession import MYCAMPUS_SSB_URL, get_session_pool
+from Schedulizer.APIs.MycampusResponseCache import get_response_cache
+from Schedulizer.APIs.JsonStream import iter_json_array
+from Schedulizer.constants import MYCAMPUS_STREAM_CHUNK_SIZE
 
 
-def get_json_course_codes(mep_code: str, term_id: str, search_code: str, max_count: int = 10) -> dict:
+def get_json_course_codes(mep_code: str, term_id: str, search_code: str, max_count: int = 10, offset: int = 1) -> dict:
     """http request for course code based on a search key.
 
     Args:
@@ -26,6 +35,7 @@ def get_json_course_codes(mep_code: str, term_id: str, search_code: str, max_cou
         search_code: Search course code.
             Examples: "PHY1010U", "CHEM1800U", "MATH1850U".
         max_count: Number of course results to search. Default = 10.
+        offset: Page of max_count results to return, starting at 1. Default = 1.
 
     Returns:
         Course codes of matching search_code as json dict response from API
@@ -42,15 +52,16 @@ def get_json_course_codes(mep_code: str, term_id: str, search_code: str, max_cou
         raise TypeError(f"term_id expected {str}, received {type(term_id)}")
     elif not isinstance(max_count, int):
         raise TypeError(f"max_count expected {int}, received {type(max_count)}")
+    elif not isinstance(offset, int):
+        raise TypeError(f"offset expected {int}, received {type(offset)}")
 
-    session = requests.Session()
+    def fetch():
+        with get_session_pool().session(mep_code=mep_code, term_id=term_id) as session:
+            return session.get_json(url=f"{MYCAMPUS_SSB_URL}/classSearch/get_subjectcoursecombo?"
+                                        f"searchTerm={search_code}&term={term_id}&offset={offset}&max={max_count}")
 
-    session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/termSelection?mode=search&"
-                    f"mepCode={mep_code}", timeout=5)
-    session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/search?mode=search&term={term_id}",
-                timeout=5)
-    return session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/classSearch/get_subjectcoursecombo?"
-                           f"searchTerm={search_code}&term={term_id}&offset=1&max={max_count}", timeout=5).json()
+    return get_response_cache().get_or_fetch(mep_code, term_id, f"course codes {search_code} {offset} {max_count}",
+                                             fetch)
 
 
 def get_json_course_data(mep_code: str, term_id: str, course_code: str, max_count=999) -> dict:
@@ -82,15 +93,124 @@ def get_json_course_data(mep_code: str, term_id: str, course_code: str, max_coun
 
     course_code = course_code.upper()
 
-    session = requests.Session()
+    def is_requested_course(response_json) -> bool:  # Banner answers with the previous search of a session at times
+        return all(section.get("subjectCourse") == course_code for section in response_json.get("data") or [])
+
+    def fetch():
+        with get_session_pool().session(mep_code=mep_code, term_id=term_id) as session:
+            return session.get_json(url=f"{MYCAMPUS_SSB_URL}/searchResults/searchResults?mepCode={mep_code}&"
+                                        f"txt_term={term_id}&txt_subjectcoursecombo={course_code}&"
+                                        f"pageMaxSize={max_count}", is_valid=is_requested_course)
+
+    return get_response_cache().get_or_fetch(mep_code, term_id, course_code, fetch)
+
+
+def iter_course_data_sections(mep_code: str, term_id: str, course_code: str, max_count=999):
+    """http API request for course data, streamed: the sections are decoded one at a time as the response arrives.
+
+    Same request as get_json_course_data, but the response is never held in memory as a whole, so memory use does not
+    grow with the number of sections of the course. The sections of a response that turns out invalid midway may have
+    been yielded already.
+
+    Args:
+        mep_code: School mep code. Example: Ontario Tech University = "UOIT".
+        term_id: Term id used by api.
+            Examples: Fall 2021 = "202109", Winter 2022 = "202201", Spring/Summer 2022 = "202205".
+        course_code: Course code.
+            Examples: "PHY1010U", "CHEM1800U", "MATH1850U".
+        max_count: Number of course results to search. Default = 999.
+
+    Raises:
+        RuntimeError: MyCampus answered with the sections of another search midway, or with an unsuccessful response.
+
+    Yields:
+        Json dict of every section of the course, the entries of the "data" list of get_json_course_data.
+    """
+    if not isinstance(mep_code, str):
+        raise TypeError(f"mep_code expected {str}, received {type(mep_code)}")
+    elif not isinstance(course_code, str):
+        raise TypeError(f"course_code expected {str}, received {type(course_code)}")
+    elif not isinstance(term_id, str):
+        raise TypeError(f"term_id expected {str}, received {type(term_id)}")
+    elif not isinstance(max_count, int):
+        raise TypeError(f"max_count expected {int}, received {type(max_count)}")
+
+    course_code = course_code.upper()
+
+    def stream():
+        with get_session_pool().session(mep_code=mep_code, term_id=term_id) as session:
+            yield from session.iter_content(url=f"{MYCAMPUS_SSB_URL}/searchResults/searchResults?mepCode={mep_code}&"
+                                                f"txt_term={term_id}&txt_subjectcoursecombo={course_code}&"
+                                                f"pageMaxSize={max_count}", chunk_size=MYCAMPUS_STREAM_CHUNK_SIZE)
+
+    fields = {}
+
+    def is_successful() -> bool:
+        return not (fields.get("success") is False or ("data" in fields and fields["data"] is None))
+
+    # Unsuccessful responses are parsed whole before the cache stores them, is_successful keeps them out of it
+    chunks = get_response_cache().stream_or_fetch(mep_code, term_id, course_code, stream, is_valid=is_successful)
+    is_stale_search = False
+
+    try:
+        for section_index, section in enumerate(iter_json_array(chunks, array_key="data", fields=fields)):
+            if section.get("subjectCourse") != course_code:  # Banner answers with the previous search of a session
+                if section_index == 0:
+                    is_stale_search = True
+                    break
+
+                raise RuntimeError(f"MyCampus answered the search of {course_code} with {section.get('subjectCourse')}")
+
+            yield section
+    finally:
+        chunks.close()  # Sessions of abandoned streams are closed rather than returned to the pool
+
+    if is_stale_search:  # Nothing yielded yet, get_json_course_data resets the search form and retries
+        yield from get_json_course_data(mep_code=mep_code, term_id=term_id, course_code=course_code,
+                                        max_count=max_count)["data"]
+        return
+
+    if not is_successful():
+        raise RuntimeError(f"Unsuccessful MyCampus response for {course_code}")
+
+
+def get_json_term_sections(mep_code: str, term_id: str, page_offset: int = 0, page_max_size: int = 500) -> dict:
+    """http API request for a page of the course data of every section of a term.
+
+    Pages are sorted by subject and course number, so consecutive page_offset values cover the whole term.
+
+    Args:
+        mep_code: School mep code. Example: Ontario Tech University = "UOIT".
+        term_id: Term id used by api.
+            Examples: Fall 2021 = "202109", Winter 2022 = "202201", Spring/Summer 2022 = "202205".
+        page_offset: Number of sections to skip. Default = 0.
+        page_max_size: Number of sections per page. Default = 500.
+
+    Returns:
+        Course data json dict response from API, same format as get_json_course_data. Its "totalCount" is the number of
+        sections of the whole term.
+    """
+    if not isinstance(mep_code, str):
+        raise TypeError(f"mep_code expected {str}, received {type(mep_code)}")
+    elif not isinstance(term_id, str):
+        raise TypeError(f"term_id expected {str}, received {type(term_id)}")
+    elif not isinstance(page_offset, int):
+        raise TypeError(f"page_offset expected {int}, received {type(page_offset)}")
+    elif not isinstance(page_max_size, int):
+        raise TypeError(f"page_max_size expected {int}, received {type(page_max_size)}")
+
+    def is_term_search(response_json) -> bool:
+        return all(section.get("term") == term_id for section in response_json.get("data") or [])
+
+    def fetch():
+        with get_session_pool().session(mep_code=mep_code, term_id=term_id) as session:
+            session.reset_search()  # A course search left on the search form of the session would narrow the results
+
+            return session.get_json(url=f"{MYCAMPUS_SSB_URL}/searchResults/searchResults?mepCode={mep_code}&"
+                                        f"txt_term={term_id}&pageOffset={page_offset}&pageMaxSize={page_max_size}&"
+                                        f"sortColumn=subjectDescription&sortDirection=asc", is_valid=is_term_search)
 
-    session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/termSelection?mode=search&"
-                    f"mepCode={mep_code}", timeout=5)
-    session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/search?mode=search&term={term_id}",
-                timeout=5)
-    return session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/searchResults/searchResults?"
-                           f"mepCode={mep_code}&txt_term={term_id}&txt_subjectcoursecombo={course_code}&"
-                           f"pageMaxSize={max_count}", timeout=5).json()
+    return get_response_cache().get_or_fetch(mep_code, term_id, f"term sections {page_offset} {page_max_size}", fetch)
 
 
 def get_terms(mep_code: str, max_count: int = 999) -> dict:
@@ -109,10 +229,8 @@ def get_terms(mep_code: str, max_count: int = 999) -> dict:
              ...
             ]
     """
-    session = requests.Session()
+    def fetch():
+        with get_session_pool().session(mep_code=mep_code, term_id=None) as session:
+            return session.get_json(url=f"{MYCAMPUS_SSB_URL}/classSearch/getTerms?searchTerm=&offset=1&max={max_count}")
 
-    session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/term/termSelection?mode=search&"
-                    f"mepCode={mep_code}", timeout=5)
-    return session.get(url=f"https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/classSearch/getTerms?searchTerm"
-                           f"=&offset=1&max={max_count}",
-                       timeout=5).json()
+    return get_response_cache().get_or_fetch(mep_code, None, f"terms {max_count}", fetch)
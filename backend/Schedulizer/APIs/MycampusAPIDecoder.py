@@ -1,14 +1,26 @@
 """Decodes json dict pulled via the MycampusAPI.py into the main Course class (CourseClass.py).
 
 Uses the Meeting class (MeetingClass) to populate the class_times properly/attribute in the course class.
+
+A payload only holds a handful of distinct dates, times and instructional methods, repeated over every meeting of
+every section, so each distinct string is parsed once per payload and looked up afterwards. The decoded Course objects
+are identical to the ones of the original decoder (APIs/MycampusAPIDocumentation/MycampusAPIDecoderReference.py),
+checked by tests/test_mycampus_api_decoder.py.
 """
 
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 
 from Schedulizer.constants import CLASS_INSTRUCTION_IN_PERSON_KEYS
 from Schedulizer.CourseClass import Course
 from Schedulizer.MeetingClass import Meeting
 
+# Following datetime convention of monday = 0, tuesday = 1, ... , sunday = 6
+WEEKDAY_KEYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Lowercase CLASS_INSTRUCTION_IN_PERSON_KEYS, lowered once instead of for every section
+IN_PERSON_KEYS_LOWER = tuple(key.lower() for key in CLASS_INSTRUCTION_IN_PERSON_KEYS)
+
 
 def decode_api_json_to_course_obj(json_dict: dict) -> list[Course]:
     """
@@ -19,6 +31,38 @@ def decode_api_json_to_course_obj(json_dict: dict) -> list[Course]:
     Returns:
         List of decoded Course objects.
     """
+    return list(iter_decode_api_sections(json_dict["data"]))
+
+
+def iter_decode_api_sections(sections: Iterable[dict]) -> Iterator[Course]:
+    """Decode sections one at a time, e.g. as they are streamed by MycampusAPI.py iter_course_data_sections.
+
+    Args:
+        sections: Json dicts of sections, the entries of the "data" list of the MycampusAPI.py responses.
+
+    Yields:
+        Decoded Course object of every section.
+    """
+    # Parsed values of the distinct strings of the payload
+    dates = {}
+    times = {}
+    virtual_methods = {}
+
+    def parse_date(date_str: str):
+        parsed = dates.get(date_str)
+
+        if parsed is None:
+            parsed = dates[date_str] = datetime.strptime(date_str, "%m/%d/%Y").date()
+
+        return parsed
+
+    def parse_time(time_str: str):
+        parsed = times.get(time_str)
+
+        if parsed is None:
+            parsed = times[time_str] = datetime.strptime(time_str, "%H%M").time()
+
+        return parsed
 
     def is_virtual(instructional_method_description: str) -> bool:
         """Compares instructional_method_description to CLASS_INSTRUCTION_IN_PERSON_KEYS to see if a course is virtual.
@@ -29,32 +73,31 @@ def decode_api_json_to_course_obj(json_dict: dict) -> list[Course]:
         Returns:
             True = is virtual, False = not virtual/in person
         """
-        for key in CLASS_INSTRUCTION_IN_PERSON_KEYS:
-            if key.lower() in instructional_method_description.lower():
-                return False
-        return True
+        virtual = virtual_methods.get(instructional_method_description)
 
-    course_list = []  # Master list to return
+        if virtual is None:
+            description_lower = instructional_method_description.lower()
+            virtual = virtual_methods[instructional_method_description] = not any(
+                key in description_lower for key in IN_PERSON_KEYS_LOWER)
 
-    for data in json_dict["data"]:  # Loop through all courses
-        meetings = data["meetingsFaculty"]
+        return virtual
+
+    for data in sections:  # Loop through all courses
         meeting_list = []
 
-        for meeting in meetings:  # Loop through all meet times
+        for meeting in data["meetingsFaculty"]:  # Loop through all meet times
             m_fac = meeting["meetingTime"]
 
             # Weekday int calculation
             try:
-                weekday_int = [m_fac["monday"], m_fac["tuesday"], m_fac["wednesday"], m_fac["thursday"],
-                               m_fac["friday"], m_fac["saturday"], m_fac["sunday"]].index(True)
-                # ^^^ Following datetime convention of monday = 0, tuesday = 1, ... , sunday = 6
+                weekday_int = [m_fac[key] for key in WEEKDAY_KEYS].index(True)
             except ValueError:
                 weekday_int = -1  # Negative 1 denotes no class on a day (async class/course)
 
-            date_start = datetime.strptime(m_fac["startDate"], "%m/%d/%Y").date()
-            date_end = datetime.strptime(m_fac["endDate"], "%m/%d/%Y").date()
+            date_start = parse_date(m_fac["startDate"])
+            date_end = parse_date(m_fac["endDate"])
 
-            if date_start is not None and date_end is not None and weekday_int >= 0:  # Course is not async
+            if weekday_int >= 0:  # Course is not async
 
                 # repeat_timedelta calculation
                 if date_start == date_end:  # Single day meetings:
@@ -73,31 +116,26 @@ def decode_api_json_to_course_obj(json_dict: dict) -> list[Course]:
                     repeat_timedelta_days = 7
 
                 # Create Meeting object
-                m = Meeting(time_start=datetime.strptime(m_fac["beginTime"], "%H%M").time(),
-                            time_end=datetime.strptime(m_fac["endTime"], "%H%M").time(),
-                            weekday_int=weekday_int,
-                            date_start=date_start,
-                            date_end=date_end,
-                            repeat_timedelta_days=repeat_timedelta_days,
-                            location=f"{m_fac['campus']} {m_fac['building']} {m_fac['room']}")
-
-                meeting_list.append(m)  # Append Meeting object to meeting list
+                meeting_list.append(Meeting(time_start=parse_time(m_fac["beginTime"]),
+                                            time_end=parse_time(m_fac["endTime"]),
+                                            weekday_int=weekday_int,
+                                            date_start=date_start,
+                                            date_end=date_end,
+                                            repeat_timedelta_days=repeat_timedelta_days,
+                                            location=f"{m_fac['campus']} {m_fac['building']} {m_fac['room']}"))
 
         # Create Course object
-        c = Course(fac=data["subject"],
-                   uid=data["courseNumber"],
-                   crn=int(data["courseReferenceNumber"]),
-                   class_type=data["scheduleTypeDescription"],
-                   title=data["courseTitle"],
-                   section=data["sequenceNumber"],
-                   class_time=meeting_list,
-                   is_linked=bool(data["isSectionLinked"]),
-                   link_tag=data["linkIdentifier"],
-                   seats_filled=int(data["enrollment"]),
-                   max_capacity=int(data["maximumEnrollment"]),
-                   instructors=", ".join([f"{fac['displayName']} ({fac['emailAddress']})" for fac in data["faculty"]]),
-                   is_virtual=is_virtual(data["instructionalMethodDescription"]))
-
-        course_list.append(c)  # Append Course object to course list
-
-    return course_list  # Return the master list
+        yield Course(fac=data["subject"],
+                     uid=data["courseNumber"],
+                     crn=int(data["courseReferenceNumber"]),
+                     class_type=data["scheduleTypeDescription"],
+                     title=data["courseTitle"],
+                     section=data["sequenceNumber"],
+                     class_time=meeting_list,
+                     is_linked=bool(data["isSectionLinked"]),
+                     link_tag=data["linkIdentifier"],
+                     seats_filled=int(data["enrollment"]),
+                     max_capacity=int(data["maximumEnrollment"]),
+                     instructors=", ".join([f"{fac['displayName']} ({fac['emailAddress']})"
+                                            for fac in data["faculty"]]),
+                     is_virtual=is_virtual(data["instructionalMethodDescription"]))
@@ -0,0 +1,371 @@
+"""On-disk cache of the raw MyCampus json responses, with an offline replay mode.
+
+Responses are stored content-addressed: the json payload is written once under the sha256 of its bytes (objects/), and
+every cache key (mep_code, term_id, request key) points to its payload through a small ref file (refs/). Unchanged
+payloads fetched again by later refreshes share the same object. Entries expire after MYCAMPUS_RESPONSE_CACHE_TTL
+seconds, and once the objects outgrow MYCAMPUS_RESPONSE_CACHE_MAX_BYTES the least recently used ones are evicted.
+
+The mode is read from the SCHEDULIZER_MYCAMPUS_CACHE environment variable (.env):
+    "on": Responses are cached and served from the cache while they are younger than the TTL.
+    "off": No caching, every request goes to MyCampus. Default, as caching writes every response to disk, deployments
+        opt in with "on" (recording and replaying responses are development tools).
+    "replay": Responses are only served from the cache, whatever their age, and MyCampus is never contacted. A request
+        without a cached response raises ReplayMissError. The cache is seeded with the response samples of
+        MycampusAPIDocumentation/*.json, so decoding, ingestion and benchmarks run with zero network access.
+
+Seed the cache by hand from the backend directory:
+    $ python -m Schedulizer.APIs.MycampusResponseCache
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+import requests
+
+from Schedulizer.constants import MYCAMPUS_RESPONSE_CACHE_DIRECTORY, MYCAMPUS_RESPONSE_CACHE_TTL, \
+    MYCAMPUS_RESPONSE_CACHE_MAX_BYTES, MYCAMPUS_RESPONSE_CACHE_MODE_DEFAULT, \
+    MYCAMPUS_STREAM_CHUNK_SIZE
+
+load_dotenv()
+
+# Cache modes
+RESPONSE_CACHE_ON = "on"
+RESPONSE_CACHE_OFF = "off"
+RESPONSE_CACHE_REPLAY = "replay"
+
+# Response samples seeding the replay mode, all of them are Ontario Tech University responses
+DOCUMENTATION_SAMPLES_GLOB = os.path.join(os.path.dirname(__file__), "MycampusAPIDocumentation", "*.json")
+DOCUMENTATION_SAMPLES_MEP_CODE = "UOIT"
+
+
+class ReplayMissError(requests.exceptions.ConnectionError):
+    """Replay mode has no cached response for the request, handled by callers like MyCampus being unreachable."""
+
+
+class MycampusResponseCache:
+    def __init__(self, directory: str, mode: str, ttl: float, max_bytes: int):
+        """Content-addressed on-disk cache of MyCampus json responses.
+
+        Args:
+            directory: Directory of the cache, created when missing.
+            mode: RESPONSE_CACHE_ON, RESPONSE_CACHE_OFF or RESPONSE_CACHE_REPLAY.
+            ttl: Seconds a response is served from the cache (ignored by the replay mode).
+            max_bytes: Maximum total size of the stored payloads before the least recently used ones are evicted.
+        """
+        if mode not in (RESPONSE_CACHE_ON, RESPONSE_CACHE_OFF, RESPONSE_CACHE_REPLAY):
+            raise ValueError(f"Unknown MyCampus response cache mode \"{mode}\", expected \"{RESPONSE_CACHE_ON}\", "
+                             f"\"{RESPONSE_CACHE_OFF}\" or \"{RESPONSE_CACHE_REPLAY}\"")
+
+        self.directory = directory
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.__objects_directory = os.path.join(directory, "objects")
+        self.__refs_directory = os.path.join(directory, "refs")
+        self.__lock = threading.Lock()
+        self.__total_bytes = None  # Size of the objects directory, computed on the first write
+
+        if mode != RESPONSE_CACHE_OFF:
+            os.makedirs(self.__objects_directory, exist_ok=True)
+            os.makedirs(self.__refs_directory, exist_ok=True)
+
+        if mode == RESPONSE_CACHE_REPLAY:
+            self.seed_from_documentation()
+
+    def get_or_fetch(self, mep_code: str, term_id: str | None, key: str, fetch):
+        """Cached response of a request, fetching (and caching) it on a miss.
+
+        Args:
+            mep_code: School mep code of the request.
+            term_id: Term id of the request, None for requests without a term.
+            key: Identifies the request within the school and term (e.g. the course code).
+            fetch: Function without arguments sending the request, returns its decoded json response.
+
+        Raises:
+            ReplayMissError: Replay mode without a cached response for the request.
+
+        Returns:
+            Decoded json response.
+        """
+        if self.mode == RESPONSE_CACHE_OFF:
+            return fetch()
+
+        response_json = self.get(mep_code, term_id, key)
+
+        if response_json is not None:
+            return response_json
+
+        if self.mode == RESPONSE_CACHE_REPLAY:
+            raise ReplayMissError(f"No cached MyCampus response of {key} ({mep_code}, {term_id}) to replay")
+
+        response_json = fetch()
+        self.put(mep_code, term_id, key, response_json)
+
+        return response_json
+
+    def stream_or_fetch(self, mep_code: str, term_id: str | None, key: str, stream, is_valid=None):
+        """Raw body chunks of the cached response of a request, streaming (and caching) it on a miss.
+
+        The chunks are written to the cache as they go, the response is only stored once every chunk was consumed and
+        is_valid accepts it: a stream closed early, or an unsuccessful response, stores nothing.
+
+        Args:
+            mep_code: School mep code of the request.
+            term_id: Term id of the request, None for requests without a term.
+            key: Identifies the request within the school and term (e.g. the course code).
+            stream: Function without arguments sending the request, returns an iterator of the body chunks.
+            is_valid: Function without arguments, called once every chunk was consumed (the consumer parsed the whole
+                response), returns False when the response must not be cached (e.g. "success": false). Default None
+                (every complete response is cached).
+
+        Raises:
+            ReplayMissError: Replay mode without a cached response for the request.
+
+        Yields:
+            Bytes chunks of the json response.
+        """
+        if self.mode == RESPONSE_CACHE_OFF:
+            yield from stream()
+            return
+
+        object_path = self.__get_object_path_of_key(mep_code, term_id, key)
+
+        if object_path is not None:
+            try:
+                file = open(object_path, "rb")
+            except FileNotFoundError:  # Evicted
+                pass
+            else:
+                with file:
+                    try:
+                        os.utime(object_path)  # Recently used, evicted last
+                    except FileNotFoundError:  # Evicted since it was opened, the open file is still read whole
+                        pass
+
+                    yield from iter(lambda: file.read(MYCAMPUS_STREAM_CHUNK_SIZE), b"")
+                return
+
+        if self.mode == RESPONSE_CACHE_REPLAY:
+            raise ReplayMissError(f"No cached MyCampus response of {key} ({mep_code}, {term_id}) to replay")
+
+        digest = hashlib.sha256()
+        size = 0
+        temporary_path = os.path.join(self.__objects_directory, f"{uuid.uuid4().hex}.tmp")
+
+        try:
+            with open(temporary_path, "wb") as file:
+                for chunk in stream():
+                    digest.update(chunk)
+                    file.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+        if is_valid is not None and not is_valid():
+            os.remove(temporary_path)
+            return
+
+        self.__store(mep_code, term_id, key, temporary_path, digest.hexdigest(), size, stored=time.time())
+
+    def get(self, mep_code: str, term_id: str | None, key: str):
+        """Cached response of a request, None when there is none or it expired (always served in replay mode)."""
+        object_path = self.__get_object_path_of_key(mep_code, term_id, key)
+
+        if object_path is None:
+            return None
+
+        try:
+            with open(object_path, "rb") as file:
+                payload = file.read()
+
+            os.utime(object_path)  # Recently used, evicted last
+        except FileNotFoundError:  # Evicted
+            return None
+
+        return json.loads(payload)
+
+    def put(self, mep_code: str, term_id: str | None, key: str, response_json, stored: float | None = None):
+        """Store the response of a request.
+
+        Args:
+            mep_code: School mep code of the request.
+            term_id: Term id of the request, None for requests without a term.
+            key: Identifies the request within the school and term (e.g. the course code).
+            response_json: Decoded json response.
+            stored: time.time() the response was fetched, now by default.
+        """
+        payload = json.dumps(response_json, separators=(",", ":")).encode()
+        temporary_path = os.path.join(self.__objects_directory, f"{uuid.uuid4().hex}.tmp")
+
+        with open(temporary_path, "wb") as file:
+            file.write(payload)
+
+        self.__store(mep_code, term_id, key, temporary_path, hashlib.sha256(payload).hexdigest(), len(payload),
+                     stored=time.time() if stored is None else stored)
+
+    def list_entries(self) -> list[dict]:
+        """Every cached request, as dicts of mep_code, term_id, key, object (payload sha256) and stored (time.time()).
+
+        Lets a decoder change be re-run over every cached payload without contacting MyCampus.
+        """
+        entries = []
+
+        for ref_path in glob.glob(os.path.join(self.__refs_directory, "*.json")):
+            with open(ref_path) as file:
+                entries.append(json.load(file))
+
+        return entries
+
+    def seed_from_documentation(self) -> int:
+        """Store the response samples of MycampusAPIDocumentation/*.json, course data responses of
+        get_json_course_data, unless their course code is already cached.
+
+        Returns:
+            Number of samples stored.
+        """
+        seeded_count = 0
+
+        for sample_path in sorted(glob.glob(DOCUMENTATION_SAMPLES_GLOB)):
+            with open(sample_path) as file:
+                response_json = json.load(file)
+
+            if not response_json.get("data"):
+                continue
+
+            term_id = response_json["data"][0]["term"]
+            course_code = response_json["data"][0]["subjectCourse"]
+
+            if self.__read_ref(DOCUMENTATION_SAMPLES_MEP_CODE, term_id, course_code) is None:
+                self.put(DOCUMENTATION_SAMPLES_MEP_CODE, term_id, course_code, response_json,
+                         stored=os.path.getmtime(sample_path))
+                seeded_count += 1
+
+        return seeded_count
+
+    def __store(self, mep_code: str, term_id: str | None, key: str, temporary_path: str, digest: str, size: int,
+                stored: float):
+        """Move a payload written to temporary_path to its content address and point the key to it."""
+        object_path = self.__get_object_path(digest)
+
+        with self.__lock:
+            if not os.path.exists(object_path):  # Identical payloads are stored once
+                total_bytes = self.__get_total_bytes()
+                os.replace(temporary_path, object_path)
+                self.__total_bytes = total_bytes + size
+            else:
+                os.remove(temporary_path)
+                os.utime(object_path)
+
+            ref = {"mep_code": mep_code, "term_id": term_id, "key": key, "object": digest, "stored": stored}
+            self.__write_atomically(self.__get_ref_path(mep_code, term_id, key), json.dumps(ref).encode())
+
+            if self.__total_bytes > self.max_bytes:
+                self.__evict(keep_digest=digest)
+
+    def __get_object_path_of_key(self, mep_code: str, term_id: str | None, key: str) -> str | None:
+        """Path of the payload of a key, None when there is none or it expired (never in replay mode)."""
+        ref = self.__read_ref(mep_code, term_id, key)
+
+        if ref is None or (self.mode != RESPONSE_CACHE_REPLAY and time.time() - ref["stored"] > self.ttl):
+            return None
+
+        return self.__get_object_path(ref["object"])
+
+    def __read_ref(self, mep_code: str, term_id: str | None, key: str) -> dict | None:
+        try:
+            with open(self.__get_ref_path(mep_code, term_id, key)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def __get_ref_path(self, mep_code: str, term_id: str | None, key: str) -> str:
+        ref_digest = hashlib.sha256(json.dumps([mep_code, term_id, key]).encode()).hexdigest()
+
+        return os.path.join(self.__refs_directory, ref_digest + ".json")
+
+    def __get_object_path(self, digest: str) -> str:
+        return os.path.join(self.__objects_directory, digest + ".json")
+
+    def __get_total_bytes(self) -> int:
+        if self.__total_bytes is None:
+            self.__total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.__objects_directory)
+                                     if entry.name.endswith(".json"))
+
+        return self.__total_bytes
+
+    def __evict(self, keep_digest: str):
+        """Delete the least recently used objects, but the one just stored, until the cache fits in half of max_bytes
+        so eviction runs rarely. Refs of evicted objects are left behind and read as misses."""
+        objects = sorted((entry for entry in os.scandir(self.__objects_directory) if entry.name.endswith(".json")),
+                         key=lambda entry: entry.stat().st_mtime)
+
+        for entry in objects:
+            if self.__total_bytes <= self.max_bytes // 2:
+                break
+
+            if entry.name == keep_digest + ".json":
+                continue
+
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self.__total_bytes -= size
+
+    @staticmethod
+    def __write_atomically(path: str, content: bytes):
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(temporary_path, "wb") as file:
+            file.write(content)
+
+        os.replace(temporary_path, path)
+
+
+__response_cache = None
+__response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> MycampusResponseCache:
+    """Process wide response cache, created on first use from the SCHEDULIZER_MYCAMPUS_CACHE environment variable.
+
+    Returns:
+        MycampusResponseCache of the configured mode.
+    """
+    global __response_cache
+
+    if __response_cache is None:
+        with __response_cache_lock:
+            if __response_cache is None:
+                __response_cache = MycampusResponseCache(
+                    directory=MYCAMPUS_RESPONSE_CACHE_DIRECTORY,
+                    mode=os.getenv("SCHEDULIZER_MYCAMPUS_CACHE", MYCAMPUS_RESPONSE_CACHE_MODE_DEFAULT),
+                    ttl=MYCAMPUS_RESPONSE_CACHE_TTL,
+                    max_bytes=MYCAMPUS_RESPONSE_CACHE_MAX_BYTES)
+
+    return __response_cache
+
+
+def set_response_cache(response_cache: MycampusResponseCache):
+    """Replace the process wide response cache, e.g. with a replay cache for an offline benchmark.
+
+    Args:
+        response_cache: MycampusResponseCache every MyCampus API call uses from now on.
+    """
+    global __response_cache
+
+    __response_cache = response_cache
+
+
+if __name__ == "__main__":
+    seed_cache = MycampusResponseCache(directory=MYCAMPUS_RESPONSE_CACHE_DIRECTORY, mode=RESPONSE_CACHE_ON,
+                                       ttl=MYCAMPUS_RESPONSE_CACHE_TTL, max_bytes=MYCAMPUS_RESPONSE_CACHE_MAX_BYTES)
+
+    print(f"Seeded {seed_cache.seed_from_documentation()} documentation samples, "
+          f"{len(seed_cache.list_entries())} cached responses in {MYCAMPUS_RESPONSE_CACHE_DIRECTORY}")
@@ -0,0 +1,266 @@
+"""Persistent, handshaken MyCampus (Banner) http sessions.
+
+A MyCampus search only answers once its session went through the term selection handshake (see MycampusAPI.py), which
+costs two extra round trips. Instead of a new requests.Session per API call, sessions are kept alive in a pool keyed
+by (mep_code, term_id) and reused: steady state API calls cost a single round trip over an already open keep-alive
+connection. Every request goes through the rate limit, retries and circuit breaker of UpstreamClient.py.
+
+A pooled session is borrowed by one thread at a time (requests.Session is not thread-safe), so each key holds a stack of
+idle sessions and a new one is handshaken when every idle session of the key is in use. The number of sessions borrowed
+at the same time, over every key, is capped by MYCAMPUS_MAX_ACTIVE_SESSIONS: the process never has more requests in
+flight to MyCampus than that, however many course refreshes run concurrently.
+
+Sessions re-handshake on their own when they get older than MYCAMPUS_SESSION_MAX_AGE, or when a response shows the
+server side session expired (non json body, redirect to the term selection page, "success": false).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+import requests
+
+from Schedulizer.APIs.UpstreamClient import get_upstream_client
+from Schedulizer.constants import MYCAMPUS_SESSION_MAX_AGE, MYCAMPUS_SESSION_MAX_IDLE_PER_KEY, \
+    MYCAMPUS_MAX_ACTIVE_SESSIONS, MYCAMPUS_SESSION_CHECKOUT_TIMEOUT
+
+MYCAMPUS_SSB_URL = "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb"
+
+
+class MycampusSession:
+    def __init__(self, mep_code: str, term_id: str | None):
+        """requests.Session bound to the term selection of a school (and term).
+
+        Args:
+            mep_code: School mep code. Example: Ontario Tech University = "UOIT".
+            term_id: Term id selected by the handshake, None to only select the school (term listing requests).
+        """
+        self.mep_code = mep_code
+        self.term_id = term_id
+
+        self.__session = requests.Session()
+        self.__handshake_time = None  # time.monotonic() of the last successful handshake, None before the first one
+
+    def handshake(self):
+        """Select the school (and term) of the session, required by Banner before any search request."""
+        self.__handshake_time = None
+
+        get_upstream_client().get(self.__session, url=f"{MYCAMPUS_SSB_URL}/term/termSelection?mode=search&"
+                                                      f"mepCode={self.mep_code}").raise_for_status()
+
+        if self.term_id is not None:
+            get_upstream_client().get(self.__session, url=f"{MYCAMPUS_SSB_URL}/term/search?mode=search&"
+                                                          f"term={self.term_id}").raise_for_status()
+
+        self.__handshake_time = time.monotonic()
+
+    def is_expired(self) -> bool:
+        """Whether the session needs a (new) handshake before its next request."""
+        return self.__handshake_time is None or time.monotonic() - self.__handshake_time > MYCAMPUS_SESSION_MAX_AGE
+
+    def get_json(self, url: str, is_valid=None):
+        """http get request of a json resource, re-handshaking transparently when the session has expired.
+
+        Args:
+            url: Full url of the request.
+            is_valid: Optional function given the decoded json, returns False when the response is not an answer to
+                the request (e.g. leftover results of a previous search). An invalid response is retried once after
+                a new handshake.
+
+        Raises:
+            requests.exceptions.RequestException: MyCampus could not be reached.
+            RuntimeError: MyCampus still answered with an invalid response after a new handshake.
+
+        Returns:
+            Decoded json response.
+        """
+        if self.is_expired():
+            self.handshake()
+
+        response_json = self.__get_valid_json(url, is_valid)
+
+        if response_json is None:  # Server side session expired (or stale), handshake again and retry once
+            self.handshake()
+            response_json = self.__get_valid_json(url, is_valid)
+
+            if response_json is None:
+                raise RuntimeError(f"Invalid MyCampus response for {url} after a new session handshake!")
+
+        return response_json
+
+    def iter_content(self, url: str, chunk_size: int):
+        """http get request of a json resource streamed as raw body chunks, re-handshaking transparently when the
+        session has expired.
+
+        Only the http level signs of an expired session (error status, redirect, non json body) are checked before the
+        first chunk is yielded, the caller validates the content while decoding it.
+
+        Args:
+            url: Full url of the request.
+            chunk_size: Maximum bytes per chunk.
+
+        Raises:
+            requests.exceptions.RequestException: MyCampus could not be reached.
+            RuntimeError: MyCampus still answered with an invalid response after a new handshake.
+
+        Yields:
+            Bytes chunks of the response body.
+        """
+        if self.is_expired():
+            self.handshake()
+
+        response = self.__get_json_stream(url)
+
+        if response is None:  # Server side session expired, handshake again and retry once
+            self.handshake()
+            response = self.__get_json_stream(url)
+
+            if response is None:
+                raise RuntimeError(f"Invalid MyCampus response for {url} after a new session handshake!")
+
+        with response:
+            yield from response.iter_content(chunk_size=chunk_size)
+
+    def reset_search(self):
+        """Clear the search form Banner keeps per session, so the next search does not answer with stale results."""
+        get_upstream_client().post(self.__session, url=f"{MYCAMPUS_SSB_URL}/classSearch/resetDataForm")
+
+    def close(self):
+        self.__session.close()
+
+    def __get_valid_json(self, url: str, is_valid):
+        """Decoded json response of a get request, None when the response shows an expired or stale session."""
+        response = get_upstream_client().get(self.__session, url=url)
+
+        if response.status_code != 200 or response.history:  # Expired sessions get redirected to termSelection
+            return None
+
+        try:
+            response_json = response.json()
+        except ValueError:  # html page instead of json
+            return None
+
+        if isinstance(response_json, dict) and (response_json.get("success") is False
+                                                or ("data" in response_json and response_json["data"] is None)):
+            return None
+
+        if is_valid is not None and not is_valid(response_json):
+            self.reset_search()
+            return None
+
+        return response_json
+
+    def __get_json_stream(self, url: str) -> requests.Response | None:
+        """Streamed response of a get request, None (and closed) when it shows an expired session."""
+        response = get_upstream_client().get(self.__session, url=url, stream=True)
+
+        if response.status_code != 200 or response.history or "json" not in response.headers.get("Content-Type", ""):
+            response.close()
+            return None
+
+        return response
+
+
+class MycampusSessionPool:
+    def __init__(self, max_idle_per_key: int, max_active: int, checkout_timeout: float):
+        """Pool of handshaken MyCampus sessions keyed by (mep_code, term_id).
+
+        Args:
+            max_idle_per_key: Maximum idle sessions kept open per key, extra released sessions are closed.
+            max_active: Maximum sessions borrowed at the same time over every key.
+            checkout_timeout: Seconds session() waits for a borrowed session to be released when max_active is reached.
+        """
+        if max_active < 1:
+            raise ValueError("max_active must be at least 1")
+
+        self.max_idle_per_key = max_idle_per_key
+        self.max_active = max_active
+        self.checkout_timeout = checkout_timeout
+
+        self.__idle = {}  # (mep_code, term_id) -> stack of idle MycampusSession, most recently used on top
+        self.__lock = threading.Lock()
+        self.__active = threading.BoundedSemaphore(max_active)
+
+    @contextmanager
+    def session(self, mep_code: str, term_id: str | None):
+        """Borrow a session of the given school and term for the duration of the with block.
+
+        Blocks while max_active sessions are already borrowed.
+
+        Args:
+            mep_code: School mep code. Example: Ontario Tech University = "UOIT".
+            term_id: Term id, None for requests that do not need a selected term.
+
+        Raises:
+            TimeoutError: No session was released within checkout_timeout seconds.
+
+        Yields:
+            MycampusSession, handshaken lazily by its first request.
+        """
+        key = (mep_code, term_id)
+
+        if not self.__active.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError(f"No MyCampus session was released within {self.checkout_timeout} seconds")
+
+        try:
+            with self.__lock:
+                idle_sessions = self.__idle.get(key)
+                session = idle_sessions.pop() if idle_sessions else None
+
+            if session is None:
+                session = MycampusSession(mep_code=mep_code, term_id=term_id)
+
+            try:
+                yield session
+            except BaseException:
+                session.close()  # Unknown connection state, do not reuse
+                raise
+
+            self.__release(key, session)
+        finally:
+            self.__active.release()
+
+    def warm(self, mep_code: str, term_id: str | None, count: int = 1):
+        """Handshake sessions ahead of the first request of a school and term.
+
+        Args:
+            mep_code: School mep code. Example: Ontario Tech University = "UOIT".
+            term_id: Term id, None for requests that do not need a selected term.
+            count: Number of idle sessions to have ready for the key.
+        """
+        key = (mep_code, term_id)
+
+        with self.__lock:
+            missing_count = min(count, self.max_idle_per_key) - len(self.__idle.get(key, []))
+
+        for _ in range(missing_count):
+            session = MycampusSession(mep_code=mep_code, term_id=term_id)
+            session.handshake()
+            self.__release(key, session)
+
+    def close_all(self):
+        """Close every idle session."""
+        with self.__lock:
+            idle, self.__idle = self.__idle, {}
+
+        for sessions in idle.values():
+            for session in sessions:
+                session.close()
+
+    def __release(self, key: tuple, session: MycampusSession):
+        with self.__lock:
+            idle_sessions = self.__idle.setdefault(key, [])
+
+            if len(idle_sessions) < self.max_idle_per_key:
+                idle_sessions.append(session)
+                return
+
+        session.close()
+
+
+__session_pool = MycampusSessionPool(max_idle_per_key=MYCAMPUS_SESSION_MAX_IDLE_PER_KEY,
+                                     max_active=MYCAMPUS_MAX_ACTIVE_SESSIONS,
+                                     checkout_timeout=MYCAMPUS_SESSION_CHECKOUT_TIMEOUT)
+
+
+def get_session_pool() -> MycampusSessionPool:
+    return __session_pool
@@ -0,0 +1,290 @@
+"""Shared client layer of every http request sent to MyCampus.
+
+Every request of the MyCampus sessions (MycampusSession.py) goes through the process wide UpstreamClient, which adds:
+    1)  A token bucket rate limit (MYCAMPUS_RATE_LIMIT_PER_SECOND, bursts of MYCAMPUS_RATE_LIMIT_BURST), so a burst of
+        refreshes never floods MyCampus.
+    2)  Jittered exponential retries of idempotent GET requests failing on a connection error, a timeout or a
+        retryable status (429, 5xx), up to MYCAMPUS_RETRY_MAX_ATTEMPTS attempts.
+    3)  A circuit breaker: after MYCAMPUS_CIRCUIT_FAILURE_THRESHOLD consecutive failed attempts the circuit opens and
+        every request fails fast with UpstreamUnavailableError, instead of each one waiting on timeouts. After
+        MYCAMPUS_CIRCUIT_RESET_TIMEOUT seconds the circuit is half-open: a single probe request is let through, its
+        success closes the circuit, its failure opens it again.
+
+UpstreamUnavailableError is a requests.exceptions.ConnectionError, so callers handle an open circuit like MyCampus being
+down: course refreshes fail and the requests are served from the records already in the DB.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime
+import requests
+
+from Schedulizer.constants import MYCAMPUS_CONNECT_TIMEOUT, MYCAMPUS_REQUEST_TIMEOUT, \
+    MYCAMPUS_RATE_LIMIT_PER_SECOND, MYCAMPUS_RATE_LIMIT_BURST, MYCAMPUS_RATE_LIMIT_MAX_WAIT, \
+    MYCAMPUS_RETRY_MAX_ATTEMPTS, MYCAMPUS_RETRY_BASE_DELAY, MYCAMPUS_RETRY_MAX_DELAY, \
+    MYCAMPUS_CIRCUIT_FAILURE_THRESHOLD, MYCAMPUS_CIRCUIT_RESET_TIMEOUT
+
+# Response status codes worth retrying, the request may succeed on its next attempt
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker states
+CIRCUIT_CLOSED = "closed"  # Requests go through
+CIRCUIT_OPEN = "open"  # Requests fail fast
+CIRCUIT_HALF_OPEN = "half-open"  # A single probe request goes through, the others fail fast
+
+
+class UpstreamUnavailableError(requests.exceptions.ConnectionError):
+    """MyCampus is considered down (open circuit) or the rate limit could not be met, the request was not sent."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """Thread-safe token bucket rate limiter.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Maximum tokens held, the number of requests that can be sent at once after an idle period.
+        """
+        self.rate = rate
+        self.burst = burst
+
+        self.__tokens = float(burst)
+        self.__last_refill = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """Take a token, sleeping until one is available.
+
+        Args:
+            max_wait: Maximum seconds to wait for a token.
+
+        Raises:
+            UpstreamUnavailableError: No token would be available within max_wait seconds, no token was taken.
+
+        Returns:
+            Seconds waited.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__last_refill) * self.rate)
+            self.__last_refill = now
+
+            wait = max(0.0, (1 - self.__tokens) / self.rate)
+
+            if wait > max_wait:
+                raise UpstreamUnavailableError(f"MyCampus rate limit exceeded, no request slot within {max_wait} s")
+
+            self.__tokens -= 1  # Reserved now, so concurrent callers queue behind this one
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """Thread-safe circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures opening the circuit.
+            reset_timeout: Seconds the circuit stays open before letting a probe request through (half-open).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.__state = CIRCUIT_CLOSED
+        self.__consecutive_failures = 0
+        self.__opened_at = None  # time.monotonic() the circuit last opened
+        self.__probe_in_flight = False
+        self.__lock = threading.Lock()
+
+        self.opened_count = 0
+        self.last_opened = None  # UTC datetime the circuit last opened
+
+    def get_state(self) -> str:
+        with self.__lock:
+            self.__update_state()
+            return self.__state
+
+    def get_consecutive_failures(self) -> int:
+        with self.__lock:
+            return self.__consecutive_failures
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now. A True answer in half-open state makes the caller the probe request, it
+        must report its outcome with record_success, record_failure or cancel_request."""
+        with self.__lock:
+            self.__update_state()
+
+            if self.__state == CIRCUIT_CLOSED:
+                return True
+
+            if self.__state == CIRCUIT_HALF_OPEN and not self.__probe_in_flight:
+                self.__probe_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self):
+        with self.__lock:
+            self.__state = CIRCUIT_CLOSED
+            self.__consecutive_failures = 0
+            self.__probe_in_flight = False
+
+    def cancel_request(self):
+        """The request allowed by allow_request was not sent after all, let another probe through when half-open."""
+        with self.__lock:
+            self.__probe_in_flight = False
+
+    def record_failure(self):
+        with self.__lock:
+            self.__consecutive_failures += 1
+
+            if self.__state == CIRCUIT_HALF_OPEN or self.__consecutive_failures >= self.failure_threshold:
+                if self.__state != CIRCUIT_OPEN:
+                    self.opened_count += 1
+                    self.last_opened = datetime.utcnow()
+
+                self.__state = CIRCUIT_OPEN
+                self.__opened_at = time.monotonic()
+
+            self.__probe_in_flight = False
+
+    def __update_state(self):
+        if self.__state == CIRCUIT_OPEN and time.monotonic() - self.__opened_at >= self.reset_timeout:
+            self.__state = CIRCUIT_HALF_OPEN
+
+
+class UpstreamClient:
+    def __init__(self, rate_limiter: TokenBucket, circuit_breaker: CircuitBreaker, max_attempts: int,
+                 retry_base_delay: float, retry_max_delay: float):
+        """Rate limited, retrying and circuit broken sender of the http requests of requests.Session objects.
+
+        Args:
+            rate_limiter: TokenBucket every attempt takes a token from.
+            circuit_breaker: CircuitBreaker guarding every attempt.
+            max_attempts: Maximum attempts of a GET request (first attempt included).
+            retry_base_delay: Seconds of the first retry backoff, doubled every attempt.
+            retry_max_delay: Maximum seconds of a retry backoff.
+        """
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self.__stats = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0, "short_circuited": 0,
+                        "rate_limited_seconds": 0.0}
+        self.__stats_lock = threading.Lock()
+
+    def get(self, session: requests.Session, url: str, stream: bool = False) -> requests.Response:
+        """GET request, retried with jittered exponential backoff. See send()."""
+        return self.send(session, "GET", url, max_attempts=self.max_attempts, stream=stream)
+
+    def post(self, session: requests.Session, url: str) -> requests.Response:
+        """POST request, never retried as it is not idempotent. See send()."""
+        return self.send(session, "POST", url, max_attempts=1)
+
+    def send(self, session: requests.Session, method: str, url: str, max_attempts: int,
+             stream: bool = False) -> requests.Response:
+        """Send a request through the rate limiter and the circuit breaker.
+
+        Args:
+            session: requests.Session sending the request.
+            method: http method.
+            url: Full url of the request.
+            max_attempts: Maximum attempts of the request.
+            stream: Return once the response headers are received, the body is read by the caller (e.g. through
+                Response.iter_content) who must close the response.
+
+        Raises:
+            UpstreamUnavailableError: The circuit is open (or opened while retrying), the request was not sent.
+            requests.exceptions.RequestException: Every attempt failed, the exception of the last attempt. Exceptions
+                other than a connection error or a timeout (e.g. ChunkedEncodingError, TooManyRedirects) are raised
+                on their first attempt.
+
+        Returns:
+            Response of the first attempt that did not fail. A response of a retryable status is returned as is once
+            the attempts run out.
+        """
+        self.__count("requests")
+
+        for attempt in range(max_attempts):
+            if attempt > 0:
+                self.__count("retries")
+                time.sleep(random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1))))
+
+            if not self.circuit_breaker.allow_request():
+                self.__count("short_circuited")
+                raise UpstreamUnavailableError(f"MyCampus circuit is {self.circuit_breaker.get_state()}, "
+                                               f"request not sent")
+
+            try:
+                self.__count("rate_limited_seconds", self.rate_limiter.acquire(max_wait=MYCAMPUS_RATE_LIMIT_MAX_WAIT))
+            except UpstreamUnavailableError:
+                self.circuit_breaker.cancel_request()
+                raise
+            self.__count("attempts")
+
+            try:
+                response = session.request(method, url, timeout=(MYCAMPUS_CONNECT_TIMEOUT, MYCAMPUS_REQUEST_TIMEOUT),
+                                           stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.circuit_breaker.record_failure()
+
+                if attempt == max_attempts - 1:
+                    self.__count("failures")
+                    raise
+
+                continue
+            except requests.exceptions.RequestException:  # Not worth retrying (e.g. body cut short, redirect loop)
+                self.circuit_breaker.record_failure()
+                self.__count("failures")
+                raise
+            except BaseException:  # Not a failure of MyCampus, but a probe must never stay in flight
+                self.circuit_breaker.cancel_request()
+                raise
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self.circuit_breaker.record_failure()
+
+                if attempt == max_attempts - 1:
+                    self.__count("failures")
+                    return response
+
+                response.close()  # Release the connection of a streamed response before retrying
+                continue
+
+            self.circuit_breaker.record_success()
+            return response
+
+    def get_stats(self) -> dict:
+        """Counters of the client since the process started, and the current circuit state."""
+        with self.__stats_lock:
+            stats = dict(self.__stats)
+
+        stats.update(circuit_state=self.circuit_breaker.get_state(),
+                     circuit_consecutive_failures=self.circuit_breaker.get_consecutive_failures(),
+                     circuit_opened_count=self.circuit_breaker.opened_count,
+                     circuit_last_opened=self.circuit_breaker.last_opened)
+
+        return stats
+
+    def __count(self, stat: str, amount: float = 1):
+        with self.__stats_lock:
+            self.__stats[stat] += amount
+
+
+__upstream_client = UpstreamClient(rate_limiter=TokenBucket(rate=MYCAMPUS_RATE_LIMIT_PER_SECOND,
+                                                            burst=MYCAMPUS_RATE_LIMIT_BURST),
+                                   circuit_breaker=CircuitBreaker(failure_threshold=MYCAMPUS_CIRCUIT_FAILURE_THRESHOLD,
+                                                                  reset_timeout=MYCAMPUS_CIRCUIT_RESET_TIMEOUT),
+                                   max_attempts=MYCAMPUS_RETRY_MAX_ATTEMPTS,
+                                   retry_base_delay=MYCAMPUS_RETRY_BASE_DELAY,
+                                   retry_max_delay=MYCAMPUS_RETRY_MAX_DELAY)
+
+
+def get_upstream_client() -> UpstreamClient:
+    return __upstream_client
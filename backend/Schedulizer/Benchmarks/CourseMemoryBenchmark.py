@@ -0,0 +1,105 @@
+"""Measurement of the memory held per section by a fully loaded term, before and after the compact Course and Meeting
+classes (__slots__, shared values, integer minute times).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline on a term payload repeating the sections of the APIs/MycampusAPIDocumentation samples.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.CourseMemoryBenchmark
+
+"Before" decodes the payload with the reference decoder into LegacyCourse and LegacyMeeting, the original layout of
+the classes (a __dict__ per object, a datetime.time per meeting time, a string object per value of the payload).
+"After" decodes it with the decoder of the program into Course and Meeting. Both measure the memory still allocated
+once the payload itself was released, so only the decoded objects and what they reference are counted. The number of
+values held by the shared value table (MeetingClass.py share_value) is printed last, it must stay within
+SHARED_COURSE_VALUES_MAX whatever the number of sections.
+"""
+
+import gc
+import json
+import tracemalloc
+
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj
+from Schedulizer.APIs.MycampusAPIDocumentation.MycampusAPIDecoderReference import \
+    reference_decode_api_json_to_course_obj
+from Schedulizer.Benchmarks.DecoderBenchmark import load_payloads
+from Schedulizer.MeetingClass import share_value
+from Schedulizer.constants import SHARED_COURSE_VALUES_MAX
+
+
+class LegacyMeeting:
+    def __init__(self, time_start, time_end, weekday_int, date_start, date_end, repeat_timedelta_days, location):
+        """Original layout of Meeting."""
+        self.time_start = time_start
+        self.time_end = time_end
+        self.weekday_int = weekday_int
+        self.date_start = date_start
+        self.date_end = date_end
+        self.repeat_timedelta_days = repeat_timedelta_days
+        self.location = location
+
+
+class LegacyCourse:
+    def __init__(self, fac, uid, crn, class_type, title, section, class_time, is_linked, link_tag, seats_filled,
+                 max_capacity, instructors, is_virtual):
+        """Original layout of Course."""
+        self.fac = fac
+        self.uid = uid
+        self.crn = crn
+        self.class_type = class_type
+        self.title = title
+        self.section = section
+        self.class_time = class_time
+        self.is_linked = is_linked
+        self.link_tag = link_tag
+        self.seats_filled = seats_filled
+        self.max_capacity = max_capacity
+        self.instructors = instructors
+        self.is_virtual = is_virtual
+
+
+def measure_retained_bytes(payload_text: str, decode) -> tuple[int, int]:
+    """Sections decoded from payload_text by decode, and the bytes they retain once the parsed payload is released."""
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        payload = json.loads(payload_text)  # Parsed while tracing, the strings the decoded objects keep are counted
+        courses = decode(payload)
+        del payload
+        gc.collect()
+
+        return len(courses), tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def run_course_memory_benchmark(section_count: int = 10000):
+    """Print the bytes retained per section of a term of section_count sections, before and after."""
+    payload = load_payloads(large_section_count=section_count)[f"large ({section_count} sections)"]
+    payload_text = json.dumps(payload)
+    del payload
+
+    before_count, before_bytes = measure_retained_bytes(
+        payload_text, lambda json_dict: reference_decode_api_json_to_course_obj(json_dict, course_class=LegacyCourse,
+                                                                                meeting_class=LegacyMeeting))
+    after_count, after_bytes = measure_retained_bytes(payload_text, decode_api_json_to_course_obj)
+
+    if before_count != section_count or after_count != section_count:
+        raise RuntimeError(f"Decoded {before_count} (before) and {after_count} (after) sections out of {section_count}")
+
+    print(f"{section_count} sections")
+    print(f"before: {before_bytes / 1024 ** 2:.1f} MiB, {before_bytes / section_count:.0f} bytes per section")
+    print(f"after:  {after_bytes / 1024 ** 2:.1f} MiB, {after_bytes / section_count:.0f} bytes per section "
+          f"({1 - after_bytes / before_bytes:.0%} less)")
+
+    shared_value_count = share_value.cache_info().currsize
+
+    if shared_value_count > SHARED_COURSE_VALUES_MAX:
+        raise RuntimeError(f"{shared_value_count} shared values, more than {SHARED_COURSE_VALUES_MAX}")
+
+    print(f"shared values: {shared_value_count} (at most {SHARED_COURSE_VALUES_MAX})")
+
+
+if __name__ == "__main__":
+    run_course_memory_benchmark()
@@ -0,0 +1,74 @@
+"""Benchmark of the /crn response serialization: the former Course.to_json join against CourseSerializer.py.
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline on the first 50 sections of the APIs/MycampusAPIDocumentation samples, the size of a large /crn request.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.CourseSerializerBenchmark
+
+The former response joined the Course.to_json of every course with ", ", which is not a json document on its own.
+Both outputs are first checked to hold the same courses (the former one parsed once wrapped in brackets), then timed.
+"""
+
+import glob
+import json
+import os
+import timeit
+
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj
+from Schedulizer.CourseSerializer import serialize_courses_json, orjson
+
+SAMPLES_GLOB = os.path.join(os.path.dirname(__file__), "..", "APIs", "MycampusAPIDocumentation", "*.json")
+
+
+def load_courses(crn_count: int = 50) -> list:
+    """First crn_count courses of the response samples."""
+    courses = []
+
+    for sample_path in sorted(glob.glob(SAMPLES_GLOB)):
+        with open(sample_path) as file:
+            courses += decode_api_json_to_course_obj(json.load(file))
+
+    if len(courses) < crn_count:
+        raise RuntimeError(f"The samples only hold {len(courses)} courses, {crn_count} requested")
+
+    return courses[:crn_count]
+
+
+def former_serialize(courses: list) -> str:
+    """Former general_crn_build serialization."""
+    return ", ".join(course.to_json() for course in courses)
+
+
+def run_course_serializer_benchmark(crn_count: int = 50, number: int = 500, repeat: int = 5):
+    """Check the serializers are equivalent, then print the best time per response of each one out of repeat runs."""
+    courses = load_courses(crn_count)
+
+    former_courses = json.loads(f"[{former_serialize(courses)}]")
+
+    if json.loads(serialize_courses_json(courses, use_orjson=False)) != former_courses or \
+            json.loads(serialize_courses_json(courses)) != former_courses:
+        raise RuntimeError("Serializers differ")
+
+    candidates = {"Course.to_json join (former)": lambda: former_serialize(courses),
+                  "CourseSerializer, json module": lambda: serialize_courses_json(courses, use_orjson=False)}
+
+    if orjson is not None:
+        candidates["CourseSerializer, orjson"] = lambda: serialize_courses_json(courses)
+    else:
+        print("orjson is not installed, skipped")
+
+    print(f"{crn_count} courses, identical content")
+
+    former_time = None
+    for name, serialize in candidates.items():
+        best_time = min(timeit.repeat(serialize, number=number, repeat=repeat)) / number
+
+        if former_time is None:
+            former_time = best_time
+
+        print(f"{name:>32}: {best_time * 1e6:8.1f} us per response, {former_time / best_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    run_course_serializer_benchmark()
@@ -0,0 +1,91 @@
+"""Benchmark of the course table lookups with and without the secondary indexes (DBController/Schema.py).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It
+runs on the configured storage backend (SCHEDULIZER_STORAGE, DBController/StorageBackend.py) and creates (then drops)
+its own scratch course table.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.CourseTableIndexBenchmark
+    $ SCHEDULIZER_STORAGE=sqlite python -m Schedulizer.Benchmarks.CourseTableIndexBenchmark
+
+The same synthetic term is queried twice, once forcing the database to ignore the secondary indexes (the cost before
+the index migrations) and once letting it use them.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from Schedulizer.Benchmarks.SyntheticTerm import generate_synthetic_term, get_course_codes
+from Schedulizer.DBController.Courses import bulk_upsert_courses
+from Schedulizer.DBController.StorageBackend import get_storage
+
+BENCHMARK_COURSE_TABLE = "config_benchmark_indexes"
+
+# Table hint of every dialect keeping the query planner off the secondary indexes
+IGNORE_SECONDARY_INDEXES = {
+    "mysql": "IGNORE INDEX (idx_fac_uid, idx_metadata)",
+    "sqlite": "NOT INDEXED",
+}
+
+BENCHMARK_QUERIES = {
+    "get courses via fac/uid": "SELECT * FROM %s %s WHERE fac=%%s AND uid=%%s",
+    "is up to date": "SELECT metadata FROM %s %s WHERE fac=%%s AND uid=%%s LIMIT 1",
+    "count stale records": "SELECT COUNT(*) FROM %s %s WHERE metadata < %%s",
+}
+
+
+def run_index_benchmark(section_count: int = 10000, lookups: int = 200, seed: int = 0):
+    """Load a synthetic term into a scratch course table and print the lookup cost with and without indexes.
+
+    Args:
+        section_count: Number of synthetic sections to load.
+        lookups: Number of timed queries per query kind and index mode.
+        seed: Random seed of the synthetic term and of the looked up course codes.
+    """
+    courses = generate_synthetic_term(section_count=section_count, seed=seed)
+    course_codes = get_course_codes(courses)
+
+    storage = get_storage()
+    storage.drop_course_table(BENCHMARK_COURSE_TABLE)
+    storage.bootstrap_course_table(BENCHMARK_COURSE_TABLE)
+    bulk_upsert_courses(course_table=BENCHMARK_COURSE_TABLE, courses=courses)
+
+    rng = random.Random(seed)
+    course_code_params = [(code[:-5], code[-5:]) for code in rng.choices(course_codes, k=lookups)]
+    stale_params = [(datetime.utcnow() - timedelta(minutes=30),)] * lookups
+
+    print(f"{section_count} sections, {len(course_codes)} course codes, {lookups} lookups per query\n")
+    print(f"{'query':<26}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+
+    try:
+        with storage.connection() as connection:
+            cur = connection.cursor()
+
+            for name, query in BENCHMARK_QUERIES.items():
+                params = course_code_params if "fac=" in query else stale_params
+
+                before = __time_query(storage, cur, query % (BENCHMARK_COURSE_TABLE,
+                                                             IGNORE_SECONDARY_INDEXES[storage.dialect]), params)
+                after = __time_query(storage, cur, query % (BENCHMARK_COURSE_TABLE, ""), params)
+
+                print(f"{name:<26}{before * 1000:>16.3f}{after * 1000:>16.3f}{before / after:>9.1f}x")
+
+            cur.close()
+    finally:
+        storage.drop_course_table(BENCHMARK_COURSE_TABLE)
+
+
+def __time_query(storage, cur, query: str, params: list[tuple]) -> float:
+    """Average seconds per execution of a query over every given parameter tuple."""
+    start = time.perf_counter()
+
+    for param in params:
+        storage.execute(cur, query, param)
+        cur.fetchall()
+
+    return (time.perf_counter() - start) / len(params)
+
+
+if __name__ == "__main__":
+    run_index_benchmark()
@@ -0,0 +1,69 @@
+"""Micro-benchmark of the MyCampus decoder (APIs/MycampusAPIDecoder.py) against the original
+reference decoder (APIs/MycampusAPIDocumentation/MycampusAPIDecoderReference.py).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline on the response samples of APIs/MycampusAPIDocumentation, plus a large payload repeating their sections.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.DecoderBenchmark
+
+Both decoders are timed on every payload. That they decode to identical Course objects is tested by
+tests/test_mycampus_api_decoder.py.
+"""
+
+import copy
+import glob
+import json
+import os
+import timeit
+
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj
+from Schedulizer.APIs.MycampusAPIDocumentation.MycampusAPIDecoderReference import \
+    reference_decode_api_json_to_course_obj
+
+SAMPLES_GLOB = os.path.join(os.path.dirname(__file__), "..", "APIs", "MycampusAPIDocumentation", "*.json")
+
+
+def load_payloads(large_section_count: int = 5000) -> dict[str, dict]:
+    """Response samples by file name, plus a "large" payload of large_section_count sections repeating the sections
+    of every sample under new crn codes."""
+    payloads = {}
+
+    for sample_path in sorted(glob.glob(SAMPLES_GLOB)):
+        with open(sample_path) as file:
+            payloads[os.path.basename(sample_path)] = json.load(file)
+
+    sample_sections = [section for payload in payloads.values() for section in payload["data"]]
+    large_sections = []
+
+    for index in range(large_section_count):
+        section = copy.deepcopy(sample_sections[index % len(sample_sections)])
+        section["courseReferenceNumber"] = str(10000 + index)
+        large_sections.append(section)
+
+    payloads[f"large ({large_section_count} sections)"] = {"success": True, "totalCount": large_section_count,
+                                                           "data": large_sections}
+
+    return payloads
+
+
+def run_decoder_benchmark(repeat: int = 5):
+    """Print the best time of both decoders out of repeat runs per payload."""
+    payloads = load_payloads()
+
+    print(f"{'payload':>36} {'reference (ms)':>15} {'optimized (ms)':>15} {'speedup':>8}")
+
+    for name, payload in payloads.items():
+        number = max(1, 2000 // len(payload["data"]))
+
+        reference_time = min(timeit.repeat(lambda: reference_decode_api_json_to_course_obj(payload), number=number,
+                                           repeat=repeat)) / number
+        optimized_time = min(timeit.repeat(lambda: decode_api_json_to_course_obj(payload), number=number,
+                                           repeat=repeat)) / number
+
+        print(f"{name:>36} {reference_time * 1000:>15.2f} {optimized_time * 1000:>15.2f} "
+              f"{reference_time / optimized_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run_decoder_benchmark()
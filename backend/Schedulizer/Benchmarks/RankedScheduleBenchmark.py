@@ -0,0 +1,50 @@
+"""Benchmark of the ranked schedule search (ScheduleGenerator.py iter_ranked_schedules).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline on synthetic terms (SyntheticTerm.py).
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.RankedScheduleBenchmark
+
+For terms of 6 to 8 course codes of 32 sections, the time to the first schedule streamed is printed next to the time
+the search ended (exhausted, or stopped by the time budget) and the best score found. That the top schedules are the
+best scored ones is tested against a brute force ranking by tests/test_schedule_generator.py.
+"""
+
+import time
+
+from Schedulizer.Benchmarks.ScheduleGeneratorBenchmark import get_sections_by_course_code, build_course_bundles_list
+from Schedulizer.ScheduleGenerator import iter_ranked_schedules
+from Schedulizer.constants import SCHEDULE_TOP_K_DEFAULT, SCHEDULE_TIME_BUDGET_DEFAULT
+
+
+def run_ranked_schedule_benchmark(seeds: int = 3):
+    """Time the ranked search on synthetic terms."""
+    print(f"top {SCHEDULE_TOP_K_DEFAULT}, time budget {SCHEDULE_TIME_BUDGET_DEFAULT} s")
+    print(f"{'courses':>7} {'seed':>4} {'first (ms)':>10} {'end (ms)':>9} {'events':>6} {'complete':>8} "
+          f"{'best score':>10}")
+
+    for course_count in (6, 7, 8):
+        for seed in range(seeds):
+            course_bundles_list = build_course_bundles_list(
+                get_sections_by_course_code(course_count=course_count, sections_per_course=32, seed=seed))
+
+            start = time.perf_counter()
+            first_time = None
+            event_count = 0
+
+            for event in iter_ranked_schedules(course_bundles_list):
+                if first_time is None:
+                    first_time = time.perf_counter() - start
+
+                event_count += 1
+
+            end_time = time.perf_counter() - start
+            best_score = event["schedules"][0]["score"] if len(event["schedules"]) > 0 else None
+
+            print(f"{course_count:>7} {seed:>4} {first_time * 1000:>10.1f} {end_time * 1000:>9.1f} {event_count:>6} "
+                  f"{str(event['is_complete']):>8} {best_score:>10}")
+
+
+if __name__ == "__main__":
+    run_ranked_schedule_benchmark()
@@ -0,0 +1,73 @@
+"""Benchmark of the conflict-free schedule generator (ScheduleGenerator.py).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline on synthetic terms (SyntheticTerm.py) of 6 to 8 course codes of 32 sections each.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.ScheduleGeneratorBenchmark
+
+For every term, the time to build the link group bundles (LinkGroupIndex.py, done once per change of the sections of a
+course code) is printed next to the time of a search served from them, to the first schedule and to
+SCHEDULE_MAX_RESULTS_DEFAULT schedules. That the generator finds every conflict-free schedule is tested against a brute
+force enumeration by tests/test_schedule_generator.py.
+"""
+
+import itertools
+import time
+from datetime import date
+
+from Schedulizer.Benchmarks.SyntheticTerm import generate_synthetic_term
+from Schedulizer.LinkGroupIndex import CourseBundles
+from Schedulizer.ScheduleGenerator import iter_schedules
+from Schedulizer.constants import SCHEDULE_MAX_RESULTS_DEFAULT
+
+WINDOW_START = date(2022, 1, 10)
+WINDOW_END = date(2022, 4, 30)
+
+
+def get_sections_by_course_code(course_count: int, sections_per_course: int, seed: int) -> dict[str, list]:
+    """Sections of a synthetic term by course code."""
+    sections_by_course_code = {}
+
+    for course in generate_synthetic_term(section_count=course_count * sections_per_course,
+                                          sections_per_course=sections_per_course, seed=seed):
+        sections_by_course_code.setdefault(f"{course.fac}{course.uid}", []).append(course)
+
+    return sections_by_course_code
+
+
+def build_course_bundles_list(sections_by_course_code: dict[str, list]) -> list[CourseBundles]:
+    """CourseBundles of every course code, as the link group index builds them."""
+    return [CourseBundles(course_code=course_code, signature="", sections=sections, window_start=WINDOW_START,
+                          window_end=WINDOW_END) for course_code, sections in sections_by_course_code.items()]
+
+
+def run_schedule_generator_benchmark(seeds: int = 3):
+    """Time the generator on synthetic terms."""
+    print(f"{'courses':>7} {'seed':>4} {'bundles (ms)':>12} {'first (ms)':>10} "
+          f"{f'{SCHEDULE_MAX_RESULTS_DEFAULT} (ms)':>10}")
+
+    for course_count in (6, 7, 8):
+        for seed in range(seeds):
+            sections_by_course_code = get_sections_by_course_code(course_count=course_count, sections_per_course=32,
+                                                                  seed=seed)
+
+            start = time.perf_counter()
+            course_bundles_list = build_course_bundles_list(sections_by_course_code)
+            bundles_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            schedules = iter_schedules(course_bundles_list)
+            next(schedules)
+            first_time = time.perf_counter() - start
+
+            for _ in itertools.islice(schedules, SCHEDULE_MAX_RESULTS_DEFAULT - 1):
+                pass
+            results_time = time.perf_counter() - start
+
+            print(f"{course_count:>7} {seed:>4} {bundles_time * 1000:>12.1f} {first_time * 1000:>10.1f} "
+                  f"{results_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    run_schedule_generator_benchmark()
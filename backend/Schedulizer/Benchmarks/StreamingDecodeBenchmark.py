@@ -0,0 +1,106 @@
+"""Benchmark of the peak memory of decoding a searchResults response whole versus streamed (APIs/JsonStream.py).
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code. It runs
+offline: the responses are built from the PHY1020U sample of APIs/MycampusAPIDocumentation, its sections repeated under
+new crn codes, and written to a scratch file read back in MYCAMPUS_STREAM_CHUNK_SIZE chunks like a response body.
+
+Run from the backend directory:
+    $ python -m Schedulizer.Benchmarks.StreamingDecodeBenchmark
+
+The whole path holds the body, its parsed dict tree and every Course object at once (get_json_course_data then
+decode_api_json_to_course_obj). The streamed path holds one chunk, one section and one batch of
+SQL_BULK_UPSERT_BATCH_SIZE Course objects (iter_course_data_sections then iter_decode_api_sections, as
+PrimaryOperations.py refreshes courses), so its peak stays flat as the section count grows.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import tracemalloc
+
+from Schedulizer.APIs.JsonStream import iter_json_array
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj, iter_decode_api_sections
+from Schedulizer.constants import MYCAMPUS_STREAM_CHUNK_SIZE, SQL_BULK_UPSERT_BATCH_SIZE
+
+SAMPLE_RESPONSE_PATH = os.path.join(os.path.dirname(__file__), "..", "APIs", "MycampusAPIDocumentation",
+                                    "PHY1020U 2022-01-15 13-32.json")
+
+
+def write_synthetic_response(path: str, section_count: int):
+    """Write a searchResults response of section_count sections, repeating the sections of the sample response."""
+    with open(SAMPLE_RESPONSE_PATH) as file:
+        sample = json.load(file)
+
+    sample_sections = sample["data"]
+
+    with open(path, "w") as file:
+        file.write(f'{{"success": true, "totalCount": {section_count}, "data": [')
+
+        for index in range(section_count):
+            section = copy.deepcopy(sample_sections[index % len(sample_sections)])
+            section["courseReferenceNumber"] = str(10000 + index)
+
+            file.write(("," if index > 0 else "") + json.dumps(section))
+
+        file.write('], "pageOffset": 0, "pageMaxSize": 999}')
+
+
+def decode_whole(path: str) -> int:
+    with open(path, "rb") as file:
+        courses = decode_api_json_to_course_obj(json.loads(file.read()))
+
+    return len(courses)
+
+
+def decode_streamed(path: str) -> int:
+    section_count = 0
+    batch = []
+
+    with open(path, "rb") as file:
+        chunks = iter(lambda: file.read(MYCAMPUS_STREAM_CHUNK_SIZE), b"")
+
+        for course in iter_decode_api_sections(iter_json_array(chunks, array_key="data")):
+            batch.append(course)
+
+            if len(batch) == SQL_BULK_UPSERT_BATCH_SIZE:  # Written to the DB here by PrimaryOperations.py
+                section_count += len(batch)
+                batch = []
+
+    return section_count + len(batch)
+
+
+def measure_peak(func, path: str) -> tuple[int, int]:
+    """Sections decoded by func and the peak bytes allocated while decoding."""
+    tracemalloc.start()
+
+    try:
+        section_count = func(path)
+        return section_count, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_streaming_decode_benchmark(section_counts: tuple = (1000, 2000, 5000)):
+    """Print the peak memory of the whole and streamed decoding of responses of growing section counts."""
+    print(f"{'sections':>10} {'body (MiB)':>12} {'whole peak (MiB)':>18} {'streamed peak (MiB)':>21}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "searchResults.json")
+
+        for section_count in section_counts:
+            write_synthetic_response(path, section_count)
+
+            whole_count, whole_peak = measure_peak(decode_whole, path)
+            streamed_count, streamed_peak = measure_peak(decode_streamed, path)
+
+            if whole_count != section_count or streamed_count != section_count:
+                raise RuntimeError(f"Decoded {whole_count} (whole) and {streamed_count} (streamed) sections out of "
+                                   f"{section_count}")
+
+            print(f"{section_count:>10} {os.path.getsize(path) / 1024 ** 2:>12.1f} {whole_peak / 1024 ** 2:>18.1f} "
+                  f"{streamed_peak / 1024 ** 2:>21.1f}")
+
+
+if __name__ == "__main__":
+    run_streaming_decode_benchmark()
@@ -0,0 +1,107 @@
+"""Synthetic term data shared by the benchmarks.
+
+These files should under no conditions be used in production. Only to be used as reference and benchmark code.
+
+The generated sections mimic the shape of the MyCampus samples (APIs/MycampusAPIDocumentation): every course code has
+a couple of "A1" lectures meeting twice a week plus "B1" laboratories and "C1" tutorials meeting once a week, spread
+over the usual 80-minute time blocks of the day.
+"""
+
+import random
+from datetime import date, time
+
+from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import Meeting
+
+SYNTHETIC_FACULTIES = ["MATH", "PHY", "CHEM", "BIOL", "CSCI", "ENGR", "SSCI", "BUSI", "COMM", "PSYC", "NURS", "MECE"]
+
+# Start of every 80-minute block of the day, labs take two consecutive blocks
+SYNTHETIC_TIME_BLOCKS = [time(8, 10), time(9, 40), time(11, 10), time(12, 40), time(14, 10), time(15, 40),
+                         time(17, 10), time(18, 40)]
+
+SYNTHETIC_LOCATIONS = ["UON UA 1350", "UON UA 1140", "UON SCI 1350", "UON SIRC 1350", "UON ERC 1050", "UOW SYN SYN",
+                       "UON UB 2080", "UON OPG 1110"]
+
+
+def generate_synthetic_term(section_count: int = 10000, sections_per_course: int = 30, seed: int = 0,
+                            date_start: date = date(2022, 1, 17), date_end: date = date(2022, 4, 14)) -> list[Course]:
+    """Generate a synthetic term of Course objects.
+
+    Args:
+        section_count: Total number of sections (Course objects) to generate.
+        sections_per_course: Number of sections generated per course code.
+        seed: Random seed, the same arguments always generate the same term.
+        date_start: First day of classes.
+        date_end: Last day of classes.
+
+    Returns:
+        List of Course objects, grouped by course code.
+    """
+    rng = random.Random(seed)
+    courses = []
+
+    course_index = 0
+    while len(courses) < section_count:
+        fac = SYNTHETIC_FACULTIES[course_index % len(SYNTHETIC_FACULTIES)]
+        uid = f"{1000 + (course_index // len(SYNTHETIC_FACULTIES)) * 10 % 9000}U"
+        title = f"{fac.title()} Topics {course_index}"
+
+        section_total = min(sections_per_course, section_count - len(courses))
+        lecture_count = max(1, section_total // 10)
+        lab_count = (section_total - lecture_count) // 2
+
+        for section_index in range(section_total):
+            if section_index < lecture_count:
+                class_type, link_tag = "Lecture", "A1"
+                first_day = rng.randrange(0, 3)
+                days = [first_day, first_day + 2]
+                block = rng.randrange(len(SYNTHETIC_TIME_BLOCKS))
+                duration = 80
+            elif section_index < lecture_count + lab_count:
+                class_type, link_tag = "Laboratory", "B1"
+                days = [rng.randrange(0, 5)]
+                block = rng.randrange(len(SYNTHETIC_TIME_BLOCKS) - 1)
+                duration = 170
+            else:
+                class_type, link_tag = "Tutorial", "C1"
+                days = [rng.randrange(0, 5)]
+                block = rng.randrange(len(SYNTHETIC_TIME_BLOCKS))
+                duration = 80
+
+            time_start = SYNTHETIC_TIME_BLOCKS[block]
+            end_minutes = time_start.hour * 60 + time_start.minute + duration
+            time_end = time(end_minutes // 60, end_minutes % 60)
+            location = rng.choice(SYNTHETIC_LOCATIONS)
+
+            class_time = [Meeting(time_start=time_start,
+                                  time_end=time_end,
+                                  weekday_int=day,
+                                  date_start=date_start,
+                                  date_end=date_end,
+                                  repeat_timedelta_days=7,
+                                  location=location) for day in days]
+
+            max_capacity = rng.choice([30, 40, 60, 120, 250])
+
+            courses.append(Course(fac=fac,
+                                  uid=uid,
+                                  crn=10000 + len(courses),
+                                  class_type=class_type,
+                                  title=title,
+                                  section=f"{section_index + 1:03d}",
+                                  class_time=class_time,
+                                  is_linked=True,
+                                  link_tag=link_tag,
+                                  seats_filled=rng.randrange(0, max_capacity + 1),
+                                  max_capacity=max_capacity,
+                                  instructors=f"Instructor {rng.randrange(500)} (instructor@ontariotechu.ca)",
+                                  is_virtual=location.startswith("UOW")))
+
+        course_index += 1
+
+    return courses
+
+
+def get_course_codes(courses: list[Course]) -> list[str]:
+    """Distinct course codes (fac + uid) of a list of courses, in order of appearance."""
+    return list(dict.fromkeys(f"{c.fac}{c.uid}" for c in courses))
@@ -0,0 +1,89 @@
+"""Bounded executor running the blocking parts of a request off the FastAPI event loop.
+
+The MyCampus requests, the DB drivers and the ics file writes are all blocking calls. Awaiting them through
+run_blocking() runs them on a process wide thread pool, so a slow upstream fetch or DB query only holds one of its
+workers while the event loop keeps serving every other client. The worker count bounds how much blocking work (open
+upstream requests, borrowed DB connections) a single uvicorn worker has in flight; further calls queue for a free
+worker.
+
+Executor settings are read from the environment (.env):
+    SCHEDULIZER_EXECUTOR_WORKERS: Maximum number of worker threads. Default = constants.EXECUTOR_DEFAULT_MAX_WORKERS.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from Schedulizer.constants import EXECUTOR_DEFAULT_MAX_WORKERS
+
+load_dotenv()
+
+__executor = None
+__executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process wide executor of the blocking calls, created on first use.
+
+    Returns:
+        ThreadPoolExecutor bounded to SCHEDULIZER_EXECUTOR_WORKERS threads.
+    """
+    global __executor
+
+    if __executor is None:
+        with __executor_lock:
+            if __executor is None:
+                __executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("SCHEDULIZER_EXECUTOR_WORKERS", EXECUTOR_DEFAULT_MAX_WORKERS)),
+                    thread_name_prefix="schedulizer-blocking")
+
+    return __executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Await a blocking function call run on the bounded executor.
+
+    Args:
+        func: Blocking function to call.
+        *args: Positional arguments of func.
+        **kwargs: Keyword arguments of func.
+
+    Returns:
+        Return value of func. Exceptions raised by func are raised to the awaiting coroutine.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def iterate_blocking(iterator):
+    """Iterate a blocking iterator (e.g. a generator doing CPU bound work) from a coroutine, every item being produced
+    on the bounded executor.
+
+    Args:
+        iterator: Blocking iterator to iterate.
+
+    Yields:
+        Items of iterator, as soon as each one is produced. Exceptions raised by iterator are raised to the iterating
+        coroutine.
+    """
+    exhausted = object()
+
+    while True:
+        item = await run_blocking(next, iterator, exhausted)
+
+        if item is exhausted:
+            return
+
+        yield item
+
+
+def shutdown_executor():
+    """Wait for the running blocking calls to finish and stop the executor. Called once when the app shuts down."""
+    global __executor
+
+    with __executor_lock:
+        if __executor is not None:
+            __executor.shutdown(wait=True)
+            __executor = None
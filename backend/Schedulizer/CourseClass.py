@@ -3,14 +3,18 @@
 It holds universally common course values such as instructors and capacity count.
 """
 
+import hashlib
 import json
 from datetime import date, time
 from types import SimpleNamespace
 
-from Schedulizer.MeetingClass import Meeting
+from Schedulizer.MeetingClass import Meeting, share_value
 
 
 class Course:
+    __slots__ = ("fac", "uid", "crn", "class_type", "title", "section", "class_time", "is_linked", "link_tag",
+                 "seats_filled", "max_capacity", "instructors", "is_virtual")
+
     def __init__(self, fac: str, uid: str, crn: int, class_type: str, title: str, section: str,
                  class_time: list[Meeting], is_linked: bool, link_tag: str, seats_filled: int, max_capacity: int,
                  instructors: str, is_virtual: bool):
@@ -34,20 +38,30 @@ class Course:
             is_virtual: Defines if the class is completely virtual/online.
         """
 
-        self.fac = fac
-        self.uid = uid
+        # Attributes live in __slots__, and the codes repeated over the sections of a term are shared (share_value), so
+        # a whole term of courses stays compact in memory. Free text (title, instructors) is kept as is
+        self.fac = share_value(fac)
+        self.uid = share_value(uid)
         self.crn = crn
-        self.class_type = class_type
+        self.class_type = share_value(class_type)
         self.title = title
-        self.section = section
+        self.section = share_value(section)
         self.class_time = class_time
         self.is_linked = is_linked
-        self.link_tag = link_tag
+        self.link_tag = share_value(link_tag)
         self.seats_filled = seats_filled
         self.max_capacity = max_capacity
         self.instructors = instructors
         self.is_virtual = is_virtual
 
+    def get_json_dict(self) -> dict:
+        """Values of the course by attribute name, the json form of a course (CourseClassEncoder).
+
+        Returns:
+            Dict of every attribute, class_time still holding Meeting objects.
+        """
+        return {attribute: getattr(self, attribute) for attribute in Course.__slots__}
+
     def get_serialized_self_class_time(self) -> str:
         """Returns a short json class time (short form used for database storage) of self.class_time.
 
@@ -57,6 +71,19 @@ class Course:
         json_str = json.dumps(self.class_time, default=CourseClassEncoder.default)
         return json_str
 
+    def get_fingerprint(self) -> str:
+        """Content fingerprint of the course, changes whenever any of its values (class_time included) changes.
+
+        Stored with the course record, so refreshes only rewrite the records of sections that changed.
+
+        Returns:
+            32 character hex digest.
+        """
+        content = json.dumps([self.fac, self.uid, self.crn, self.class_type, self.title, self.section,
+                              self.get_serialized_self_class_time(), self.is_linked, self.link_tag, self.seats_filled,
+                              self.max_capacity, self.instructors, self.is_virtual])
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
     @staticmethod
     def deserialize_to_class_time(json_str: str) -> list[Meeting]:
         """Converts a short json class time (short form used for database storage) to appropriate format for
@@ -146,6 +173,8 @@ class CourseClassEncoder:
             return obj.isoformat()
         if isinstance(obj, int):
             return obj
+        if isinstance(obj, Course) or isinstance(obj, Meeting):
+            return obj.get_json_dict()  # Slotted, no __dict__
         else:
             return obj.__dict__
 
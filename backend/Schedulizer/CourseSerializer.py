@@ -0,0 +1,82 @@
+"""Fast json serialization of Course objects, used by the /crn responses.
+
+Course.to_json goes through json.dumps with CourseClassEncoder.default, called back for every Meeting, date and time.
+Here every course is converted once to a flat dict of plain json values: meeting times are looked up from their minute
+of the day (MeetingClass.py), dates are formatted once per distinct date. The dicts of every course are then dumped as
+a single json array, by orjson when it is installed (optional dependency) and by the standard json module otherwise.
+
+The values of a course are the same as the ones of Course.to_json: json.loads of both gives equal dicts.
+"""
+
+import json
+
+from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import TIMES_OF_DAY
+
+try:
+    import orjson
+except ImportError:  # Optional, falls back on the json module
+    orjson = None
+
+# Iso format of every minute of the day, indexed by Meeting.minute_start and Meeting.minute_end
+TIME_ISOFORMATS = tuple(time_of_day.isoformat() for time_of_day in TIMES_OF_DAY)
+
+# Iso format of the dates formatted so far, dates are shared by the meetings of a term so this stays small
+__date_isoformats = {}
+
+
+def get_course_json_dict(course: Course) -> dict:
+    """Flat dict of plain json values of a course, with the keys and values of Course.to_json.
+
+    Args:
+        course: Course to convert.
+
+    Returns:
+        Dict of every Course attribute, class_time as a list of dicts with iso format times and dates.
+    """
+    return {"fac": course.fac,
+            "uid": course.uid,
+            "crn": course.crn,
+            "class_type": course.class_type,
+            "title": course.title,
+            "section": course.section,
+            "class_time": [{"time_start": TIME_ISOFORMATS[meeting.minute_start],
+                            "time_end": TIME_ISOFORMATS[meeting.minute_end],
+                            "weekday_int": meeting.weekday_int,
+                            "date_start": __get_date_isoformat(meeting.date_start),
+                            "date_end": __get_date_isoformat(meeting.date_end),
+                            "repeat_timedelta_days": meeting.repeat_timedelta_days,
+                            "location": meeting.location} for meeting in course.class_time],
+            "is_linked": course.is_linked,
+            "link_tag": course.link_tag,
+            "seats_filled": course.seats_filled,
+            "max_capacity": course.max_capacity,
+            "instructors": course.instructors,
+            "is_virtual": course.is_virtual}
+
+
+def serialize_courses_json(courses: list[Course], use_orjson: bool = True) -> bytes:
+    """Serialize courses as a single json array.
+
+    Args:
+        courses: List of Course objects.
+        use_orjson: Dump through orjson when it is installed. Default = True.
+
+    Returns:
+        utf-8 encoded json array of the get_course_json_dict of every course, without whitespace.
+    """
+    course_dicts = [get_course_json_dict(course) for course in courses]
+
+    if use_orjson and orjson is not None:
+        return orjson.dumps(course_dicts)
+
+    return json.dumps(course_dicts, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def __get_date_isoformat(value) -> str:
+    isoformat = __date_isoformats.get(value)
+
+    if isoformat is None:
+        isoformat = __date_isoformats[value] = value.isoformat()
+
+    return isoformat
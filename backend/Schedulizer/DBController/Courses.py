@@ -1,49 +1,44 @@
-from datetime import datetime
+"""Course table operations used by the rest of the program.
 
-from Schedulizer.constants import OUTDATED_COURSE_METADATA_TIMEDELTA
-from Schedulizer.DBController.MysqlConnection import get_connection
+Every operation validates its arguments and runs on the configured storage backend (StorageBackend.py), so callers
+never depend on which database holds the courses.
+"""
+
+from datetime import datetime, time, timedelta
+
+from Schedulizer.constants import OUTDATED_COURSE_METADATA_TIMEDELTA, COURSE_FRESH, COURSE_STALE, COURSE_EXPIRED, \
+    COURSE_MISSING, COURSE_REFRESH_LEASE_TTL
+from Schedulizer.DBController.StorageBackend import get_storage
+from Schedulizer.SemesterConfigHandler import SemesterConfig
 from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import MINUTES_PER_DAY
 
 
-def __check_add_course_table(course_table: str):
-    """Check that the course table exists, if it doesn't exist make a new courses table
+def bootstrap_config_schema(config_object: SemesterConfig):
+    """Bootstrap the course table of a SemesterConfig (Schema.py), called when configs are loaded.
 
     Args:
-        course_table: course_table: SQL course_table name.
+        config_object: SemesterConfig object holding semester calendar info.
     """
-    connection = get_connection()
-    cur = connection.cursor(prepared=True)
+    get_storage().bootstrap_course_table(config_object.db_table_name)
 
-    if not isinstance(course_table, str):
-        raise TypeError("course_table must be a string")
 
-    cur.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_name='%s'" % course_table)
+def __check_add_course_table(course_table: str):
+    """Check that the course table was bootstrapped, if it wasn't bootstrap it now (Schema.py).
 
-    if cur.fetchone()[0] != 1:  # fac table does not exist yet, add new fac table
-        # ^^^ cur.fetchone()[0] == 1  # means a table exists
-        cur.execute("CREATE TABLE %s ("
-                    "crn INT(10) NOT NULL, "
-                    "fac VARCHAR(5) NOT NULL, "
-                    "uid VARCHAR(5) NOT NULL, "
-                    "class_type VARCHAR(25) NOT NULL, "
-                    "title VARCHAR(25) NOT NULL, "
-                    "section VARCHAR(5) NOT NULL, "
-                    "class_time JSON NOT NULL, "
-                    "is_linked BOOL NOT NULL, "
-                    "link_tag VARCHAR(5), "
-                    "seats_filled INT(3) NOT NULL, "
-                    "max_capacity INT(3) NOT NULL, "
-                    "instructors VARCHAR(100), "
-                    "is_virtual BOOL NOT NULL, "
-                    "metadata TIMESTAMP NOT NULL, "
-                    "PRIMARY KEY(crn))" % course_table)
-        connection.commit()
+    Configs are normally bootstrapped when they are loaded, so this only checks the process local registry and never
+    queries the DB.
 
-    cur.close()
-    connection.close()
+    Args:
+        course_table: course_table: SQL course_table name.
+    """
+    storage = get_storage()
+
+    if not storage.is_course_table_verified(course_table):
+        storage.bootstrap_course_table(course_table)
 
 
-def is_up_to_date(course_table: str, fac: str, uid: bool):
+def is_up_to_date(course_table: str, fac: str, uid: str):
     """
 
     Args:
@@ -54,27 +49,88 @@ def is_up_to_date(course_table: str, fac: str, uid: bool):
     Returns:
         Boolean, True if the course record is up-to-date, False if the course record does not exist or isn't up-to-date.
     """
-    __check_add_course_table(course_table=course_table)
+    course_code = f"{fac}{uid}"
 
-    connection = get_connection()
-    cur = connection.cursor(prepared=True)
+    return course_code in get_courses_freshness(course_table=course_table, course_codes=[course_code])[COURSE_FRESH]
 
-    cur.execute("SELECT metadata FROM %s WHERE fac='%s' AND uid='%s' LIMIT 1" % (course_table, fac, uid))
 
-    metadata = cur.fetchone()
+def get_courses_freshness(course_table: str, course_codes: list[str],
+                          max_age: timedelta = OUTDATED_COURSE_METADATA_TIMEDELTA,
+                          hard_max_age: timedelta | None = None) -> dict[str, list[str]]:
+    """Sort many course codes by the freshness of their records with a single grouped query.
 
-    cur.close()
-    connection.close()
+    A course code is only as fresh as its oldest section record (MIN(metadata)).
+
+    Args:
+        course_table: SQL course_table name.
+        course_codes: List of course codes (fac + uid). (Example: ["MATH1020U", "PHY1010U"]).
+        max_age: Age after which records are stale. Default = OUTDATED_COURSE_METADATA_TIMEDELTA.
+        hard_max_age: Age after which records are expired, None to never classify records as expired. Default = None.
+
+    Returns:
+        Dict with the keys COURSE_FRESH, COURSE_STALE, COURSE_EXPIRED and COURSE_MISSING, each holding the list of
+        course codes in that state (in the order of course_codes, duplicates removed). Stale records are older than
+        max_age, expired records are older than hard_max_age, missing course codes have no record at all.
+    """
+    if not isinstance(course_codes, list) and not isinstance(course_codes, tuple):
+        raise TypeError("course_codes should be a list of course codes (str).")
+
+    for course_code in course_codes:
+        if not isinstance(course_code, str):
+            raise TypeError("Expected type str")
+
+    course_codes = list(dict.fromkeys(course_codes))  # Remove duplicates
+    freshness = {COURSE_FRESH: [], COURSE_STALE: [], COURSE_EXPIRED: [], COURSE_MISSING: []}
+
+    if len(course_codes) == 0:
+        return freshness
+
+    __check_add_course_table(course_table=course_table)
+
+    oldest_metadata = get_storage().get_courses_oldest_metadata(course_table=course_table, course_codes=course_codes)
 
     # Note: The server and MySQL DBController should be running on UTC
-    if metadata is None:
-        return False
-    elif (datetime.utcnow() - metadata[0]) < OUTDATED_COURSE_METADATA_TIMEDELTA:  # Data is not stale
-        # Note: metadata is now needed to search index 0 since the fetchone result is (datetime.datetime(),)
-        # If there is no record, fetchone returns None.
-        return True
-    else:
-        return False
+    now = datetime.utcnow()
+
+    for course_code in course_codes:
+        metadata = oldest_metadata.get(course_code)
+
+        if metadata is None:
+            freshness[COURSE_MISSING].append(course_code)
+        elif (now - metadata) < max_age:  # Data is not stale
+            freshness[COURSE_FRESH].append(course_code)
+        elif hard_max_age is not None and (now - metadata) >= hard_max_age:
+            freshness[COURSE_EXPIRED].append(course_code)
+        else:
+            freshness[COURSE_STALE].append(course_code)
+
+    return freshness
+
+
+def try_acquire_refresh_lease(course_table: str, course_code: str, holder: str) -> bool:
+    """Take the lease to refresh a course code, shared by every worker process using the database. Never blocks.
+
+    Args:
+        course_table: SQL course_table name.
+        course_code: Course code (fac + uid) about to be refreshed.
+        holder: Unique id of the caller (e.g. uuid4().hex), needed to release the lease.
+
+    Returns:
+        True if the caller may refresh the course code, False while another worker holds an unexpired lease on it.
+    """
+    return get_storage().try_acquire_lease(lease_key=f"{course_table}:{course_code}", holder=holder,
+                                           ttl_seconds=COURSE_REFRESH_LEASE_TTL)
+
+
+def release_refresh_lease(course_table: str, course_code: str, holder: str):
+    """Release a lease taken with try_acquire_refresh_lease.
+
+    Args:
+        course_table: SQL course_table name.
+        course_code: Course code (fac + uid) that was refreshed.
+        holder: Holder id given to try_acquire_refresh_lease.
+    """
+    get_storage().release_lease(lease_key=f"{course_table}:{course_code}", holder=holder)
 
 
 def update_course_record(course_table: str, c: Course):
@@ -88,60 +144,60 @@ def update_course_record(course_table: str, c: Course):
     if not isinstance(c, Course):
         raise TypeError("Expected type Course")
 
-    __check_add_course_table(course_table=course_table)  # Ensure table exists
-
-    connection = get_connection()
-    cur = connection.cursor(prepared=True)
+    bulk_upsert_courses(course_table=course_table, courses=[c])
 
-    cur.execute("SELECT COUNT(*) FROM %s WHERE crn=%s" % (course_table, c.crn))
-    # Select a pre-existing record with matching crn key
 
-    if cur.fetchone()[0] == 0:  # Course does not have a pre-existing record, create new record
-        cur.execute("INSERT INTO %s "
-                    "(crn, fac, uid, class_type, title, section, class_time, is_linked, link_tag, seats_filled, "
-                    "max_capacity, instructors, is_virtual, metadata) "
-                    "VALUES (%d, '%s', '%s', '%s', '%s', '%s', '%s', %r, '%s', %d, %d, '%s', %r, NOW())" % (
-                        course_table, c.crn, c.fac, c.uid, c.class_type[:25], c.title[:25], c.section,
-                        c.get_serialized_self_class_time(), c.is_linked, c.link_tag, c.seats_filled, c.max_capacity,
-                        c.instructors[:100], c.is_virtual)
-                    )
+def bulk_upsert_courses(course_table: str, courses: list[Course], fac: str = None, uid: str = None,
+                        received_crns: set[int] = None) -> dict[str, int]:
+    """Insert or update the records of many courses on the courses table in a single transaction.
 
-    else:  # Course has a pre-existing record, update record
-        cur.execute("UPDATE %s SET "
-                    "class_time='%s', is_linked=%r, link_tag='%s', seats_filled=%d, instructors='%s', is_virtual=%r, "
-                    "metadata=NOW() "
-                    "WHERE crn=%d" % (
-                        course_table, c.get_serialized_self_class_time(), c.is_linked, c.link_tag, c.seats_filled,
-                        c.instructors[:100], c.is_virtual, c.crn)
-                    )
+    Records are written with batched multi-row upsert statements of up to SQL_BULK_UPSERT_BATCH_SIZE rows, so
+    refreshing every section of a course code costs one round trip. Only new records and records whose content changed
+    (compared through Course.get_fingerprint) are written, along with their meetings on the normalized meetings table.
+    Unchanged records only have their metadata timestamp bumped.
 
-    connection.commit()
-    cur.close()
-    connection.close()
+    Args:
+        course_table: SQL course_table name.
+        courses: List of Course objects to insert or update records for.
+        fac: Faculty of a course code refreshed completely, see received_crns. Default None.
+        uid: Uid of a course code refreshed completely, see received_crns. Default None.
+        received_crns: Every crn of the course code fac + uid received by a complete refresh, its records whose crn is
+            not in it (sections removed upstream) are deleted in the same transaction. Default None (nothing deleted).
 
+    Raises:
+        ValueError: received_crns given empty, or without fac and uid.
 
-def __sql_to_course_decode(sql_result: list) -> Course:
+    Returns:
+        Dict with the number of "changed" records (inserted or updated), "unchanged" records (metadata bumped) and
+        "removed" records (deleted).
     """
+    if not isinstance(courses, list) and not isinstance(courses, tuple):
+        raise TypeError("courses should be a list of Course objects.")
 
-    Args:
-        sql_result: MySQL cursor results of a single course element
+    for c in courses:
+        if not isinstance(c, Course):
+            raise TypeError("Expected type Course")
+
+    if received_crns is not None and (len(received_crns) == 0 or fac is None or uid is None):
+        raise ValueError("received_crns should hold at least one crn, along with the fac and uid of the course code.")
+
+    if len(courses) == 0 and received_crns is None:
+        return {"changed": 0, "unchanged": 0, "removed": 0}
+
+    __check_add_course_table(course_table=course_table)  # Ensure table exists
+
+    return get_storage().bulk_upsert_courses(course_table=course_table, courses=courses, fac=fac, uid=uid,
+                                             received_crns=received_crns)
+
+
+def get_course_write_stats() -> dict[str, int]:
+    """Records written by bulk_upsert_courses since the process started.
 
     Returns:
-        Decoded course object
-    """
-    return Course(crn=sql_result[0],
-                  fac=sql_result[1],
-                  uid=sql_result[2],
-                  class_type=sql_result[3],
-                  title=sql_result[4],
-                  section=sql_result[5],
-                  class_time=Course.deserialize_to_class_time(sql_result[6]),
-                  is_linked=sql_result[7],
-                  link_tag=sql_result[8],
-                  seats_filled=sql_result[9],
-                  max_capacity=sql_result[10],
-                  instructors=sql_result[11],
-                  is_virtual=sql_result[12])
+        Dict with the number of "changed" records (inserted or updated), "unchanged" records (metadata bumped) and
+        "removed" records (deleted, sections removed upstream).
+    """
+    return get_storage().get_write_stats()
 
 
 def get_course_via_crn(course_table: str, crn: int) -> Course | None:
@@ -154,29 +210,41 @@ def get_course_via_crn(course_table: str, crn: int) -> Course | None:
     Returns:
         Course object of the matching crn. If a record does not exist, returns None.
     """
-    if isinstance(crn, int):
-        crn = str(crn)
-    elif not isinstance(crn, str):
-        raise TypeError("Expected type str or int")
+    return get_courses_via_crns(course_table=course_table, crns=[crn]).get(int(crn))
 
-    __check_add_course_table(course_table)
 
-    connection = get_connection()
-    cur = connection.cursor(prepared=True)
+def get_courses_via_crns(course_table: str, crns: list[int]) -> dict[int, Course]:
+    """Get Course objects of many courses according to CRN from DBController in a single query.
 
-    cur.execute("SELECT * FROM %s WHERE crn=%s" % (course_table, crn))
-    # Select a pre-existing record with matching crn key
+    Args:
+        course_table: SQL course_table name.
+        crns: List of CRN codes to pull Courses by.
 
-    sql_result = cur.fetchone()
+    Returns:
+        Dict of crn (int) -> Course object for every crn with a record. CRNs without a record are left out, compare the
+        keys against crns to find the missing CRNs.
+    """
+    if not isinstance(crns, list) and not isinstance(crns, tuple):
+        raise TypeError("crns should be a list of crn codes (int).")
 
-    connection.commit()
-    cur.close()
-    connection.close()
+    crn_keys = []
+    for crn in crns:
+        if isinstance(crn, str) and crn.isdigit():
+            crn = int(crn)
+        elif not isinstance(crn, int):
+            raise TypeError("Expected type str or int")
+        crn_keys.append(crn)
 
-    if sql_result is None:
-        return None
-    else:
-        return __sql_to_course_decode(sql_result)
+    crn_keys = list(dict.fromkeys(crn_keys))  # Remove duplicates
+
+    if len(crn_keys) == 0:
+        return {}
+
+    __check_add_course_table(course_table)
+
+    courses = get_storage().get_courses_via_crns(course_table=course_table, crns=crn_keys)
+
+    return {course.crn: course for course in courses}
 
 
 def get_courses_via_fac_uid(course_table: str, fac: str, uid: str) -> list[Course] | None:
@@ -195,18 +263,60 @@ def get_courses_via_fac_uid(course_table: str, fac: str, uid: str) -> list[Cours
 
     __check_add_course_table(course_table)
 
-    connection = get_connection()
-    cur = connection.cursor(prepared=True)
+    courses = get_storage().get_courses_via_fac_uid(course_table=course_table, fac=fac, uid=uid)
 
-    cur.execute("SELECT * FROM %s WHERE fac='%s' AND uid='%s'" % (course_table, fac, uid))
+    if len(courses) == 0:
+        return None
+    else:
+        return courses
 
-    sql_result = cur.fetchall()
 
-    connection.commit()
-    cur.close()
-    connection.close()
+def get_course_fingerprints_via_fac_uid(course_table: str, fac: str, uid: str) -> dict[int, str | None]:
+    """Stored content fingerprint (Course.get_fingerprint) of every section of a course, a cheap way to tell whether
+    any of its sections changed since they were last read.
 
-    if sql_result is None or sql_result == []:
-        return None
-    else:
-        return [__sql_to_course_decode(course_element) for course_element in sql_result]
+    Args:
+        course_table: SQL course_table name.
+        fac: FAC of the course (Ex: MATH, PHY, CHEM)
+        uid: UID of the course (Ex: 1010U, 1020U, 1800U)
+
+    Returns:
+        Dict of crn (int) -> fingerprint of every section of the matching FAC and UID, empty if no records exist. The
+        fingerprint is None for records not rewritten since the fingerprint column was added.
+    """
+    if not isinstance(fac, str) or not isinstance(uid, str):
+        raise TypeError("Expected type str")
+
+    __check_add_course_table(course_table)
+
+    return get_storage().get_fingerprints_via_fac_uid(course_table=course_table, fac=fac, uid=uid)
+
+
+def get_courses_via_time_range(course_table: str, fac: str, uid: str, start_after: time | None = None,
+                               end_before: time | None = None) -> list[Course]:
+    """Get Course objects of the sections of a course whose meetings all fall inside a time of day range.
+
+    The range is checked on the indexed meetings table, for example every section of MATH1020U starting at or after
+    10:00 is get_courses_via_time_range(course_table, "MATH", "1020U", start_after=time(10, 0)).
+
+    Args:
+        course_table: SQL course_table name.
+        fac: FAC of the course (Ex: MATH, PHY, CHEM)
+        uid: UID of the course (Ex: 1010U, 1020U, 1800U)
+        start_after: Earliest start time of every meeting, default None (no limit).
+        end_before: Latest end time of every meeting, default None (no limit).
+
+    Returns:
+        List of course objects of the matching FAC and UID with every meeting inside the range. Sections without any
+        meeting (async) are left out.
+    """
+    if not isinstance(fac, str) or not isinstance(uid, str):
+        raise TypeError("Expected type str")
+
+    __check_add_course_table(course_table)
+
+    minute_start = 0 if start_after is None else start_after.hour * 60 + start_after.minute
+    minute_end = MINUTES_PER_DAY if end_before is None else end_before.hour * 60 + end_before.minute
+
+    return get_storage().get_courses_via_time_range(course_table=course_table, fac=fac, uid=uid,
+                                                    minute_start=minute_start, minute_end=minute_end)
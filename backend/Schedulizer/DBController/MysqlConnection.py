@@ -1,17 +1,149 @@
-"""Initial connection for the MySQL database.
+"""Pooled connections for the MySQL database.
+
+Opening a mysql.connector connection costs a TCP and an auth handshake, so connections are kept open in a bounded,
+thread-safe pool shared by the whole process. Connections are opened lazily up to the pool size, checked for health
+when they are borrowed, and closed once they sit idle for longer than the idle timeout.
+
+Pool settings are read from the environment (.env) next to the regular connection settings:
+    SQL_POOL_SIZE: Maximum number of open connections. Default = constants.SQL_POOL_DEFAULT_SIZE.
+    SQL_POOL_IDLE_TIMEOUT: Seconds an idle connection is kept open. Default = constants.SQL_POOL_DEFAULT_IDLE_TIMEOUT.
+    SQL_POOL_CHECKOUT_TIMEOUT: Seconds to wait for a free connection before giving up.
+        Default = constants.SQL_POOL_DEFAULT_CHECKOUT_TIMEOUT.
 """
 
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+import threading
+import time
 import mysql.connector
 
+from Schedulizer.constants import SQL_POOL_DEFAULT_SIZE, SQL_POOL_DEFAULT_IDLE_TIMEOUT, \
+    SQL_POOL_DEFAULT_CHECKOUT_TIMEOUT
+
 load_dotenv()
 
 
-def get_connection():
-    db_connection = None
-    try:
-        db_connection = mysql.connector.connect(
+class ConnectionPool:
+    def __init__(self, size: int, idle_timeout: float, checkout_timeout: float):
+        """Bounded pool of MySQL connections.
+
+        Args:
+            size: Maximum number of connections open at the same time (borrowed and idle).
+            idle_timeout: Seconds an idle connection is kept before it is closed instead of reused.
+            checkout_timeout: Seconds acquire() waits for a connection to be released when the pool is exhausted.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        self.__idle = []  # Stack of (connection, last release time), the most recently used connection is on top
+        self.__open_count = 0  # Number of connections currently open (borrowed and idle)
+        self.__condition = threading.Condition()
+
+    def acquire(self):
+        """Borrow a connection from the pool.
+
+        Idle connections are reused when they are still healthy, otherwise a new connection is opened as long as the
+        pool is not full. When the pool is full this blocks until another thread releases a connection.
+
+        Raises:
+            TimeoutError: No connection was released within checkout_timeout seconds.
+
+        Returns:
+            An open mysql.connector connection. Must be given back with release().
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+            connection = None
+
+            with self.__condition:
+                while True:
+                    if self.__idle:
+                        connection, last_used = self.__idle.pop()
+
+                        if time.monotonic() - last_used > self.idle_timeout:  # Sat idle too long, drop it
+                            self.__discard(connection)
+                            connection = None
+                            continue
+                        break
+
+                    if self.__open_count < self.size:  # Room for a new connection, reserve its slot
+                        self.__open_count += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No MySQL connection available after {self.checkout_timeout} seconds")
+                    self.__condition.wait(remaining)
+
+            if connection is None:  # Reserved a slot, open the connection outside the lock
+                try:
+                    return self.__connect()
+                except Exception:
+                    with self.__condition:
+                        self.__open_count -= 1
+                        self.__condition.notify()
+                    raise
+
+            if self.__is_healthy(connection):
+                return connection
+
+            with self.__condition:  # Broken idle connection, drop it and try again
+                self.__discard(connection)
+
+    def release(self, connection):
+        """Give a borrowed connection back to the pool.
+
+        Args:
+            connection: Connection returned by acquire().
+        """
+        with self.__condition:
+            self.__idle.append((connection, time.monotonic()))
+            self.__condition.notify()
+
+    def discard(self, connection):
+        """Close a borrowed connection instead of giving it back, freeing its slot in the pool.
+
+        Args:
+            connection: Connection returned by acquire().
+        """
+        with self.__condition:
+            self.__discard(connection)
+
+    def close_all(self):
+        """Close every idle connection. Borrowed connections are closed when they are discarded."""
+        with self.__condition:
+            while self.__idle:
+                connection, _ = self.__idle.pop()
+                self.__discard(connection)
+
+    def __discard(self, connection):
+        """Close a connection and free its slot. Caller must hold the condition lock."""
+        try:
+            connection.close()
+        except Exception:
+            pass  # The connection is being thrown away either way
+
+        self.__open_count -= 1
+        self.__condition.notify()
+
+    @staticmethod
+    def __is_healthy(connection) -> bool:
+        """Health check on checkout, pings the server and reconnects once if the connection was dropped."""
+        try:
+            connection.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def __connect():
+        return mysql.connector.connect(
             host=os.getenv("SQL_HOST"),  # Local host = "localhost" or "127.0.0.1"
             user=os.getenv("SQL_USERNAME"),
             passwd=os.getenv("SQL_PASSWORD"),
@@ -19,7 +151,64 @@ def get_connection():
             port=os.getenv("SQL_PORT"),  # MySQL default port number is 3306.
             autocommit=True  # Autocommit 1 = True, 0 = False. To check on status Server $ mysql > select @@autocommit;
         )
-    except Exception as err:
-        print(f"\n\tError: '{err}'")
 
-    return db_connection
+
+__pool = ConnectionPool(size=int(os.getenv("SQL_POOL_SIZE", SQL_POOL_DEFAULT_SIZE)),
+                        idle_timeout=float(os.getenv("SQL_POOL_IDLE_TIMEOUT", SQL_POOL_DEFAULT_IDLE_TIMEOUT)),
+                        checkout_timeout=float(os.getenv("SQL_POOL_CHECKOUT_TIMEOUT",
+                                                         SQL_POOL_DEFAULT_CHECKOUT_TIMEOUT)))
+
+
+def get_pool() -> ConnectionPool:
+    """Process wide connection pool used by the DBController modules."""
+    return __pool
+
+
+def get_connection():
+    """Borrow a connection from the process wide pool.
+
+    The connection must be given back with release_connection(), prefer pooled_connection() which does it
+    automatically.
+
+    Returns:
+        An open mysql.connector connection.
+    """
+    return __pool.acquire()
+
+
+def release_connection(connection):
+    """Give a connection borrowed with get_connection() back to the pool.
+
+    Args:
+        connection: Connection to give back.
+    """
+    __pool.release(connection)
+
+
+@contextmanager
+def pooled_connection():
+    """Context manager borrowing a connection from the pool and giving it back when the block exits.
+
+    If the block raises, any open transaction is rolled back before the connection is reused. A connection that cannot
+    be rolled back is closed instead of being given back.
+
+    Example:
+        with pooled_connection() as connection:
+            cur = connection.cursor(prepared=True)
+            ...
+    """
+    connection = __pool.acquire()
+
+    try:
+        yield connection
+    except BaseException:
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            __pool.discard(connection)
+            raise
+        __pool.release(connection)
+        raise
+    else:
+        __pool.release(connection)
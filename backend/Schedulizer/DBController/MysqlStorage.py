@@ -0,0 +1,64 @@
+"""MySQL storage backend of the course tables (SCHEDULIZER_STORAGE="mysql").
+
+Connections are borrowed from the process wide pool of MysqlConnection.py.
+"""
+
+from contextlib import contextmanager
+
+from Schedulizer.DBController.MysqlConnection import pooled_connection
+from Schedulizer.DBController.StorageBackend import CourseStorage
+
+# Named MySQL lock held while migrating, keeps several workers from migrating the same table at once
+SCHEMA_MIGRATION_LOCK_NAME = "schedulizer_schema_migration"
+SCHEMA_MIGRATION_LOCK_TIMEOUT = 30  # Seconds
+
+
+class MysqlCourseStorage(CourseStorage):
+    dialect = "mysql"
+
+    # Note: The server and MySQL DBController should be running on UTC
+    now_sql = "NOW()"
+
+    def connection(self):
+        return pooled_connection()
+
+    def begin(self, connection):
+        connection.start_transaction()
+
+    def execute(self, cur, query: str, params=()):
+        cur.execute(query, params)
+
+    def upsert_clause(self, key_columns: list[str], update_columns: list[str]) -> str:
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column}=VALUES({column})" for column in update_columns)
+
+    @contextmanager
+    def schema_lock(self, cur):
+        cur.execute("SELECT GET_LOCK(%s, %s)", (SCHEMA_MIGRATION_LOCK_NAME, SCHEMA_MIGRATION_LOCK_TIMEOUT))
+        if cur.fetchone()[0] != 1:
+            raise RuntimeError("Could not acquire the schema migration lock!")
+
+        try:
+            yield
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (SCHEMA_MIGRATION_LOCK_NAME,))
+            cur.fetchone()
+
+    def add_index_if_missing(self, cur, table: str, index_name: str, columns: list[str]):
+        cur.execute("SELECT COUNT(*) FROM information_schema.statistics "
+                    "WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s", (table, index_name))
+
+        if cur.fetchone()[0] == 0:
+            cur.execute("ALTER TABLE %s ADD INDEX %s (%s)" % (table, index_name, ", ".join(columns)))
+
+    def add_column_if_missing(self, cur, table: str, column: str, definition: str):
+        cur.execute("SELECT COUNT(*) FROM information_schema.columns "
+                    "WHERE table_schema=DATABASE() AND table_name=%s AND column_name=%s", (table, column))
+
+        if cur.fetchone()[0] == 0:
+            cur.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, definition))
+
+    def list_tables(self, cur, prefix: str) -> list[str]:
+        cur.execute("SELECT table_name FROM information_schema.tables "
+                    "WHERE table_schema=DATABASE() AND table_name LIKE %s", (prefix.replace("_", "\\_") + "%",))
+
+        return [row[0] for row in cur.fetchall()]
@@ -0,0 +1,201 @@
+"""Schema definition and versioned migrations of the config course tables.
+
+Every SemesterConfig stores its courses on its own table (SemesterConfig.db_table_name). Instead of checking
+information_schema before every read and write, each course table is bootstrapped once per process by its storage
+backend (StorageBackend.py): pending migrations are applied in version order and the table is added to the backend's
+process local registry of verified tables. The DBController hot path only consults that registry.
+
+The applied version of every course table is recorded on the SCHEMA_VERSIONS_TABLE table, so new columns and indexes
+are added by appending a migration to COURSE_TABLE_MIGRATIONS, never by manual DDL. Migrations must be safe to re-run
+on a table that already has their change (tables created before versioning have no recorded version), and go through
+the storage backend hooks for anything that is not plain SQL shared by every backend.
+
+Run from the backend directory to migrate every existing course table of the configured storage backend forward:
+    $ python -m Schedulizer.DBController.Schema
+"""
+
+from Schedulizer.constants import SQL_BULK_UPSERT_BATCH_SIZE
+from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import Meeting
+
+# Table recording the applied migration version of each course table
+SCHEMA_VERSIONS_TABLE = "schedulizer_schema_versions"
+
+# Table of the leases workers take before refreshing a course code (StorageBackend.py try_acquire_lease)
+REFRESH_LEASES_TABLE = "schedulizer_refresh_leases"
+
+# Prefix of every course table (SemesterConfig.db_table_name)
+COURSE_TABLE_PREFIX = "config_"
+
+# Suffix of the normalized meetings child table of every course table (see get_meetings_table)
+MEETINGS_TABLE_SUFFIX = "_meetings"
+MEETINGS_TABLE_COLUMNS = ("crn, meeting_index, fac, uid, weekday_int, week_minute_start, week_minute_end, date_start, "
+                          "date_end, repeat_timedelta_days, location")
+MEETINGS_ROW_PLACEHOLDER = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+
+def get_meetings_table(course_table: str) -> str:
+    """Name of the normalized meetings child table of a course table.
+
+    Args:
+        course_table: SQL course_table name.
+
+    Returns:
+        SQL table name of the meetings table.
+    """
+    return course_table + MEETINGS_TABLE_SUFFIX
+
+
+def get_meeting_row(crn: int, fac: str, uid: str, meeting_index: int, meeting: Meeting) -> tuple:
+    """Values of a meetings table row, in the order of MEETINGS_TABLE_COLUMNS.
+
+    Args:
+        crn: CRN of the course the meeting belongs to.
+        fac: FAC of the course the meeting belongs to.
+        uid: UID of the course the meeting belongs to.
+        meeting_index: Index of the meeting in Course.class_time.
+        meeting: Meeting to store.
+
+    Returns:
+        Tuple of the row values.
+    """
+    return (crn, meeting_index, fac, uid, meeting.weekday_int, meeting.get_week_minute_start(),
+            meeting.get_week_minute_end(), meeting.date_start, meeting.date_end, meeting.repeat_timedelta_days,
+            meeting.location[:100])
+
+
+def __migration_create_course_table(storage, cur, course_table: str):
+    """Version 1: base course table."""
+    storage.execute(cur, "CREATE TABLE IF NOT EXISTS %s ("
+                         "crn INT(10) NOT NULL, "
+                         "fac VARCHAR(5) NOT NULL, "
+                         "uid VARCHAR(5) NOT NULL, "
+                         "class_type VARCHAR(25) NOT NULL, "
+                         "title VARCHAR(25) NOT NULL, "
+                         "section VARCHAR(5) NOT NULL, "
+                         "class_time JSON NOT NULL, "
+                         "is_linked BOOL NOT NULL, "
+                         "link_tag VARCHAR(5), "
+                         "seats_filled INT(3) NOT NULL, "
+                         "max_capacity INT(3) NOT NULL, "
+                         "instructors VARCHAR(100), "
+                         "is_virtual BOOL NOT NULL, "
+                         "metadata TIMESTAMP NOT NULL, "
+                         "PRIMARY KEY(crn))" % course_table)
+
+
+def __migration_add_fac_uid_index(storage, cur, course_table: str):
+    """Version 2: composite (fac, uid) index used by the course code lookups and freshness checks."""
+    storage.add_index_if_missing(cur, course_table, "idx_fac_uid", ["fac", "uid"])
+
+
+def __migration_add_metadata_index(storage, cur, course_table: str):
+    """Version 3: metadata index used to find stale records."""
+    storage.add_index_if_missing(cur, course_table, "idx_metadata", ["metadata"])
+
+
+def __migration_create_meetings_table(storage, cur, course_table: str):
+    """Version 4: normalized meetings child table, backfilled from the class_time json of existing records."""
+    meetings_table = get_meetings_table(course_table)
+
+    storage.execute(cur, "CREATE TABLE IF NOT EXISTS %s ("
+                         "crn INT(10) NOT NULL, "
+                         "meeting_index INT NOT NULL, "
+                         "fac VARCHAR(5) NOT NULL, "
+                         "uid VARCHAR(5) NOT NULL, "
+                         "weekday_int TINYINT NOT NULL, "
+                         "week_minute_start INT NOT NULL, "
+                         "week_minute_end INT NOT NULL, "
+                         "date_start DATE NOT NULL, "
+                         "date_end DATE NOT NULL, "
+                         "repeat_timedelta_days INT NOT NULL, "
+                         "location VARCHAR(100), "
+                         "PRIMARY KEY(crn, meeting_index))" % meetings_table)
+    storage.add_index_if_missing(cur, meetings_table, "idx_fac_uid_week_minute_start",
+                                 ["fac", "uid", "week_minute_start"])
+    storage.add_index_if_missing(cur, meetings_table, "idx_week_minute_start", ["week_minute_start"])
+
+    storage.execute(cur, "SELECT crn, fac, uid, class_time FROM %s WHERE crn NOT IN (SELECT crn FROM %s)" % (
+        course_table, meetings_table))
+
+    rows = []
+    for crn, fac, uid, class_time in cur.fetchall():
+        for meeting_index, meeting in enumerate(Course.deserialize_to_class_time(class_time)):
+            rows.append(get_meeting_row(crn, fac, uid, meeting_index, meeting))
+
+    for i in range(0, len(rows), SQL_BULK_UPSERT_BATCH_SIZE):
+        batch = rows[i:i + SQL_BULK_UPSERT_BATCH_SIZE]
+        storage.execute(cur, "INSERT INTO %s (%s) VALUES %s" % (
+            meetings_table, MEETINGS_TABLE_COLUMNS, ", ".join([MEETINGS_ROW_PLACEHOLDER] * len(batch))),
+            [value for row in batch for value in row])
+
+
+def __migration_add_fingerprint_column(storage, cur, course_table: str):
+    """Version 5: content fingerprint of every record (Course.get_fingerprint), NULL until the record is rewritten."""
+    storage.add_column_if_missing(cur, course_table, "fingerprint", "CHAR(32)")
+
+
+# Ordered list of (version, description, migration function). A migration function takes the storage backend, a cursor
+# and the course table name. Append new migrations with the next version number, never edit or reorder applied ones.
+COURSE_TABLE_MIGRATIONS = [
+    (1, "create course table", __migration_create_course_table),
+    (2, "add (fac, uid) index", __migration_add_fac_uid_index),
+    (3, "add metadata index", __migration_add_metadata_index),
+    (4, "create meetings table", __migration_create_meetings_table),
+    (5, "add fingerprint column", __migration_add_fingerprint_column),
+]
+
+COURSE_TABLE_SCHEMA_VERSION = COURSE_TABLE_MIGRATIONS[-1][0]
+
+
+def migrate_course_table(storage, cur, course_table: str):
+    """Apply every migration newer than the recorded version of the course table, recording each one as it goes.
+
+    Args:
+        storage: StorageBackend.CourseStorage the cursor belongs to.
+        cur: Cursor of an open storage connection.
+        course_table: SQL course_table name.
+    """
+    create_schema_versions_table(storage, cur)
+
+    version = get_recorded_version(storage, cur, course_table)
+
+    for migration_version, description, migration in COURSE_TABLE_MIGRATIONS:
+        if migration_version <= version:
+            continue
+
+        migration(storage, cur, course_table)
+
+        storage.execute(cur, "INSERT INTO %s (table_name, version, metadata) VALUES (%%s, %%s, %s) %s" % (
+            SCHEMA_VERSIONS_TABLE, storage.now_sql, storage.upsert_clause(["table_name"], ["version", "metadata"])),
+            (course_table, migration_version))
+
+
+def create_schema_versions_table(storage, cur):
+    storage.execute(cur, "CREATE TABLE IF NOT EXISTS %s ("
+                         "table_name VARCHAR(64) NOT NULL, "
+                         "version INT NOT NULL, "
+                         "metadata TIMESTAMP NOT NULL, "
+                         "PRIMARY KEY(table_name))" % SCHEMA_VERSIONS_TABLE)
+
+
+def create_refresh_leases_table(storage, cur):
+    storage.execute(cur, "CREATE TABLE IF NOT EXISTS %s ("
+                         "lease_key VARCHAR(100) NOT NULL, "
+                         "holder VARCHAR(32) NOT NULL, "
+                         "expires_at TIMESTAMP NOT NULL, "
+                         "PRIMARY KEY(lease_key))" % REFRESH_LEASES_TABLE)
+
+
+def get_recorded_version(storage, cur, course_table: str) -> int:
+    storage.execute(cur, "SELECT version FROM %s WHERE table_name=%%s" % SCHEMA_VERSIONS_TABLE, (course_table,))
+    row = cur.fetchone()
+
+    return 0 if row is None else row[0]
+
+
+if __name__ == "__main__":
+    from Schedulizer.DBController.StorageBackend import get_storage
+
+    for migrated_table in get_storage().migrate_all_course_tables():
+        print(f"{migrated_table} is at schema version {get_storage().get_course_table_version(migrated_table)}")
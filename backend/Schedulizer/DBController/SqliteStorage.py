@@ -0,0 +1,82 @@
+"""Embedded SQLite storage backend of the course tables (SCHEDULIZER_STORAGE="sqlite").
+
+Meant for single node deployments, local benchmarks and development without a MySQL server. A single connection is
+shared by every thread of the process and access to it is serialized, which also makes the in-memory database
+(path ":memory:") usable from the FastAPI worker threads.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date
+
+from Schedulizer.DBController.StorageBackend import CourseStorage
+
+# Explicit adapters, the implicit sqlite3 date and datetime adapters are deprecated
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+
+class SqliteCourseStorage(CourseStorage):
+    dialect = "sqlite"
+
+    # CURRENT_TIMESTAMP is always UTC on SQLite
+    now_sql = "CURRENT_TIMESTAMP"
+
+    def __init__(self, path: str = ":memory:"):
+        """SQLite course storage.
+
+        Args:
+            path: Database file path, ":memory:" keeps the database in memory for the life of the process.
+        """
+        super().__init__()
+
+        self.path = path
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__lock = threading.RLock()
+
+    @contextmanager
+    def connection(self):
+        with self.__lock:
+            try:
+                yield self.__connection
+            except BaseException:
+                if self.__connection.in_transaction:
+                    self.__connection.rollback()
+                raise
+
+    def begin(self, connection):
+        connection.execute("BEGIN")
+
+    def execute(self, cur, query: str, params=()):
+        cur.execute(query.replace("%s", "?"), params)
+
+    def upsert_clause(self, key_columns: list[str], update_columns: list[str]) -> str:
+        return (f"ON CONFLICT({', '.join(key_columns)}) DO UPDATE SET "
+                + ", ".join(f"{column}=excluded.{column}" for column in update_columns))
+
+    @contextmanager
+    def schema_lock(self, cur):
+        yield  # The connection lock already serializes every writer of the process
+
+    def add_index_if_missing(self, cur, table: str, index_name: str, columns: list[str]):
+        # SQLite index names are database wide, prefix them with the table name
+        cur.execute("CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" % (table, index_name, table, ", ".join(columns)))
+
+    def add_column_if_missing(self, cur, table: str, column: str, definition: str):
+        cur.execute("PRAGMA table_info(%s)" % table)
+
+        if column not in [row[1] for row in cur.fetchall()]:
+            cur.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, definition))
+
+    def list_tables(self, cur, prefix: str) -> list[str]:
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ? ESCAPE '\\'",
+                    (prefix.replace("_", "\\_") + "%",))
+
+        return [row[0] for row in cur.fetchall()]
+
+    def parse_timestamp(self, value) -> datetime:
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+    def parse_date(self, value) -> date:
+        return date.fromisoformat(value) if isinstance(value, str) else value
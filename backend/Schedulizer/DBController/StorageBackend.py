@@ -0,0 +1,534 @@
+"""Pluggable storage backends of the course tables.
+
+CourseStorage holds the SQL shared by every backend (written with %s placeholders) and the course table operations
+used by Courses.py. Each backend subclass only fills in its dialect hooks (abstract methods, a backend missing one can
+not be created): how to borrow a connection, start a transaction, write an upsert clause, add an index, etc.
+
+Available backends, chosen by the SCHEDULIZER_STORAGE environment variable (.env):
+    "mysql": MySQL server through the pooled mysql.connector connections (MysqlStorage.py). Default.
+    "sqlite": Embedded SQLite database file, no network DB hop (SqliteStorage.py). The file is set by the SQLITE_PATH
+        environment variable, the default ":memory:" keeps the whole database in memory for the life of the process.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from dotenv import load_dotenv
+
+from Schedulizer.constants import SQL_BULK_UPSERT_BATCH_SIZE, STORAGE_BACKEND_DEFAULT, SQLITE_DEFAULT_PATH
+from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import Meeting, MINUTES_PER_DAY
+from Schedulizer.DBController.Schema import COURSE_TABLE_PREFIX, MEETINGS_TABLE_SUFFIX, MEETINGS_TABLE_COLUMNS, \
+    MEETINGS_ROW_PLACEHOLDER, SCHEMA_VERSIONS_TABLE, REFRESH_LEASES_TABLE, get_meetings_table, get_meeting_row, \
+    migrate_course_table, create_schema_versions_table, create_refresh_leases_table, get_recorded_version
+
+load_dotenv()
+
+
+class CourseStorage(ABC):
+    # Name of the SQL dialect, set by every backend
+    dialect = None
+
+    # SQL expression of the current UTC timestamp
+    now_sql = "CURRENT_TIMESTAMP"
+
+    def __init__(self):
+        """Course table storage, subclassed by every storage backend."""
+        self.verified_tables = set()  # Course tables bootstrapped by this process
+        self.verified_tables_lock = threading.Lock()
+        self.refresh_leases_table_created = False
+        self.write_stats = {"changed": 0, "unchanged": 0, "removed": 0}  # Records written by bulk_upsert_courses
+        self.write_stats_lock = threading.Lock()
+
+    # vvv dialect hooks, implemented by every backend vvv
+
+    @abstractmethod
+    @contextmanager
+    def connection(self):
+        """Context manager borrowing a DB-API connection, rolling back any open transaction if the block raises."""
+
+    @abstractmethod
+    def begin(self, connection):
+        """Start a transaction on a connection borrowed with connection()."""
+
+    @abstractmethod
+    def execute(self, cur, query: str, params=()):
+        """Execute a query written with %s placeholders on a cursor of this backend."""
+
+    @abstractmethod
+    def upsert_clause(self, key_columns: list[str], update_columns: list[str]) -> str:
+        """Clause following "INSERT ... VALUES ..." updating update_columns when a row of the same key exists."""
+
+    @abstractmethod
+    @contextmanager
+    def schema_lock(self, cur):
+        """Context manager keeping other processes sharing the database from migrating at the same time."""
+
+    @abstractmethod
+    def add_index_if_missing(self, cur, table: str, index_name: str, columns: list[str]):
+        """Add an index to a table unless it already exists, so migrations can re-run."""
+
+    @abstractmethod
+    def add_column_if_missing(self, cur, table: str, column: str, definition: str):
+        """Add a nullable column to a table unless it already exists, so migrations can re-run."""
+
+    @abstractmethod
+    def list_tables(self, cur, prefix: str) -> list[str]:
+        """Names of every table of the database starting with prefix."""
+
+    def parse_timestamp(self, value) -> datetime:
+        """Convert a TIMESTAMP value returned by the driver to datetime."""
+        return value
+
+    def parse_date(self, value) -> date:
+        """Convert a DATE value returned by the driver to date."""
+        return value
+
+    # vvv schema bootstrap vvv
+
+    def is_course_table_verified(self, course_table: str) -> bool:
+        """Check the process local registry, never queries the DB.
+
+        Args:
+            course_table: SQL course_table name.
+
+        Returns:
+            True if the course table was already bootstrapped by this process.
+        """
+        return course_table in self.verified_tables
+
+    def bootstrap_course_table(self, course_table: str):
+        """Create the course table if needed and migrate it to the latest schema version (Schema.py). Runs once per
+        process per table.
+
+        Args:
+            course_table: SQL course_table name.
+        """
+        if not isinstance(course_table, str):
+            raise TypeError("course_table must be a string")
+
+        if course_table in self.verified_tables:
+            return
+
+        with self.verified_tables_lock:
+            if course_table in self.verified_tables:  # Bootstrapped by another thread while waiting on the lock
+                return
+
+            with self.connection() as connection:
+                cur = connection.cursor()
+
+                with self.schema_lock(cur):
+                    migrate_course_table(self, cur, course_table)
+
+                connection.commit()
+                cur.close()
+
+            self.verified_tables.add(course_table)
+
+    def get_course_table_version(self, course_table: str) -> int:
+        """Migration version recorded for a course table.
+
+        Args:
+            course_table: SQL course_table name.
+
+        Returns:
+            Applied migration version, 0 if the table was never bootstrapped.
+        """
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            create_schema_versions_table(self, cur)
+            version = get_recorded_version(self, cur, course_table)
+
+            connection.commit()
+            cur.close()
+
+        return version
+
+    def drop_course_table(self, course_table: str):
+        """Drop a course table and its meetings table and forget its recorded version.
+
+        The next bootstrap recreates both from version 1.
+
+        Args:
+            course_table: SQL course_table name.
+        """
+        with self.verified_tables_lock:
+            with self.connection() as connection:
+                cur = connection.cursor()
+
+                create_schema_versions_table(self, cur)
+                self.execute(cur, "DROP TABLE IF EXISTS %s" % get_meetings_table(course_table))
+                self.execute(cur, "DROP TABLE IF EXISTS %s" % course_table)
+                self.execute(cur, "DELETE FROM %s WHERE table_name=%%s" % SCHEMA_VERSIONS_TABLE, (course_table,))
+
+                connection.commit()
+                cur.close()
+
+            self.verified_tables.discard(course_table)
+
+    def migrate_all_course_tables(self) -> list[str]:
+        """Bootstrap every existing course table (tables named "config_*"), including ones of disabled configs.
+
+        Meant to be run by hand or on deploy, this is the only operation listing the tables of the database.
+
+        Returns:
+            List of the migrated course table names.
+        """
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            course_tables = [table for table in self.list_tables(cur, COURSE_TABLE_PREFIX)
+                             if not table.endswith(MEETINGS_TABLE_SUFFIX)]
+
+            cur.close()
+
+        for course_table in course_tables:
+            self.bootstrap_course_table(course_table)
+
+        return course_tables
+
+    # vvv course table operations vvv
+
+    def get_courses_oldest_metadata(self, course_table: str, course_codes: list[str]) -> dict[str, datetime]:
+        """Oldest record metadata of every course code with a single grouped query.
+
+        Args:
+            course_table: SQL course_table name.
+            course_codes: List of course codes (fac + uid).
+
+        Returns:
+            Dict of course code -> MIN(metadata) of its records. Course codes without a record are left out.
+        """
+        if len(course_codes) == 0:
+            return {}
+
+        params = []
+        for course_code in course_codes:
+            params.extend((course_code[:-5], course_code[-5:]))
+
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            self.execute(cur, "SELECT fac, uid, MIN(metadata) FROM %s WHERE %s GROUP BY fac, uid" % (
+                course_table, " OR ".join(["(fac = %s AND uid = %s)"] * len(course_codes))), params)
+
+            oldest_metadata = {f"{fac}{uid}": self.parse_timestamp(metadata) for fac, uid, metadata in cur.fetchall()}
+
+            cur.close()
+
+        return oldest_metadata
+
+    def bulk_upsert_courses(self, course_table: str, courses: list[Course], fac: str = None, uid: str = None,
+                            received_crns: set[int] = None) -> dict[str, int]:
+        """Insert or update the records of many courses and their meetings in a single transaction.
+
+        Records whose stored fingerprint matches the fingerprint of their course (Course.get_fingerprint) are left as
+        they are, only their metadata timestamp is bumped. New and changed records are upserted and get their meetings
+        rewritten.
+
+        Args:
+            course_table: SQL course_table name.
+            courses: List of Course objects to insert or update records for.
+            fac: Faculty of a course code refreshed completely, see received_crns. Default None.
+            uid: Uid of a course code refreshed completely, see received_crns. Default None.
+            received_crns: Every crn of the course code fac + uid received by a complete refresh. Records and meetings
+                of the course code whose crn is not in it (sections removed upstream, e.g. cancelled) are deleted in
+                the same transaction. Default None (nothing deleted).
+
+        Returns:
+            Dict with the number of "changed" records (inserted or updated), "unchanged" records (metadata bumped) and
+            "removed" records (deleted).
+        """
+        meetings_table = get_meetings_table(course_table)
+        upsert_clause = self.upsert_clause(["crn"], ["class_type", "title", "section", "class_time", "is_linked",
+                                                     "link_tag", "seats_filled", "max_capacity", "instructors",
+                                                     "is_virtual", "fingerprint", "metadata"])
+        counts = {"changed": 0, "unchanged": 0, "removed": 0}
+
+        with self.connection() as connection:
+            cur = connection.cursor()
+            self.begin(connection)
+
+            for i in range(0, len(courses), SQL_BULK_UPSERT_BATCH_SIZE):
+                batch = courses[i:i + SQL_BULK_UPSERT_BATCH_SIZE]
+                fingerprints = [c.get_fingerprint() for c in batch]
+
+                self.execute(cur, "SELECT crn, fingerprint FROM %s WHERE crn IN (%s)" % (
+                    course_table, ", ".join(["%s"] * len(batch))), [c.crn for c in batch])
+                stored_fingerprints = dict(cur.fetchall())
+
+                changed = [(c, fingerprint) for c, fingerprint in zip(batch, fingerprints)
+                           if stored_fingerprints.get(c.crn) != fingerprint]
+                unchanged_crns = [c.crn for c, fingerprint in zip(batch, fingerprints)
+                                  if stored_fingerprints.get(c.crn) == fingerprint]
+
+                if len(unchanged_crns) > 0:
+                    self.execute(cur, "UPDATE %s SET metadata=%s WHERE crn IN (%s)" % (
+                        course_table, self.now_sql, ", ".join(["%s"] * len(unchanged_crns))), unchanged_crns)
+
+                counts["changed"] += len(changed)
+                counts["unchanged"] += len(unchanged_crns)
+
+                if len(changed) == 0:
+                    continue
+
+                values = []
+                meeting_rows = []
+                for c, fingerprint in changed:
+                    values.extend((c.crn, c.fac, c.uid, c.class_type[:25], c.title[:25], c.section,
+                                   c.get_serialized_self_class_time(), c.is_linked, c.link_tag, c.seats_filled,
+                                   c.max_capacity, c.instructors[:100], c.is_virtual, fingerprint))
+
+                    for meeting_index, meeting in enumerate(c.class_time):
+                        meeting_rows.append(get_meeting_row(c.crn, c.fac, c.uid, meeting_index, meeting))
+
+                self.execute(cur, "INSERT INTO %s "
+                                  "(crn, fac, uid, class_type, title, section, class_time, is_linked, link_tag, "
+                                  "seats_filled, max_capacity, instructors, is_virtual, fingerprint, metadata) "
+                                  "VALUES %s %s" % (
+                                      course_table,
+                                      ", ".join(["(%%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, "
+                                                 "%%s, %s)" % self.now_sql] * len(changed)),
+                                      upsert_clause),
+                             values)
+
+                self.execute(cur, "DELETE FROM %s WHERE crn IN (%s)" % (
+                    meetings_table, ", ".join(["%s"] * len(changed))), [c.crn for c, _ in changed])
+
+                for j in range(0, len(meeting_rows), SQL_BULK_UPSERT_BATCH_SIZE):
+                    meeting_batch = meeting_rows[j:j + SQL_BULK_UPSERT_BATCH_SIZE]
+                    self.execute(cur, "INSERT INTO %s (%s) VALUES %s" % (
+                        meetings_table, MEETINGS_TABLE_COLUMNS,
+                        ", ".join([MEETINGS_ROW_PLACEHOLDER] * len(meeting_batch))),
+                        [value for row in meeting_batch for value in row])
+
+            if received_crns is not None:
+                crn_placeholders = ", ".join(["%s"] * len(received_crns))
+                params = [fac, uid, *received_crns]
+
+                self.execute(cur, "DELETE FROM %s WHERE fac = %%s AND uid = %%s AND crn NOT IN (%s)" % (
+                    meetings_table, crn_placeholders), params)
+                self.execute(cur, "DELETE FROM %s WHERE fac = %%s AND uid = %%s AND crn NOT IN (%s)" % (
+                    course_table, crn_placeholders), params)
+
+                counts["removed"] = cur.rowcount
+
+            connection.commit()
+            cur.close()
+
+        with self.write_stats_lock:
+            for key, count in counts.items():
+                self.write_stats[key] += count
+
+        return counts
+
+    def get_write_stats(self) -> dict[str, int]:
+        """Records "changed" (inserted or updated), "unchanged" (metadata bumped) and "removed" (deleted) by
+        bulk_upsert_courses since the process started."""
+        with self.write_stats_lock:
+            return dict(self.write_stats)
+
+    def select_courses(self, course_table: str, where: str, params: list) -> list[Course]:
+        """Select course records joined with their meetings and build the Course objects from plain columns.
+
+        Meetings come from the normalized meetings table, so reads never parse the class_time json.
+
+        Args:
+            course_table: SQL course_table name.
+            where: SQL WHERE condition on the course table (aliased "c"), with %s placeholders for params.
+            params: Values of the where placeholders.
+
+        Returns:
+            List of Course objects ordered by crn, each with its meetings in their original class_time order.
+        """
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            self.execute(cur, "SELECT c.crn, c.fac, c.uid, c.class_type, c.title, c.section, c.is_linked, c.link_tag, "
+                              "c.seats_filled, c.max_capacity, c.instructors, c.is_virtual, m.weekday_int, "
+                              "m.week_minute_start, m.week_minute_end, m.date_start, m.date_end, "
+                              "m.repeat_timedelta_days, m.location "
+                              "FROM %s c LEFT JOIN %s m ON m.crn = c.crn "
+                              "WHERE %s "
+                              "ORDER BY c.crn, m.meeting_index" % (course_table, get_meetings_table(course_table),
+                                                                   where),
+                         params)
+
+            sql_result = cur.fetchall()
+
+            cur.close()
+
+        courses = []
+
+        for row in sql_result:  # One row per meeting, courses without meetings have a single row of NULL meetings
+            if len(courses) == 0 or courses[-1].crn != row[0]:
+                courses.append(Course(crn=row[0],
+                                      fac=row[1],
+                                      uid=row[2],
+                                      class_type=row[3],
+                                      title=row[4],
+                                      section=row[5],
+                                      class_time=[],
+                                      is_linked=bool(row[6]),
+                                      link_tag=row[7],
+                                      seats_filled=row[8],
+                                      max_capacity=row[9],
+                                      instructors=row[10],
+                                      is_virtual=bool(row[11])))
+
+            if row[12] is not None:
+                courses[-1].class_time.append(Meeting.from_week_minutes(weekday_int=row[12],
+                                                                        week_minute_start=row[13],
+                                                                        week_minute_end=row[14],
+                                                                        date_start=self.parse_date(row[15]),
+                                                                        date_end=self.parse_date(row[16]),
+                                                                        repeat_timedelta_days=row[17],
+                                                                        location=row[18]))
+
+        return courses
+
+    def get_courses_via_crns(self, course_table: str, crns: list[int]) -> list[Course]:
+        """Course objects of every crn with a record, in a single query."""
+        return self.select_courses(course_table, "c.crn IN (%s)" % ", ".join(["%s"] * len(crns)), list(crns))
+
+    def get_courses_via_fac_uid(self, course_table: str, fac: str, uid: str) -> list[Course]:
+        """Course objects of every section of a course code."""
+        return self.select_courses(course_table, "c.fac = %s AND c.uid = %s", [fac, uid])
+
+    def get_fingerprints_via_fac_uid(self, course_table: str, fac: str, uid: str) -> dict[int, str | None]:
+        """Stored fingerprint of every section of a course code, without reading the sections themselves."""
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            self.execute(cur, "SELECT crn, fingerprint FROM %s WHERE fac = %%s AND uid = %%s" % course_table,
+                         [fac, uid])
+
+            fingerprints = dict(cur.fetchall())
+
+            cur.close()
+
+        return fingerprints
+
+    def get_courses_via_time_range(self, course_table: str, fac: str, uid: str, minute_start: int,
+                                   minute_end: int) -> list[Course]:
+        """Course objects of the sections of a course code whose meetings all fall inside a minute of the day range."""
+        return self.select_courses(course_table,
+                                   "c.crn IN (SELECT crn FROM %s WHERE fac = %%s AND uid = %%s GROUP BY crn "
+                                   "HAVING MIN(week_minute_start - weekday_int * %d) >= %%s "
+                                   "AND MAX(week_minute_end - weekday_int * %d) <= %%s)" % (
+                                       get_meetings_table(course_table), MINUTES_PER_DAY, MINUTES_PER_DAY),
+                                   [fac, uid, minute_start, minute_end])
+
+    # vvv refresh leases shared by every worker process vvv
+
+    def try_acquire_lease(self, lease_key: str, holder: str, ttl_seconds: float) -> bool:
+        """Take the lease of a key unless another holder has an unexpired lease on it. Never blocks.
+
+        Leases live on the database, so they are shared by every worker process (and host) using it, and an expired
+        lease of a crashed worker is simply taken over.
+
+        Args:
+            lease_key: Key of the work the lease guards, at most 100 characters.
+            holder: Unique id of the caller (e.g. uuid4().hex), needed to release the lease.
+            ttl_seconds: Seconds before the lease expires if it is not released.
+
+        Returns:
+            True if the caller now holds the lease.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            if not self.refresh_leases_table_created:
+                create_refresh_leases_table(self, cur)
+                self.refresh_leases_table_created = True
+
+            self.begin(connection)
+
+            # Take over an expired lease, or create the lease when the key has none. The upsert of the insert leaves
+            # an existing lease unchanged.
+            self.execute(cur, "UPDATE %s SET holder=%%s, expires_at=%%s WHERE lease_key=%%s AND expires_at < %%s" % (
+                REFRESH_LEASES_TABLE), (holder, expires_at, lease_key, now))
+            self.execute(cur, "INSERT INTO %s (lease_key, holder, expires_at) VALUES (%%s, %%s, %%s) %s" % (
+                REFRESH_LEASES_TABLE, self.upsert_clause(["lease_key"], ["lease_key"])),
+                (lease_key, holder, expires_at))
+            self.execute(cur, "SELECT holder FROM %s WHERE lease_key=%%s" % REFRESH_LEASES_TABLE, (lease_key,))
+            acquired = cur.fetchone()[0] == holder
+
+            connection.commit()
+            cur.close()
+
+        return acquired
+
+    def release_lease(self, lease_key: str, holder: str):
+        """Release a lease taken with try_acquire_lease, unless it expired and was taken over by another holder.
+
+        Args:
+            lease_key: Key of the lease.
+            holder: Holder id given to try_acquire_lease.
+        """
+        with self.connection() as connection:
+            cur = connection.cursor()
+
+            self.execute(cur, "DELETE FROM %s WHERE lease_key=%%s AND holder=%%s" % REFRESH_LEASES_TABLE,
+                         (lease_key, holder))
+
+            connection.commit()
+            cur.close()
+
+
+__storage = None
+__storage_lock = threading.Lock()
+
+
+def get_storage() -> CourseStorage:
+    """Process wide storage backend, created on first use from the SCHEDULIZER_STORAGE environment variable.
+
+    Returns:
+        CourseStorage of the configured backend.
+    """
+    global __storage
+
+    if __storage is None:
+        with __storage_lock:
+            if __storage is None:
+                __storage = create_storage(os.getenv("SCHEDULIZER_STORAGE", STORAGE_BACKEND_DEFAULT))
+
+    return __storage
+
+
+def set_storage(storage: CourseStorage):
+    """Replace the process wide storage backend, used by the benchmarks to run against a local SQLite database.
+
+    Args:
+        storage: CourseStorage every DBController operation uses from now on.
+    """
+    global __storage
+
+    __storage = storage
+
+
+def create_storage(backend: str) -> CourseStorage:
+    """Create a storage backend by name.
+
+    Backend modules are imported here so a deployment only needs the driver of the backend it uses.
+
+    Args:
+        backend: "mysql" or "sqlite".
+
+    Returns:
+        New CourseStorage of the backend.
+    """
+    if backend == "mysql":
+        from Schedulizer.DBController.MysqlStorage import MysqlCourseStorage
+        return MysqlCourseStorage()
+    elif backend == "sqlite":
+        from Schedulizer.DBController.SqliteStorage import SqliteCourseStorage
+        return SqliteCourseStorage(path=os.getenv("SQLITE_PATH", SQLITE_DEFAULT_PATH))
+    else:
+        raise ValueError(f"Unknown storage backend \"{backend}\", expected \"mysql\" or \"sqlite\"")
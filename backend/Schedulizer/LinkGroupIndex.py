@@ -0,0 +1,231 @@
+"""Link group index: the valid section bundles of every course code, computed once per change of its sections.
+
+A bundle is one section of every component of a link group of a course code, the unit a schedule is built from.
+link_tag is a letter followed by a group number (see Course.link_tag), the sections of a course code sharing a group
+number form a link group and a bundle takes one section of every letter of the group. For example a lecture "A1" goes
+with a laboratory "B1" and a tutorial "C1" of the same fac and uid. Sections that are not linked are one component
+per class_type, required next to the linked ones. Bundles whose own sections overlap are left out.
+
+Every section is also reduced to its occupancy: a bitset (python int) of the SCHEDULE_SLOT_MINUTES time slots it takes
+up over every day of the semester window, so two sections conflict exactly when their occupancies share a bit,
+whatever their weekdays, repeat intervals (weekly, biweekly labs, single day meetings) and date windows.
+
+The CourseBundles of a course code are cached in memory by the process (LinkGroupIndex), along with a signature of the
+stored fingerprints of its sections (Course.get_fingerprint). An entry is only served while the signature of the
+stored sections is unchanged, so a refresh changing any section (in this process or in another worker) invalidates it.
+"""
+
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from Schedulizer.CourseClass import Course
+from Schedulizer.MeetingClass import Meeting, MINUTES_PER_DAY
+from Schedulizer.constants import SCHEDULE_SLOT_MINUTES, LINK_GROUP_INDEX_MAX_ENTRIES
+
+SLOTS_PER_DAY = MINUTES_PER_DAY // SCHEDULE_SLOT_MINUTES
+
+
+class CourseBundles:
+    __slots__ = ("course_code", "signature", "sections", "occupancies", "link_groups", "bundles")
+
+    def __init__(self, course_code: str, signature: str, sections: list[Course], window_start: date, window_end: date):
+        """Sections, occupancies and valid bundles of a course code.
+
+        Args:
+            course_code: Course code (fac + uid) of the sections.
+            signature: Signature of the stored fingerprints of the sections (get_sections_signature).
+            sections: Every section (Course object) of the course code.
+            window_start: First day of the semester window the occupancies are computed over.
+            window_end: Last day of the semester window the occupancies are computed over.
+        """
+        self.course_code = course_code
+        self.signature = signature
+        self.sections = {section.crn: section for section in sections}  # crn -> Course
+        self.occupancies = {section.crn: get_occupancy(section, window_start, window_end) for section in sections}
+        self.link_groups = []  # Tuples (per component, sorted) of the tuples of the crn codes of every link group
+        self.bundles = []  # Tuples of the crn codes of a valid bundle, ordered by component
+
+        for group in get_link_groups(sections):
+            components = [group[component] for component in sorted(group)]
+            self.link_groups.append(tuple(tuple(section.crn for section in component) for component in components))
+
+            for bundle in itertools.product(*components):
+                occupancy = 0
+
+                for section in bundle:
+                    if self.occupancies[section.crn] & occupancy:  # Sections of the bundle overlap
+                        break
+
+                    occupancy |= self.occupancies[section.crn]
+                else:
+                    self.bundles.append(tuple(section.crn for section in bundle))
+
+
+class LinkGroupIndex:
+    def __init__(self, max_entries: int = LINK_GROUP_INDEX_MAX_ENTRIES):
+        """In-memory cache of the CourseBundles of course codes, least recently used entries evicted past max_entries.
+
+        Args:
+            max_entries: Most course codes kept. Default = LINK_GROUP_INDEX_MAX_ENTRIES.
+        """
+        self.__entries = OrderedDict()  # (course table, course code) -> CourseBundles
+        self.__lock = threading.Lock()
+        self.__max_entries = max_entries
+
+    def get(self, course_table: str, course_code: str, signature: str) -> CourseBundles | None:
+        """CourseBundles of a course code, None unless cached with the same signature (its sections changed since)."""
+        with self.__lock:
+            course_bundles = self.__entries.get((course_table, course_code))
+
+            if course_bundles is None or course_bundles.signature != signature:
+                return None
+
+            self.__entries.move_to_end((course_table, course_code))
+
+            return course_bundles
+
+    def put(self, course_table: str, course_code: str, course_bundles: CourseBundles):
+        """Cache the CourseBundles of a course code, replacing the previous ones."""
+        with self.__lock:
+            self.__entries[(course_table, course_code)] = course_bundles
+            self.__entries.move_to_end((course_table, course_code))
+
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, course_table: str, course_code: str):
+        """Forget the CourseBundles of a course code."""
+        with self.__lock:
+            self.__entries.pop((course_table, course_code), None)
+
+    def clear(self):
+        """Forget every CourseBundles."""
+        with self.__lock:
+            self.__entries.clear()
+
+
+# Process wide index, see get_link_group_index
+__link_group_index = LinkGroupIndex()
+
+
+def get_link_group_index() -> LinkGroupIndex:
+    """Process wide link group index.
+
+    Returns:
+        LinkGroupIndex used by the schedule searches (PrimaryOperations.py).
+    """
+    return __link_group_index
+
+
+def set_link_group_index(link_group_index: LinkGroupIndex):
+    """Replace the process wide link group index, e.g. with an empty one for a benchmark.
+
+    Args:
+        link_group_index: LinkGroupIndex every schedule search uses from now on.
+    """
+    global __link_group_index
+
+    __link_group_index = link_group_index
+
+
+def get_sections_signature(fingerprints: dict[int, str | None]) -> str:
+    """Signature of the stored fingerprints of the sections of a course code, changes whenever any section is added,
+    removed or changed.
+
+    Args:
+        fingerprints: Dict of crn -> stored fingerprint (DBController/Courses.py get_course_fingerprints_via_fac_uid).
+
+    Returns:
+        32 character hex digest.
+    """
+    content = ",".join(f"{crn}:{fingerprint}" for crn, fingerprint in sorted(fingerprints.items()))
+
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def get_occupancy(course: Course, window_start: date, window_end: date) -> int:
+    """Bitset of the time slots taken up by the meetings of a section between window_start and window_end.
+
+    Bit day * SLOTS_PER_DAY + slot is set when the section meets during that slot of the day, day counted from
+    window_start. Meetings are rounded out to whole slots, meetings outside the window are left out.
+
+    Args:
+        course: Section to compute the occupancy of.
+        window_start: First day of the window, usually the semester start.
+        window_end: Last day of the window, usually the semester end.
+
+    Returns:
+        Occupancy bitset, 0 for a section without meetings (async).
+    """
+    occupancy = 0
+
+    for meeting in course.class_time:
+        slot_start = meeting.minute_start // SCHEDULE_SLOT_MINUTES
+        slot_end = -(-meeting.minute_end // SCHEDULE_SLOT_MINUTES)  # Rounded up
+
+        if slot_end <= slot_start:
+            continue
+
+        day_mask = ((1 << (slot_end - slot_start)) - 1) << slot_start
+
+        for meeting_date in __iter_meeting_dates(meeting):
+            if window_start <= meeting_date <= window_end:
+                occupancy |= day_mask << ((meeting_date - window_start).days * SLOTS_PER_DAY)
+
+    return occupancy
+
+
+def split_link_tag(link_tag: str) -> tuple[str, str]:
+    """Component letter and group number of a link tag, "A1" -> ("A", "1")."""
+    component = link_tag.rstrip("0123456789")
+
+    return component, link_tag[len(component):]
+
+
+def get_link_groups(sections: list[Course]) -> list[dict[str, list[Course]]]:
+    """Link groups of the sections of a course code, as dicts of component -> sections.
+
+    Linked sections are grouped by the group number of their link_tag and split by its letter. Sections that are not
+    linked are split by class_type, and are required by every link group.
+
+    Args:
+        sections: Every section (Course object) of a course code.
+
+    Returns:
+        List of link groups, ordered by group number. Components sort by link_tag letter, then by class_type.
+    """
+    linked_groups = {}
+    unlinked_components = {}
+
+    for section in sections:
+        if section.is_linked and section.link_tag:
+            component, group = split_link_tag(section.link_tag)
+            linked_groups.setdefault(group, {}).setdefault(component, []).append(section)
+        else:
+            unlinked_components.setdefault(f"~{section.class_type}", []).append(section)  # Sorted after the letters
+
+    if len(linked_groups) == 0:
+        return [unlinked_components]
+
+    return [{**components, **unlinked_components} for _, components in sorted(linked_groups.items())]
+
+
+def __iter_meeting_dates(meeting: Meeting):
+    """Dates a meeting takes place on, following the recurrence handling of ICSManipulation.py."""
+    if meeting.repeat_timedelta_days == 0:  # Single day meeting
+        yield meeting.date_start
+        return
+
+    meeting_date = meeting.date_start
+
+    if meeting.repeat_timedelta_days % 7 == 0 and meeting.weekday_int >= 0:  # Shifted to the first meeting weekday
+        meeting_date += timedelta(days=(meeting.weekday_int - meeting_date.weekday()) % 7)
+
+    step = timedelta(days=meeting.repeat_timedelta_days)
+
+    while meeting_date <= meeting.date_end:
+        yield meeting_date
+        meeting_date += step
@@ -1,10 +1,49 @@
 """
 Meeting class is used to define each instance a course has a meeting. If that specific meeting repeats, the repeat
 delta is in an integer representing the day time delta, typically 7 or 14 representing weekly and biweekly meetings.
+
+Meetings are compact: attributes live in __slots__ (no per object __dict__), times are stored as integer minutes of the
+day (time_start and time_end are read back as shared datetime.time objects), and the dates and location strings
+repeated over a whole term are shared between meetings instead of being held once per meeting. Shared values are kept
+in a least recently used table of at most SHARED_COURSE_VALUES_MAX values, so the table does not grow with every term
+and refresh served by the process.
 """
 
+from datetime import time
+from functools import lru_cache
+
+from Schedulizer.constants import SHARED_COURSE_VALUES_MAX
+
+MINUTES_PER_DAY = 24 * 60
+
+# datetime.time and int of every minute of the day, shared by every Meeting (ints above 256 are not cached by Python)
+TIMES_OF_DAY = tuple(time(minute // 60, minute % 60) for minute in range(MINUTES_PER_DAY))
+MINUTES_OF_DAY = tuple(range(MINUTES_PER_DAY))
+
+
+@lru_cache(maxsize=SHARED_COURSE_VALUES_MAX, typed=True)
+def share_value(value):
+    """Shared object equal to a value repeated over the sections of a term (date, location, section...), so equal
+    values are a single object. Only meant for values of a bounded set, never for free text (titles, instructors)."""
+    return value
+
+
+def get_minute_of_day(value: time) -> int:
+    """Minute of the day of a datetime.time.
+
+    Raises:
+        ValueError: The time is not on a whole minute, meetings are stored with minute precision.
+    """
+    if value.second != 0 or value.microsecond != 0:
+        raise ValueError(f"Meeting times must be whole minutes, received {value}")
+
+    return MINUTES_OF_DAY[value.hour * 60 + value.minute]
+
 
 class Meeting:
+    __slots__ = ("minute_start", "minute_end", "weekday_int", "date_start", "date_end", "repeat_timedelta_days",
+                 "location")
+
     def __init__(self, time_start, time_end, weekday_int, date_start, date_end, repeat_timedelta_days, location):
         """
         :param datetime.time time_start: meeting start time.
@@ -17,13 +56,89 @@ class Meeting:
         :param str location: location info (Usually format of: "Campus | Building | Room").
         """
 
-        self.time_start = time_start
-        self.time_end = time_end
+        self.minute_start = get_minute_of_day(time_start)  # Minute of the day, see time_start
+        self.minute_end = get_minute_of_day(time_end)  # Minute of the day, see time_end
         self.weekday_int = weekday_int
-        self.date_start = date_start
-        self.date_end = date_end
+        self.date_start = share_value(date_start)
+        self.date_end = share_value(date_end)
         self.repeat_timedelta_days = repeat_timedelta_days
-        self.location = location
+        self.location = share_value(location)
+
+    @property
+    def time_start(self) -> time:
+        """meeting start time."""
+        return TIMES_OF_DAY[self.minute_start]
+
+    @time_start.setter
+    def time_start(self, value: time):
+        self.minute_start = get_minute_of_day(value)
+
+    @property
+    def time_end(self) -> time:
+        """meeting end time."""
+        return TIMES_OF_DAY[self.minute_end]
+
+    @time_end.setter
+    def time_end(self, value: time):
+        self.minute_end = get_minute_of_day(value)
+
+    def get_json_dict(self) -> dict:
+        """Values of the meeting by attribute name, the json form of a meeting (CourseClass.py CourseClassEncoder).
+
+        Returns:
+            Dict of time_start, time_end, weekday_int, date_start, date_end, repeat_timedelta_days and location.
+        """
+        return {"time_start": self.time_start,
+                "time_end": self.time_end,
+                "weekday_int": self.weekday_int,
+                "date_start": self.date_start,
+                "date_end": self.date_end,
+                "repeat_timedelta_days": self.repeat_timedelta_days,
+                "location": self.location}
+
+    def get_week_minute_start(self) -> int:
+        """Integer minute of the week the meeting starts at: weekday_int * MINUTES_PER_DAY + minute of the day.
+
+        Returns:
+            Minute of the week, the form stored on the normalized meetings table.
+        """
+        return self.weekday_int * MINUTES_PER_DAY + self.minute_start
+
+    def get_week_minute_end(self) -> int:
+        """Integer minute of the week the meeting ends at: weekday_int * MINUTES_PER_DAY + minute of the day.
+
+        Returns:
+            Minute of the week, the form stored on the normalized meetings table.
+        """
+        return self.weekday_int * MINUTES_PER_DAY + self.minute_end
+
+    @staticmethod
+    def from_week_minutes(week_minute_start: int, week_minute_end: int, weekday_int: int, date_start, date_end,
+                          repeat_timedelta_days: int, location: str):
+        """Build a Meeting from the integer minute of the week form stored on the normalized meetings table.
+
+        Args:
+            week_minute_start: Minute of the week the meeting starts at (see get_week_minute_start).
+            week_minute_end: Minute of the week the meeting ends at (see get_week_minute_end).
+            weekday_int: weekday int value of the meeting.
+            date_start: meeting start date window.
+            date_end: meeting end date window.
+            repeat_timedelta_days: meeting repeat intervals in days.
+            location: location info.
+
+        Returns:
+            Meeting object.
+        """
+        minute_start = week_minute_start - weekday_int * MINUTES_PER_DAY
+        minute_end = week_minute_end - weekday_int * MINUTES_PER_DAY
+
+        return Meeting(time_start=TIMES_OF_DAY[minute_start],
+                       time_end=TIMES_OF_DAY[minute_end],
+                       weekday_int=weekday_int,
+                       date_start=date_start,
+                       date_end=date_end,
+                       repeat_timedelta_days=repeat_timedelta_days,
+                       location=location)
 
     def get_raw_str(self):
         return (f"time_start={self.time_start}\n"
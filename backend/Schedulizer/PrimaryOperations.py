@@ -4,30 +4,106 @@ TODO: Warning! Unsafe usage of variables identifying SQL table names which are c
  connector. Security fix needed!
 """
 
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 from Schedulizer.SemesterConfigHandler import SemesterConfig
-from Schedulizer.APIs.MycampusAPI import get_json_course_data
-from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj as decode
+from Schedulizer.CourseClass import Course
+from Schedulizer.APIs.MycampusAPI import iter_course_data_sections
+from Schedulizer.APIs.MycampusAPIDecoder import iter_decode_api_sections
 from Schedulizer.ICSManipulation import create_ics_calendar
-from Schedulizer.DBController.Courses import update_course_record, get_course_via_crn, is_up_to_date
+from Schedulizer.LinkGroupIndex import CourseBundles, get_link_group_index, get_sections_signature
+from Schedulizer.ScheduleGenerator import iter_schedules, iter_ranked_schedules
+from Schedulizer.ScheduleScoring import get_schedule_weights
+from Schedulizer.DBController.Courses import bulk_upsert_courses, get_courses_via_crns, get_courses_freshness, \
+    try_acquire_refresh_lease, release_refresh_lease, get_courses_via_fac_uid, get_course_fingerprints_via_fac_uid
 from Schedulizer.CacheFilePathManipulation import get_cache_path
-from Schedulizer.constants import ICS_CALENDAR_FILENAME
+from Schedulizer.SingleFlight import SingleFlight
+from Schedulizer.constants import ICS_CALENDAR_FILENAME, COURSE_FRESH, COURSE_STALE, COURSE_EXPIRED, COURSE_MISSING, \
+    COURSE_REFRESH_MAX_CONCURRENCY_PER_REQUEST, COURSE_REFRESH_MAX_WORKERS, COURSE_REFRESH_LEASE_POLL_INTERVAL, \
+    SQL_BULK_UPSERT_BATCH_SIZE, SCHEDULE_MAX_RESULTS_DEFAULT, SCHEDULE_MAX_RESULTS_LIMIT, SCHEDULE_MAX_COURSE_CODES, \
+    SCHEDULE_TOP_K_DEFAULT, SCHEDULE_TOP_K_LIMIT, SCHEDULE_TIME_BUDGET_DEFAULT, SCHEDULE_TIME_BUDGET_LIMIT
 
+# Runs the course refreshes of every request, bounds the refreshes in flight over the whole process
+__refresh_executor = ThreadPoolExecutor(max_workers=COURSE_REFRESH_MAX_WORKERS, thread_name_prefix="course-refresh")
 
-def op_update_courses_with_overhead(config_object: SemesterConfig, course_codes: list[str]):
-    """
+# Refreshes in flight keyed by (course table, course code), concurrent requests of a course code share one refresh
+__refresh_flights = SingleFlight()
+
+# Coalesce the refreshes of every worker process sharing the database too, see __op_refresh_course
+__cross_worker_refresh = os.getenv("SCHEDULIZER_CROSS_WORKER_REFRESH", "0") == "1"
+
+__logger = logging.getLogger(__name__)
+
+
+def op_update_courses_with_overhead(config_object: SemesterConfig, course_codes: list[str]) -> dict[str, Exception]:
+    """Refresh the outdated course codes from the API, concurrently, following the freshness policy of the config.
+
+    Stale-while-revalidate: course codes older than config_object.course_max_age are only refreshed in the background
+    (the call does not wait for them, their current records are served) until they get older than
+    config_object.course_hard_max_age. The call only waits for the refresh of expired and missing course codes. The
+    records of an immutable config are never refreshed, only its missing course codes are fetched.
+
+    Up to COURSE_REFRESH_MAX_CONCURRENCY_PER_REQUEST course codes of the call are fetched, decoded and written at the
+    same time, so the latency approaches that of the slowest course code instead of the sum of all of them. A failed
+    course code does not stop the refresh of the others.
+
+    A course code already being refreshed for another request is not fetched again, the call waits for (and shares
+    the outcome of) the refresh in flight.
 
     Args:
         config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
         course_codes: list of course codes to update for.
-    """
-    course_codes = list(set(course_codes))  # Remove duplicates
 
+    Returns:
+        Dict of course code -> exception raised by its refresh, empty when every expired or missing course code was
+        refreshed. Failures of background refreshes are only logged.
+    """
     if not isinstance(course_codes, list) and not isinstance(course_codes, tuple):
         raise TypeError("course_codes should be a list of course codes (str).")
 
-    for course_code in course_codes:
-        if not is_up_to_date(course_table=config_object.name, fac=course_code[:-5], uid=course_code[-5:]):
-            __op_update_course(config_object=config_object, course_code=course_code)
+    course_codes = list(dict.fromkeys(course_code.upper() for course_code in course_codes))  # Remove duplicates
+
+    freshness = get_courses_freshness(course_table=config_object.db_table_name, course_codes=course_codes,
+                                      max_age=config_object.course_max_age,
+                                      hard_max_age=config_object.course_hard_max_age)
+
+    if config_object.is_immutable:  # Archived term, existing records are final
+        outdated_course_codes = freshness[COURSE_MISSING]
+    else:
+        outdated_course_codes = freshness[COURSE_EXPIRED] + freshness[COURSE_MISSING]  # Only refetch outdated codes
+
+        for course_code in freshness[COURSE_STALE]:  # Served as is, refreshed for the next requests
+            future = __refresh_flights.submit((config_object.db_table_name, course_code), __refresh_executor,
+                                              __op_refresh_course, config_object=config_object, course_code=course_code)
+            future.add_done_callback(__log_background_refresh_failure(config_object, course_code))
+
+    request_slots = threading.BoundedSemaphore(COURSE_REFRESH_MAX_CONCURRENCY_PER_REQUEST)
+    futures = {}
+
+    for course_code in outdated_course_codes:
+        request_slots.acquire()  # Wait for one of the refreshes of this call to finish
+
+        future = __refresh_flights.submit((config_object.db_table_name, course_code), __refresh_executor,
+                                          __op_refresh_course, config_object=config_object, course_code=course_code)
+        future.add_done_callback(lambda _: request_slots.release())
+
+        futures[course_code] = future
+
+    failures = {}
+
+    for course_code, future in futures.items():
+        exception = future.exception()
+
+        if exception is not None:
+            failures[course_code] = exception
+
+    return failures
 
 
 # TODO DISABLED NO OVERHEAD CODE FOR NOW (ONLY FOR TESTING PURPOSES)
@@ -48,6 +124,55 @@ def op_update_courses_with_overhead(config_object: SemesterConfig, course_codes:
 #         __op_update_course(config_object=config_object, course_code=course_code)
 
 
+def __op_refresh_course(config_object: SemesterConfig, course_code: str):
+    """Refresh a course code, run once per (course table, course code) in flight in the process.
+
+    With SCHEDULIZER_CROSS_WORKER_REFRESH=1 the refresh first takes the refresh lease of the course code on the
+    database. While another worker process holds it, wait for that worker to store the course code instead of fetching
+    it again.
+
+    Args:
+        config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
+        course_code: course to search by API for and update on internal DBController.
+    """
+    if not __cross_worker_refresh:
+        __op_update_course(config_object=config_object, course_code=course_code)
+        return
+
+    holder = uuid.uuid4().hex
+
+    while not try_acquire_refresh_lease(course_table=config_object.db_table_name, course_code=course_code,
+                                        holder=holder):
+        time.sleep(COURSE_REFRESH_LEASE_POLL_INTERVAL)
+
+        if __is_course_fresh(config_object=config_object, course_code=course_code):  # Refreshed by the other worker
+            return
+
+    try:
+        # The previous holder may have finished its refresh right before the lease was taken
+        if not __is_course_fresh(config_object=config_object, course_code=course_code):
+            __op_update_course(config_object=config_object, course_code=course_code)
+    finally:
+        release_refresh_lease(course_table=config_object.db_table_name, course_code=course_code, holder=holder)
+
+
+def __log_background_refresh_failure(config_object: SemesterConfig, course_code: str):
+    """Done callback of a background refresh, logging its exception if it failed."""
+    def log_failure(future):
+        if future.exception() is not None:
+            __logger.warning(f"Background refresh of course code {course_code} of config {config_object.name} failed: "
+                             f"{future.exception()!r}")
+
+    return log_failure
+
+
+def __is_course_fresh(config_object: SemesterConfig, course_code: str) -> bool:
+    freshness = get_courses_freshness(course_table=config_object.db_table_name, course_codes=[course_code],
+                                      max_age=config_object.course_max_age)
+
+    return course_code in freshness[COURSE_FRESH]
+
+
 def __op_update_course(config_object: SemesterConfig, course_code: str):
     """
 
@@ -55,18 +180,71 @@ def __op_update_course(config_object: SemesterConfig, course_code: str):
         config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
         course_code: course to search by API for and update on internal DBController.
     """
-    course_objects = decode(get_json_course_data(mep_code=config_object.api_mycampus_mep_code,
-                                                 term_id=config_object.api_mycampus_term_id,
-                                                 course_code=course_code))
-
-    if len(course_objects) > 0:
-        for course_obj in course_objects:
-            update_course_record(course_table=config_object.db_table_name, c=course_obj)
-            # TODO: Should make this multi threaded maybe. Takes a long time updating records of each course
-            #  individually.
-    else:
+    sections = iter_course_data_sections(mep_code=config_object.api_mycampus_mep_code,
+                                         term_id=config_object.api_mycampus_term_id,
+                                         course_code=course_code)
+    batch = []
+    received_crns = set()
+    counts = {"changed": 0, "unchanged": 0, "removed": 0}
+
+    # Sections are decoded as the response streams in and written a batch at a time, memory use stays flat
+    for course_object in iter_decode_api_sections(sections):
+        batch.append(course_object)
+        received_crns.add(course_object.crn)
+
+        if len(batch) == SQL_BULK_UPSERT_BATCH_SIZE:
+            __add_counts(counts, bulk_upsert_courses(course_table=config_object.db_table_name, courses=batch))
+            batch = []
+
+    if len(received_crns) == 0:
         raise RuntimeError(f"Course code {course_code} not found!")
 
+    # Every section was received: the last write also deletes the stored sections removed upstream (cancelled), so
+    # they leave the freshness (oldest metadata) and the schedules
+    __add_counts(counts, bulk_upsert_courses(course_table=config_object.db_table_name, courses=batch,
+                                             fac=course_code[:-5], uid=course_code[-5:], received_crns=received_crns))
+
+    __logger.debug(f"Refreshed {course_code} of {config_object.db_table_name}: {counts['changed']} changed, "
+                   f"{counts['unchanged']} unchanged, {counts['removed']} removed sections")
+
+    # Rebuilt once per change of the sections, instead of on the next schedule search
+    if counts["changed"] + counts["removed"] > 0:
+        get_link_group_index().invalidate(course_table=config_object.db_table_name, course_code=course_code)
+        op_get_course_bundles(config_object=config_object, course_code=course_code)
+
+
+def __add_counts(counts: dict[str, int], batch_counts: dict[str, int]):
+    for key, count in batch_counts.items():
+        counts[key] += count
+
+
+def op_get_courses_via_crns(config_object: SemesterConfig, crn_codes: list[int]) -> list[Course]:
+    """Get the Course objects of many crn codes with a single DB query.
+
+    Args:
+        config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
+        crn_codes: List of crn codes to find matching courses for.
+
+    Raises:
+        RuntimeError: One or more crn codes have no record, every missing crn code is listed.
+
+    Returns:
+        List of Course objects in the order of crn_codes, with duplicate crn codes removed.
+    """
+    if not isinstance(crn_codes, list) and not isinstance(crn_codes, tuple):
+        raise TypeError("crn_codes should be a list of crn codes (int).")
+
+    crn_codes = list(dict.fromkeys(int(crn) for crn in crn_codes))  # Remove duplicates, keep order
+
+    courses = get_courses_via_crns(course_table=config_object.db_table_name, crns=crn_codes)
+
+    missing_crn_codes = [crn for crn in crn_codes if crn not in courses]
+
+    if len(missing_crn_codes) > 0:
+        raise RuntimeError(f"CRN {', '.join(str(crn) for crn in missing_crn_codes)} not found!")
+
+    return [courses[crn] for crn in crn_codes]
+
 
 def op_generate_ics(config_object: SemesterConfig, crn_codes: list[int], cache_id: str = None) -> str:
     """
@@ -79,21 +257,143 @@ def op_generate_ics(config_object: SemesterConfig, crn_codes: list[int], cache_i
     Returns:
         Cache file path of the created ics file.
     """
-    if not isinstance(crn_codes, list) and not isinstance(crn_codes, tuple):
-        raise TypeError("crn_codes should be a list of crn codes (int).")
+    courses_list = op_get_courses_via_crns(config_object=config_object, crn_codes=crn_codes)
 
-    crn_codes = list(set(crn_codes))  # Remove duplicates
+    file_path = create_ics_calendar(config_object=config_object, course_list=courses_list, cache_id=cache_id)
 
-    courses_list = []
+    return file_path
 
-    for crn in crn_codes:
-        course = get_course_via_crn(course_table=config_object.db_table_name, crn=crn)
 
-        if course is None:
-            raise RuntimeError(f"CRN {crn} not found!")
+def op_generate_schedules(config_object: SemesterConfig, course_codes: list[str],
+                          max_results: int = SCHEDULE_MAX_RESULTS_DEFAULT) -> dict:
+    """Conflict-free schedules of many course codes, from the link group bundles of their stored sections
+    (ScheduleGenerator.py).
 
-        courses_list.append(course)
+    Args:
+        config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
+        course_codes: List of course codes to combine, a schedule takes sections of every one of them.
+        max_results: Most schedules to return, at most SCHEDULE_MAX_RESULTS_LIMIT.
+            Default = SCHEDULE_MAX_RESULTS_DEFAULT.
 
-    file_path = create_ics_calendar(config_object=config_object, course_list=courses_list, cache_id=cache_id)
+    Raises:
+        RuntimeError: One or more course codes have no record, every missing course code is listed.
 
-    return file_path
+    Returns:
+        Dict of "schedules", the list of the crn codes of every schedule found (ordered like course_codes), and
+        "is_complete", False when more schedules exist than max_results.
+    """
+    if not isinstance(max_results, int) or not 0 < max_results <= SCHEDULE_MAX_RESULTS_LIMIT:
+        raise ValueError(f"max_results should be an int between 1 and {SCHEDULE_MAX_RESULTS_LIMIT}.")
+
+    course_bundles_list = __get_course_bundles_list(config_object=config_object, course_codes=course_codes)
+
+    schedules = list(itertools.islice(iter_schedules(course_bundles_list=course_bundles_list), max_results + 1))
+
+    return {"schedules": schedules[:max_results], "is_complete": len(schedules) <= max_results}
+
+
+def op_iter_ranked_schedules(config_object: SemesterConfig, course_codes: list[str],
+                             weights: dict[str, float] | None = None, top_k: int = SCHEDULE_TOP_K_DEFAULT,
+                             time_budget: float = SCHEDULE_TIME_BUDGET_DEFAULT):
+    """Best scored conflict-free schedules of many course codes, from the link group bundles of their stored sections
+    (ScheduleGenerator.py iter_ranked_schedules, ScheduleScoring.py).
+
+    The arguments and course codes are checked and the bundles loaded right away, the search only runs as the returned
+    iterator is iterated.
+
+    Args:
+        config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
+        course_codes: List of course codes to combine, a schedule takes sections of every one of them.
+        weights: Score weights to override, default None (SCHEDULE_SCORE_WEIGHTS_DEFAULT).
+        top_k: Number of best schedules to find, at most SCHEDULE_TOP_K_LIMIT. Default = SCHEDULE_TOP_K_DEFAULT.
+        time_budget: Seconds the search runs for, at most SCHEDULE_TIME_BUDGET_LIMIT.
+            Default = SCHEDULE_TIME_BUDGET_DEFAULT.
+
+    Raises:
+        RuntimeError: One or more course codes have no record, every missing course code is listed.
+
+    Returns:
+        Iterator of the search events, a "schedule" event every time a schedule enters the top_k found so far, then a
+        "done" event with the ranked top_k (ScheduleGenerator.py iter_ranked_schedules).
+    """
+    if not isinstance(top_k, int) or not 0 < top_k <= SCHEDULE_TOP_K_LIMIT:
+        raise ValueError(f"top_k should be an int between 1 and {SCHEDULE_TOP_K_LIMIT}.")
+
+    if not isinstance(time_budget, (int, float)) or not 0 < time_budget <= SCHEDULE_TIME_BUDGET_LIMIT:
+        raise ValueError(f"time_budget should be a number of seconds between 0 and {SCHEDULE_TIME_BUDGET_LIMIT}.")
+
+    get_schedule_weights(weights)  # Raises on invalid weights before the search starts
+
+    course_bundles_list = __get_course_bundles_list(config_object=config_object, course_codes=course_codes)
+
+    return iter_ranked_schedules(course_bundles_list=course_bundles_list, weights=weights, top_k=top_k,
+                                 time_budget=time_budget)
+
+
+def __get_course_bundles_list(config_object: SemesterConfig, course_codes: list[str]) -> list[CourseBundles]:
+    """CourseBundles of the course codes of a schedule search, duplicates removed.
+
+    Raises:
+        TypeError: course_codes is not a list.
+        ValueError: More than SCHEDULE_MAX_COURSE_CODES course codes.
+        RuntimeError: One or more course codes have no record, every missing course code is listed.
+    """
+    if not isinstance(course_codes, list) and not isinstance(course_codes, tuple):
+        raise TypeError("course_codes should be a list of course codes (str).")
+
+    course_codes = list(dict.fromkeys(course_code.upper() for course_code in course_codes))  # Remove duplicates
+
+    if len(course_codes) > SCHEDULE_MAX_COURSE_CODES:
+        raise ValueError(f"At most {SCHEDULE_MAX_COURSE_CODES} course codes can be combined.")
+
+    course_bundles_list = [op_get_course_bundles(config_object=config_object, course_code=course_code)
+                           for course_code in course_codes]
+
+    missing_course_codes = [course_code for course_code, course_bundles in zip(course_codes, course_bundles_list)
+                            if course_bundles is None]
+
+    if len(missing_course_codes) > 0:
+        raise RuntimeError(f"Course code {', '.join(missing_course_codes)} not found!")
+
+    return course_bundles_list
+
+
+def op_get_course_bundles(config_object: SemesterConfig, course_code: str) -> CourseBundles | None:
+    """Sections and valid link group bundles of a course code, from the link group index (LinkGroupIndex.py).
+
+    The cached bundles are served while the stored fingerprints of the sections of the course code are unchanged,
+    otherwise they are rebuilt from the stored sections and cached again.
+
+    Args:
+        config_object: SemesterConfig object holding semester calendar info. (Typically = SemesterConfig.name).
+        course_code: Course code (fac + uid) to get the bundles of.
+
+    Returns:
+        CourseBundles of the course code. If no records exist, returns None.
+    """
+    course_table = config_object.db_table_name
+    fac, uid = course_code[:-5], course_code[-5:]
+
+    # Signature read before the sections, a refresh landing in between only makes the next call rebuild them again
+    fingerprints = get_course_fingerprints_via_fac_uid(course_table=course_table, fac=fac, uid=uid)
+
+    if len(fingerprints) == 0:
+        return None
+
+    signature = get_sections_signature(fingerprints)
+    course_bundles = get_link_group_index().get(course_table=course_table, course_code=course_code,
+                                                signature=signature)
+
+    if course_bundles is None:
+        sections = get_courses_via_fac_uid(course_table=course_table, fac=fac, uid=uid)
+
+        if sections is None:  # Removed since the fingerprints were read
+            return None
+
+        course_bundles = CourseBundles(course_code=course_code, signature=signature, sections=sections,
+                                       window_start=config_object.semester_start.date(),
+                                       window_end=config_object.semester_end.date())
+
+        get_link_group_index().put(course_table=course_table, course_code=course_code, course_bundles=course_bundles)
+
+    return course_bundles
@@ -0,0 +1,462 @@
+"""Conflict-free schedule generator.
+
+Finds the combinations of sections of many course codes whose meetings never overlap, a schedule being one valid
+bundle (one section of every component of a link group) of every course code. Bundles and section occupancies come
+precomputed from the link group index (LinkGroupIndex.py): two sections conflict exactly when their occupancy bitsets
+share a bit.
+
+Search: backtracking with forward checking over the bundles of every course code, walked as prefix trees of the
+occupancies of their components (lecture, then laboratory, then tutorial...). Every step extends the bundle of the
+course code with the fewest sections fitting the ones chosen so far, so bundles sharing their first sections are
+extended from a single branch and the most constrained component of any course code is always decided first. After
+every section chosen, every course code keeps only the sections of each of its components left that still fit, and
+the branch is dropped as soon as a course code has a component without any section left in every link group. Checking
+components rather than whole bundles is a relaxation (it never drops a branch holding a schedule) that is an order of
+magnitude cheaper, as a course code has a few dozen sections but hundreds of bundles.
+
+Before searching, the occupancies are compressed (days identical for every section are kept once, slots no section
+uses are dropped), which keeps the bitsets to a few hundred bits, and the bundles of a course code whose sections have
+the same occupancies are a single branch, only expanded into one schedule each once a schedule is found.
+
+Ranked search (iter_ranked_schedules): the same search as depth-first branch and bound over the scores of
+ScheduleScoring.py, keeping the top k schedules found so far. Options of every step are tried by increasing lower bound
+of their score, and a branch is dropped once its lower bound reaches the k-th best score found, so the first schedule
+comes out of the first dive (within milliseconds) and the following ones only improve on it. Sections share a branch
+when their occupancies and in-person meetings are the same, the branch bound taking their lowest section cost (seats,
+virtual), and the exact costs are only added once a schedule is complete. Best-first search would prove the top k with
+fewer nodes, but with the gaps only counted on complete schedules it expands most of the tree level by level before
+completing any schedule, and its open list grows with it.
+"""
+
+import heapq
+import itertools
+import time
+
+from Schedulizer.LinkGroupIndex import CourseBundles, SLOTS_PER_DAY
+from Schedulizer.ScheduleScoring import SectionScore, EMPTY_DAY_TIMES, get_schedule_weights, add_day_times, \
+    get_time_bound, get_time_cost, get_schedule_metrics
+from Schedulizer.constants import SCHEDULE_TOP_K_DEFAULT, SCHEDULE_TIME_BUDGET_DEFAULT
+
+
+def iter_schedules(course_bundles_list: list[CourseBundles]):
+    """Generate every conflict-free schedule of many course codes, lazily.
+
+    Args:
+        course_bundles_list: CourseBundles of every course code to combine (LinkGroupIndex.py).
+
+    Yields:
+        List of the crn codes of a schedule, ordered by course code (in the order of course_bundles_list), then by
+        component.
+    """
+    occupancies = {}
+
+    for course_bundles in course_bundles_list:
+        occupancies.update(course_bundles.occupancies)
+
+    occupancies = __compress_occupancies(occupancies)
+
+    courses = []  # (course index, node of its bundle tree reached so far, components left) of every course code
+
+    for course_index, course_bundles in enumerate(course_bundles_list):
+        components = [[list({occupancies[crn] for crn in component}) for component in group]
+                      for group in course_bundles.link_groups]
+
+        courses.append((course_index, __get_bundle_tree(course_bundles.bundles, occupancies), components))
+
+    courses = __filter_courses(courses, 0)
+
+    if courses is None:  # A course code has a component without any section
+        return
+
+    for chosen in __search(0, [], courses):
+        yield from __expand_schedules(sorted(chosen))
+
+
+def iter_ranked_schedules(course_bundles_list: list[CourseBundles], weights: dict[str, float] | None = None,
+                          top_k: int = SCHEDULE_TOP_K_DEFAULT, time_budget: float = SCHEDULE_TIME_BUDGET_DEFAULT):
+    """Generate the best scored conflict-free schedules of many course codes, as they are found.
+
+    Args:
+        course_bundles_list: CourseBundles of every course code to combine (LinkGroupIndex.py).
+        weights: Score weights to override (ScheduleScoring.py get_schedule_weights), default None (defaults).
+        top_k: Number of best schedules to keep. Default = SCHEDULE_TOP_K_DEFAULT.
+        time_budget: Seconds the search runs for, counted from the first schedule asked for, before returning the best
+            schedules found so far. Default = SCHEDULE_TIME_BUDGET_DEFAULT.
+
+    Raises:
+        ValueError: Invalid score weights.
+
+    Yields:
+        {"event": "schedule", "score", "crns", "metrics"} every time a schedule enters the top_k found so far, "score"
+        being its cost (lower is better), "crns" its crn codes ordered like iter_schedules and "metrics" the raw values
+        of its score terms (get_schedule_metrics). Then once, {"event": "done", "schedules", "is_complete"}, "schedules"
+        being the top_k schedules (same keys) from best to worst and "is_complete" False when the time budget ran out
+        before the search proved them the best.
+    """
+    weights = get_schedule_weights(weights)
+    deadline = time.monotonic() + time_budget
+
+    occupancies = {}
+    section_scores = {}
+
+    for course_bundles in course_bundles_list:
+        occupancies.update(course_bundles.occupancies)
+        section_scores.update((crn, SectionScore(section, weights)) for crn, section in course_bundles.sections.items())
+
+    occupancies = __compress_occupancies(occupancies)
+
+    courses = []  # (course index, node of its ranked bundle tree reached so far, components left) of every course code
+
+    for course_index, course_bundles in enumerate(course_bundles_list):
+        components = [[list({occupancies[crn] for crn in component}) for component in group]
+                      for group in course_bundles.link_groups]
+
+        courses.append((course_index, __get_ranked_bundle_tree(course_bundles.bundles, occupancies, section_scores),
+                        components))
+
+    search = {"weights": weights, "section_scores": section_scores, "top_k": top_k, "deadline": deadline,
+              "top": [], "threshold": float("inf"), "found": 0, "is_timed_out": False}
+
+    courses = __filter_courses(courses, 0)
+
+    if courses is not None:  # Else a course code has a component without any section
+        yield from __search_ranked(search, 0, EMPTY_DAY_TIMES, 0.0, [], courses)
+
+    yield {"event": "done", "schedules": [entry for _, _, entry in sorted(search["top"], reverse=True)],
+           "is_complete": not search["is_timed_out"]}
+
+
+def __get_bundle_tree(bundles: list[tuple], occupancies: dict[int, int]) -> tuple[dict, list]:
+    """Prefix tree of the occupancies of the components of bundles.
+
+    A node is a tuple of (dict of the occupancy of the next component -> child node, list of the bundles ending at the
+    node). Bundles whose sections have the same occupancies end at the same node.
+    """
+    root = ({}, [])
+
+    for bundle in bundles:
+        node = root
+
+        for crn in bundle:
+            node = node[0].setdefault(occupancies[crn], ({}, []))
+
+        node[1].append(bundle)
+
+    return root
+
+
+def __get_ranked_bundle_tree(bundles: list[tuple], occupancies: dict[int, int],
+                             section_scores: dict[int, SectionScore]) -> tuple[dict, list]:
+    """Prefix tree of the occupancies and in-person meetings of the components of bundles, for the ranked search.
+
+    A node is a tuple of (dict of (occupancy, meetings) of the next component -> list of [child node, lowest section
+    cost, occupancy, meetings], list of the (section costs, bundle) ending at the node sorted by cost, list of the
+    lowest section costs of the branches from the root to the node summed).
+    """
+    root = ({}, [], [0.0])
+
+    for bundle in bundles:
+        node = root
+
+        for crn in bundle:
+            section_score = section_scores[crn]
+            key = (occupancies[crn], section_score.meetings)
+            branch = node[0].setdefault(key, [({}, [], [0.0]), section_score.cost, key[0], key[1]])
+            branch[1] = min(branch[1], section_score.cost)
+            node = branch[0]
+
+        node[1].append((sum(section_scores[crn].cost for crn in bundle), bundle))
+
+    nodes = [root]
+
+    while len(nodes) > 0:
+        children, ranked_bundles, path_cost = nodes.pop()
+        ranked_bundles.sort()
+
+        for child, section_cost, _, _ in children.values():
+            child[2][0] = path_cost[0] + section_cost
+            nodes.append(child)
+
+    return root
+
+
+def __compress_occupancies(occupancies: dict[int, int]) -> dict[int, int]:
+    """Equivalent occupancies with fewer bits, two compressed occupancies share a bit exactly when the originals did.
+
+    Days whose slots are the same for every section (every week of a weekly meeting, days without meetings) are kept
+    once, and the slots before the earliest and after the latest slot used on any day are dropped.
+    """
+    union = 0
+    for occupancy in occupancies.values():
+        union |= occupancy
+
+    day_count = -(-union.bit_length() // SLOTS_PER_DAY)
+    day_mask = (1 << SLOTS_PER_DAY) - 1
+
+    union_day = 0
+    for day in range(day_count):
+        union_day |= (union >> (day * SLOTS_PER_DAY)) & day_mask
+
+    if union_day == 0:  # No section meets during the window
+        return dict(occupancies)
+
+    slot_start = (union_day & -union_day).bit_length() - 1
+    slot_count = union_day.bit_length() - slot_start
+    slot_mask = (1 << slot_count) - 1
+
+    crns = list(occupancies)
+    compressed = dict.fromkeys(crns, 0)
+    kept_days = set()
+
+    for day in range(day_count):
+        shift = day * SLOTS_PER_DAY + slot_start
+        rows = tuple((occupancies[crn] >> shift) & slot_mask for crn in crns)
+
+        if rows in kept_days or not any(rows):
+            continue
+
+        offset = len(kept_days) * slot_count
+        kept_days.add(rows)
+
+        for crn, row in zip(crns, rows):
+            compressed[crn] |= row << offset
+
+    return compressed
+
+
+def __search(occupancy: int, chosen: list[tuple], courses: list[tuple]):
+    """Backtracking step, extending the bundle of the course code with the fewest sections fitting occupancy.
+
+    Args:
+        occupancy: Occupancy of the sections chosen so far.
+        chosen: (course index, bundles) of the course codes whose bundle is complete.
+        courses: (course index, node of its bundle tree, components left) of the course codes whose bundle is not
+            complete, their components left already filtered by occupancy.
+
+    Yields:
+        Copy of chosen once the bundle of every course code is complete.
+    """
+    if len(courses) == 0:
+        yield list(chosen)
+        return
+
+    best_index = None
+    best_options = None
+
+    for index, (_, (children, bundles), _) in enumerate(courses):
+        options = [(section_occupancy, child) for section_occupancy, child in children.items()
+                   if not section_occupancy & occupancy]
+
+        if len(bundles) > 0:  # Bundles complete at this node
+            options.append((None, None))
+
+        if best_options is None or len(options) < len(best_options):
+            best_index, best_options = index, options
+
+            if len(options) <= 1:
+                break
+
+    course_index, (_, bundles), components = courses[best_index]
+    other_courses = courses[:best_index] + courses[best_index + 1:]
+
+    for section_occupancy, child in best_options:
+        if child is None:  # Bundle of the course code complete
+            chosen.append((course_index, bundles))
+
+            yield from __search(occupancy, chosen, other_courses)
+
+            chosen.pop()
+            continue
+
+        # The section chosen fills the first component left of every link group of the course code
+        next_course = (course_index, child, [group[1:] for group in components])
+
+        if section_occupancy == 0:  # Section without meetings
+            remaining_courses = other_courses + [next_course]
+        else:
+            remaining_courses = __filter_courses(other_courses + [next_course], section_occupancy)
+
+        if remaining_courses is None:  # A component of a course code has no section left
+            continue
+
+        yield from __search(occupancy | section_occupancy, chosen, remaining_courses)
+
+
+def __search_ranked(search: dict, occupancy: int, day_times: tuple, cost: float, chosen: list[tuple],
+                    courses: list[tuple]):
+    """Branch and bound step, extending the bundle of the course code with the fewest sections fitting occupancy.
+
+    Args:
+        search: State of the search (iter_ranked_schedules), its top schedules and their threshold are updated.
+        occupancy: Occupancy of the sections chosen so far.
+        day_times: Day times of the in-person meetings chosen so far (ScheduleScoring.py).
+        cost: Section costs so far, the lowest ones of every branch taken (bound of the exact ones).
+        chosen: (course index, ranked bundles) of the course codes whose bundle is complete.
+        courses: (course index, node of its ranked bundle tree, components left) of the course codes whose bundle is
+            not complete, their components left already filtered by occupancy.
+
+    Yields:
+        Schedule events (iter_ranked_schedules) of the schedules entering the top schedules.
+    """
+    if time.monotonic() > search["deadline"]:
+        search["is_timed_out"] = True
+        return
+
+    if len(courses) == 0:
+        yield from __expand_ranked_schedules(search, day_times, sorted(chosen))
+        return
+
+    best_index = None
+    best_options = None
+
+    for index, (_, (children, ranked_bundles, _), _) in enumerate(courses):
+        options = [branch for branch in children.values() if not branch[2] & occupancy]
+
+        if len(ranked_bundles) > 0:  # Bundles complete at this node
+            options.append(None)
+
+        if best_options is None or len(options) < len(best_options):
+            best_index, best_options = index, options
+
+            if len(options) <= 1:
+                break
+
+    course_index, (_, ranked_bundles, (course_cost,)), components = courses[best_index]
+    other_courses = courses[:best_index] + courses[best_index + 1:]
+    weights = search["weights"]
+    ranked_options = []
+
+    for branch in best_options:
+        if branch is None:  # Bundle of the course code complete, its lowest exact cost replaces the branch bound
+            option_cost = cost - course_cost + ranked_bundles[0][0]
+            option_day_times = day_times
+        else:
+            option_cost = cost + branch[1]
+            option_day_times = add_day_times(day_times, branch[3])
+
+        ranked_options.append((option_cost + get_time_bound(option_day_times, weights), len(ranked_options),
+                               option_cost, option_day_times, branch))
+
+    ranked_options.sort()
+
+    for bound, _, option_cost, option_day_times, branch in ranked_options:
+        if bound >= search["threshold"] or search["is_timed_out"]:  # Options sorted, none left can enter the top
+            return
+
+        if branch is None:
+            chosen.append((course_index, ranked_bundles))
+
+            yield from __search_ranked(search, occupancy, option_day_times, option_cost, chosen, other_courses)
+
+            chosen.pop()
+            continue
+
+        child, _, section_occupancy, _ = branch
+
+        # The section chosen fills the first component left of every link group of the course code
+        next_course = (course_index, child, [group[1:] for group in components])
+
+        if section_occupancy == 0:  # Section without meetings
+            remaining_courses = other_courses + [next_course]
+        else:
+            remaining_courses = __filter_courses(other_courses + [next_course], section_occupancy)
+
+        if remaining_courses is None:  # A component of a course code has no section left
+            continue
+
+        yield from __search_ranked(search, occupancy | section_occupancy, option_day_times, option_cost, chosen,
+                                   remaining_courses)
+
+
+def __expand_ranked_schedules(search: dict, day_times: tuple, chosen: list[tuple]):
+    """Schedules of the chosen ranked bundles that enter the top schedules, by increasing section costs.
+
+    Args:
+        search: State of the search (iter_ranked_schedules), its top schedules and their threshold are updated.
+        day_times: Day times of the schedules, the same for every combination of the chosen bundles.
+        chosen: (course index, ranked bundles) of every course code, sorted by course index.
+
+    Yields:
+        Schedule events (iter_ranked_schedules) of the schedules entering the top schedules.
+    """
+    time_cost = get_time_cost(day_times, search["weights"])
+    remaining_costs = [0.0] * (len(chosen) + 1)  # Lowest section costs of the course codes from an index on
+
+    for index in range(len(chosen) - 1, -1, -1):
+        remaining_costs[index] = remaining_costs[index + 1] + chosen[index][1][0][0]
+
+    stack = [(0, time_cost, ())]
+
+    while len(stack) > 0:
+        index, cost, bundles = stack.pop()
+
+        if cost + remaining_costs[index] >= search["threshold"]:  # Threshold lowered since it was pushed
+            continue
+
+        if index == len(chosen):
+            crns = [crn for bundle in bundles for crn in bundle]
+            entry = {"score": round(cost, 4), "crns": crns,
+                     "metrics": get_schedule_metrics(day_times, [search["section_scores"][crn] for crn in crns])}
+
+            search["found"] += 1
+            heap_item = (-cost, -search["found"], entry)  # Worst score on top, newest first among equal scores
+
+            if len(search["top"]) < search["top_k"]:
+                heapq.heappush(search["top"], heap_item)
+            else:
+                heapq.heapreplace(search["top"], heap_item)
+
+            if len(search["top"]) == search["top_k"]:
+                search["threshold"] = -search["top"][0][0]
+
+            yield {"event": "schedule", **entry}
+            continue
+
+        # Pushed from the most to the least costly, the least costly is expanded first
+        for bundle_cost, bundle in reversed(chosen[index][1]):
+            if cost + bundle_cost + remaining_costs[index + 1] < search["threshold"]:
+                stack.append((index + 1, cost + bundle_cost, bundles + (bundle,)))
+
+
+def __filter_courses(courses: list[tuple], occupancy: int) -> list[tuple] | None:
+    """Sections of the components left of every course code that fit occupancy.
+
+    Args:
+        courses: (course index, node of its bundle tree, components left) of the course codes to filter.
+        occupancy: Occupancy the sections must fit.
+
+    Returns:
+        Filtered courses, or None as soon as a course code has a component without any section left in every link
+        group.
+    """
+    filtered_courses = []
+
+    for course_index, node, link_groups in courses:
+        filtered_link_groups = []
+
+        for components in link_groups:
+            filtered_components = []
+
+            for section_occupancies in components:
+                section_occupancies = [section_occupancy for section_occupancy in section_occupancies
+                                       if not section_occupancy & occupancy]
+
+                if len(section_occupancies) == 0:
+                    break
+
+                filtered_components.append(section_occupancies)
+            else:
+                filtered_link_groups.append(filtered_components)
+
+        if len(filtered_link_groups) == 0:
+            return None
+
+        filtered_courses.append((course_index, node, filtered_link_groups))
+
+    return filtered_courses
+
+
+def __expand_schedules(chosen: list[tuple]):
+    """Schedules of the chosen candidates, one per combination of the bundles sharing the occupancy of a candidate."""
+    for bundles in itertools.product(*(candidate_bundles for _, candidate_bundles in chosen)):
+        yield [crn for bundle in bundles for crn in bundle]
@@ -0,0 +1,147 @@
+"""Scores of schedules, used by the ranked schedule search (ScheduleGenerator.py iter_ranked_schedules).
+
+A score is a cost, lower is better, summing weighted terms (weights by key, defaults in SCHEDULE_SCORE_WEIGHTS_DEFAULT):
+    "gap_hours": Hours between the first and last in-person meeting of every day not spent in class.
+    "early_start_hours": Hours before SCHEDULE_PREFERRED_DAY_START of the first in-person meeting of every day.
+    "campus_days": Weekdays with at least one in-person meeting.
+    "virtual_sections": Sections that are completely virtual (Course.is_virtual). A negative weight prefers virtual
+        sections instead, it is then a cost per in-person section.
+    "seat_fill": Filled share of the seats of every section (seats_filled / max_capacity).
+    "full_sections": Sections without a seat left.
+
+Times come from the weekly pattern of the meetings (weekday, start and end minute), whatever their date window.
+
+Every term except "gap_hours" can only grow as sections are added to a partial schedule, so get_time_bound (with the
+section costs) is a lower bound of the score of every schedule completing it, the gaps only being counted once a
+schedule is complete (get_time_cost).
+"""
+
+from Schedulizer.CourseClass import Course
+from Schedulizer.constants import SCHEDULE_SCORE_WEIGHTS_DEFAULT, SCHEDULE_PREFERRED_DAY_START
+
+# Day times of an empty schedule, per weekday (Monday = 0) None or (first start, last end, minutes in class)
+EMPTY_DAY_TIMES = (None,) * 7
+
+
+class SectionScore:
+    __slots__ = ("meetings", "cost", "is_virtual", "is_full")
+
+    def __init__(self, course: Course, weights: dict[str, float]):
+        """Score terms of a single section.
+
+        Args:
+            course: Section to score.
+            weights: Score weights (get_schedule_weights).
+        """
+        self.is_virtual = course.is_virtual
+        self.is_full = course.seats_filled >= course.max_capacity
+
+        # Weekly pattern of the in-person meetings, (weekday, minute start, minute end)
+        self.meetings = () if course.is_virtual else tuple(sorted({(meeting.weekday_int, meeting.minute_start,
+                                                                    meeting.minute_end)
+                                                                   for meeting in course.class_time
+                                                                   if meeting.weekday_int >= 0}))
+
+        seat_fill = min(1.0, course.seats_filled / course.max_capacity) if course.max_capacity > 0 else 1.0
+
+        # Cost of the terms only depending on the section itself
+        self.cost = weights["seat_fill"] * seat_fill + (weights["full_sections"] if self.is_full else 0.0)
+
+        if weights["virtual_sections"] > 0 and self.is_virtual:
+            self.cost += weights["virtual_sections"]
+        elif weights["virtual_sections"] < 0 and not self.is_virtual:
+            self.cost -= weights["virtual_sections"]
+
+
+def get_schedule_weights(weights: dict[str, float] | None = None) -> dict[str, float]:
+    """Score weights, SCHEDULE_SCORE_WEIGHTS_DEFAULT overridden by weights.
+
+    Args:
+        weights: Weights by key to override, default None (every default weight).
+
+    Raises:
+        ValueError: Unknown weight key, or negative weight other than "virtual_sections".
+
+    Returns:
+        Dict of every score weight.
+    """
+    merged_weights = dict(SCHEDULE_SCORE_WEIGHTS_DEFAULT)
+
+    for key, weight in (weights or {}).items():
+        if key not in merged_weights:
+            raise ValueError(f"Unknown score weight {key}, expected one of {', '.join(merged_weights)}.")
+
+        if weight < 0 and key != "virtual_sections":
+            raise ValueError(f"Score weight {key} can not be negative.")
+
+        merged_weights[key] = float(weight)
+
+    return merged_weights
+
+
+def add_day_times(day_times: tuple, meetings: tuple) -> tuple:
+    """Day times of a schedule once meetings are added to it.
+
+    Args:
+        day_times: Day times of the schedule (EMPTY_DAY_TIMES for an empty schedule).
+        meetings: In-person meetings added, SectionScore.meetings.
+
+    Returns:
+        New day times.
+    """
+    if len(meetings) == 0:
+        return day_times
+
+    day_times = list(day_times)
+
+    for weekday, minute_start, minute_end in meetings:
+        times = day_times[weekday]
+
+        if times is None:
+            day_times[weekday] = (minute_start, minute_end, minute_end - minute_start)
+        else:
+            day_times[weekday] = (min(times[0], minute_start), max(times[1], minute_end),
+                                  times[2] + minute_end - minute_start)
+
+    return tuple(day_times)
+
+
+def get_time_bound(day_times: tuple, weights: dict[str, float]) -> float:
+    """Lower bound of the time terms of every schedule completing one with day_times, every term but the gaps."""
+    campus_days = 0
+    early_start_minutes = 0
+
+    for times in day_times:
+        if times is not None:
+            campus_days += 1
+            early_start_minutes += max(0, SCHEDULE_PREFERRED_DAY_START - times[0])
+
+    return weights["campus_days"] * campus_days + weights["early_start_hours"] * early_start_minutes / 60
+
+
+def get_time_cost(day_times: tuple, weights: dict[str, float]) -> float:
+    """Time terms of a complete schedule with day_times."""
+    return get_time_bound(day_times, weights) + weights["gap_hours"] * get_gap_minutes(day_times) / 60
+
+
+def get_gap_minutes(day_times: tuple) -> int:
+    """Minutes between the first and last in-person meeting of every day not spent in class."""
+    return sum(max(0, times[1] - times[0] - times[2]) for times in day_times if times is not None)
+
+
+def get_schedule_metrics(day_times: tuple, section_scores: list[SectionScore]) -> dict[str, int]:
+    """Raw values of the score terms of a complete schedule, for display.
+
+    Args:
+        day_times: Day times of the schedule.
+        section_scores: SectionScore of every section of the schedule.
+
+    Returns:
+        Dict of "campus_days", "gap_minutes", "early_start_minutes", "virtual_sections" and "full_sections".
+    """
+    return {"campus_days": sum(1 for times in day_times if times is not None),
+            "gap_minutes": get_gap_minutes(day_times),
+            "early_start_minutes": sum(max(0, SCHEDULE_PREFERRED_DAY_START - times[0])
+                                       for times in day_times if times is not None),
+            "virtual_sections": sum(1 for section_score in section_scores if section_score.is_virtual),
+            "full_sections": sum(1 for section_score in section_scores if section_score.is_full)}
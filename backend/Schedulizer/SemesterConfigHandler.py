@@ -5,15 +5,18 @@ NOTE: Remember to update enabled configs in constants.py.
 """
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from types import SimpleNamespace
 
 from Schedulizer.NewEventClass import NewEvent
+from Schedulizer.constants import OUTDATED_COURSE_METADATA_TIMEDELTA, COURSE_HARD_MAX_AGE_TIMEDELTA
 
 
 class SemesterConfig:
     def __init__(self, name: str, semester_start: datetime, semester_end: datetime, api_mycampus_mep_code: str,
-                 api_mycampus_term_id: str, api_ratemyprof_uni_id: str, universal_events: list[NewEvent]):
+                 api_mycampus_term_id: str, api_ratemyprof_uni_id: str, universal_events: list[NewEvent],
+                 course_max_age: timedelta = OUTDATED_COURSE_METADATA_TIMEDELTA,
+                 course_hard_max_age: timedelta = COURSE_HARD_MAX_AGE_TIMEDELTA, is_immutable: bool = False):
         """Semester Config class, offers a standardized single object to represent all configs.
 
         Args:
@@ -24,7 +27,15 @@ class SemesterConfig:
             api_mycampus_term_id:
             api_ratemyprof_uni_id:
             universal_events: list of NewEvent objects
+            course_max_age: Age after which course records are refreshed. Older records are still served right away
+                while they are refreshed in the background, until they reach course_hard_max_age.
+            course_hard_max_age: Age after which a request waits for the refresh of the course records it needs.
+            is_immutable: Archived term, its course records are never refreshed (missing course codes are still
+                fetched once).
         """
+        if course_hard_max_age < course_max_age:
+            raise ValueError("course_hard_max_age must be at least course_max_age")
+
         self.name = name
         self.semester_start = semester_start
         self.semester_end = semester_end
@@ -35,6 +46,9 @@ class SemesterConfig:
         # above as it uses the name attribute value
         self.api_ratemyprof_uni_id = api_ratemyprof_uni_id
         self.universal_events = universal_events
+        self.course_max_age = course_max_age
+        self.course_hard_max_age = course_hard_max_age
+        self.is_immutable = is_immutable
 
     def __str__(self):
         """For prototyping purposes only.
@@ -51,7 +65,10 @@ class SemesterConfig:
                 f"api_mycampus_mep_code={self.api_mycampus_mep_code}\n"
                 f"api_mycampus_term_id={self.api_mycampus_term_id}\n"
                 f"api_ratemyprof_uni_id={self.api_ratemyprof_uni_id}\n"
-                f"universal_events.name={universal_events_names}")
+                f"universal_events.name={universal_events_names}\n"
+                f"course_max_age={self.course_max_age}\n"
+                f"course_hard_max_age={self.course_hard_max_age}\n"
+                f"is_immutable={self.is_immutable}")
 
 
 def decode_config(json_file_path: str) -> SemesterConfig:
@@ -59,6 +76,10 @@ def decode_config(json_file_path: str) -> SemesterConfig:
 
     Potential FileNotFoundError raises!
 
+    The course record freshness keys are optional: "course_max_age_minutes" (default
+    OUTDATED_COURSE_METADATA_TIMEDELTA), "course_hard_max_age_minutes" (default COURSE_HARD_MAX_AGE_TIMEDELTA, or the
+    max age when it is longer) and "immutable" (default false).
+
     Args:
         json_file_path: Filepath of the json config file
 
@@ -78,12 +99,20 @@ def decode_config(json_file_path: str) -> SemesterConfig:
                             for namespace in simple.universal_events]
         # Universal events is a list of NewEvent objects that need to be decoded accordingly.
 
+        course_max_age = timedelta(minutes=simple.course_max_age_minutes) \
+            if hasattr(simple, "course_max_age_minutes") else OUTDATED_COURSE_METADATA_TIMEDELTA
+        course_hard_max_age = timedelta(minutes=simple.course_hard_max_age_minutes) \
+            if hasattr(simple, "course_hard_max_age_minutes") else max(COURSE_HARD_MAX_AGE_TIMEDELTA, course_max_age)
+
         config_object = SemesterConfig(name=simple.name,
                                        semester_start=datetime.fromisoformat(simple.semester_start),
                                        semester_end=datetime.fromisoformat(simple.semester_end),
                                        api_mycampus_mep_code=simple.api_mycampus_mep_code,
                                        api_mycampus_term_id=simple.api_mycampus_term_id,
                                        api_ratemyprof_uni_id=simple.api_ratemyprof_uni_id,
-                                       universal_events=universal_events)
+                                       universal_events=universal_events,
+                                       course_max_age=course_max_age,
+                                       course_hard_max_age=course_hard_max_age,
+                                       is_immutable=getattr(simple, "immutable", False))
 
     return config_object
@@ -0,0 +1,54 @@
+"""In-process single-flight coalescing of identical concurrent calls.
+
+When many requests need the same work at the same time (e.g. hundreds of students refreshing the same popular course
+code at registration open), only the first caller of a key runs it. Callers of the same key arriving while it is in
+flight get the same Future and share its result or exception instead of repeating the work. Once the call is done the
+key is forgotten, so the next caller runs it again.
+"""
+
+import threading
+from concurrent.futures import Executor, Future
+
+
+class SingleFlight:
+    def __init__(self):
+        """Registry of the calls in flight, keyed by whatever identifies identical work."""
+        self.__calls = {}  # key -> Future of the call in flight
+        self.__lock = threading.Lock()
+
+    def submit(self, key, executor: Executor, func, *args, **kwargs) -> Future:
+        """Submit func to the executor unless a call of the same key is already in flight.
+
+        Args:
+            key: Hashable key identifying identical calls.
+            executor: Executor running the call when none of the key is in flight.
+            func: Function to call.
+            *args: Positional arguments of func.
+            **kwargs: Keyword arguments of func.
+
+        Returns:
+            Future of the call in flight for the key, shared by every caller of the key.
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+
+            if future is not None:
+                return future
+
+            future = executor.submit(func, *args, **kwargs)
+            self.__calls[key] = future
+
+        # Registered outside the lock, the callback runs right away when the call already finished
+        future.add_done_callback(lambda done_future: self.__forget(key, done_future))
+
+        return future
+
+    def in_flight_count(self) -> int:
+        """Number of keys with a call in flight."""
+        with self.__lock:
+            return len(self.__calls)
+
+    def __forget(self, key, future: Future):
+        with self.__lock:
+            if self.__calls.get(key) is future:
+                del self.__calls[key]
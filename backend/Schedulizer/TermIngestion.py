@@ -0,0 +1,189 @@
+"""Whole-term bulk ingestion of the MyCampus course data into the course table of a config.
+
+Instead of waiting for students to request course codes one by one, the job loads every section of the term ahead of
+time so user requests find fresh records and never wait on MyCampus:
+    1)  The term is looked up in get_terms of the school.
+    2)  Every section of the term is paged through the searchResults endpoint (get_json_term_sections) and each page
+        is decoded and bulk-loaded into the course table.
+    3)  Every course code of the term is discovered through get_json_course_codes, and the ones without fresh records
+        (sections that moved between pages while paging) are fetched one course code at a time.
+
+Progress is recorded on a checkpoint file of the cache directory after every page and every batch of course codes. An
+interrupted job resumes from its checkpoint on the next run; the checkpoint is removed once the job completes.
+
+Run from the backend directory, with the config id of Schedulizer/configs/0_enabledConfigs.json:
+    $ python -m Schedulizer.TermIngestion 202205
+    $ python -m Schedulizer.TermIngestion 202205 --restart  # Ignore the checkpoint of an interrupted run
+
+Schedule it off-peak, e.g. crontab running it every night at 3 am:
+    0 3 * * * cd /path/to/backend && python -m Schedulizer.TermIngestion 202205
+"""
+
+import json
+import os
+from datetime import datetime
+
+from Schedulizer.SemesterConfigHandler import SemesterConfig
+from Schedulizer.APIs.MycampusAPI import get_terms, get_json_term_sections, get_json_course_codes
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj as decode
+from Schedulizer.DBController.Courses import bulk_upsert_courses
+from Schedulizer.PrimaryOperations import op_update_courses_with_overhead
+from Schedulizer.CacheFilePathManipulation import get_cache_path
+from Schedulizer.constants import INGESTION_CHECKPOINT_FILENAME, INGESTION_PAGE_SIZE, \
+    INGESTION_COURSE_CODE_BATCH_SIZE
+
+# Stages reported to the on_progress callback of ingest_term
+INGESTION_STAGE_SECTIONS = "sections"  # done/total = sections loaded/sections of the term
+INGESTION_STAGE_DISCOVERY = "discovery"  # done = course codes discovered so far, total unknown (None)
+INGESTION_STAGE_COURSE_CODES = "course codes"  # done/total = course codes checked/course codes of the term
+
+
+def ingest_term(config_object: SemesterConfig, resume: bool = True, on_progress=None) -> dict:
+    """Load every section of the term of a config into its course table.
+
+    Args:
+        config_object: SemesterConfig object holding semester calendar info.
+        resume: Continue from the checkpoint of an interrupted run when there is one, otherwise start over.
+        on_progress: Optional function called with (stage, done, total) after every unit of work, see the
+            INGESTION_STAGE_* constants.
+
+    Raises:
+        RuntimeError: The term of the config is not offered by MyCampus.
+
+    Returns:
+        Summary dict with the number of "sections" loaded by paging, the number of "course_codes" of the term and the
+        "failed_course_codes" (course code -> exception) that could not be fetched individually.
+    """
+    mep_code = config_object.api_mycampus_mep_code
+    term_id = config_object.api_mycampus_term_id
+
+    checkpoint_path = get_cache_path(INGESTION_CHECKPOINT_FILENAME, config_object.db_table_name)
+    checkpoint = __load_checkpoint(checkpoint_path, config_object) if resume else None
+
+    if checkpoint is None:
+        if term_id not in [term["code"] for term in get_terms(mep_code=mep_code)]:
+            raise RuntimeError(f"Term {term_id} is not offered by MyCampus for {mep_code}!")
+
+        checkpoint = {"db_table_name": config_object.db_table_name,
+                      "term_id": term_id,
+                      "started": datetime.utcnow().isoformat(),
+                      "next_page_offset": 0,
+                      "total_sections": None,
+                      "course_codes": None,  # Discovered course codes, None until the discovery is done
+                      "next_course_code_index": 0,
+                      "failed_course_codes": {}}
+
+    report = on_progress if on_progress is not None else (lambda stage, done, total: None)
+
+    # 2) Page through every section of the term
+    while checkpoint["total_sections"] is None or checkpoint["next_page_offset"] < checkpoint["total_sections"]:
+        response_json = get_json_term_sections(mep_code=mep_code, term_id=term_id,
+                                               page_offset=checkpoint["next_page_offset"],
+                                               page_max_size=INGESTION_PAGE_SIZE)
+        courses = decode(response_json)
+
+        if len(courses) > 0:
+            bulk_upsert_courses(course_table=config_object.db_table_name, courses=courses)
+
+        checkpoint["total_sections"] = response_json["totalCount"]
+        checkpoint["next_page_offset"] += len(response_json["data"])
+
+        if len(response_json["data"]) == 0:  # Term shrank while paging
+            checkpoint["total_sections"] = checkpoint["next_page_offset"]
+
+        __save_checkpoint(checkpoint_path, checkpoint)
+        report(INGESTION_STAGE_SECTIONS, checkpoint["next_page_offset"], checkpoint["total_sections"])
+
+    # 3) Discover every course code of the term, then fetch the ones paging missed
+    if checkpoint["course_codes"] is None:
+        checkpoint["course_codes"] = __discover_course_codes(mep_code=mep_code, term_id=term_id, report=report)
+        __save_checkpoint(checkpoint_path, checkpoint)
+
+    course_codes = checkpoint["course_codes"]
+
+    while checkpoint["next_course_code_index"] < len(course_codes):
+        start = checkpoint["next_course_code_index"]
+        batch = course_codes[start:start + INGESTION_COURSE_CODE_BATCH_SIZE]
+
+        failures = op_update_courses_with_overhead(config_object=config_object, course_codes=batch)
+        checkpoint["failed_course_codes"].update({code: repr(exception) for code, exception in failures.items()})
+        checkpoint["next_course_code_index"] = start + len(batch)
+
+        __save_checkpoint(checkpoint_path, checkpoint)
+        report(INGESTION_STAGE_COURSE_CODES, checkpoint["next_course_code_index"], len(course_codes))
+
+    os.remove(checkpoint_path)
+
+    return {"sections": checkpoint["total_sections"],
+            "course_codes": len(course_codes),
+            "failed_course_codes": checkpoint["failed_course_codes"]}
+
+
+def __discover_course_codes(mep_code: str, term_id: str, report) -> list[str]:
+    """Every course code of a term, paged through get_json_course_codes."""
+    course_codes = []
+    offset = 1
+
+    while True:
+        page = get_json_course_codes(mep_code=mep_code, term_id=term_id, search_code="",
+                                     max_count=INGESTION_PAGE_SIZE, offset=offset)
+
+        course_codes += [item["code"] if isinstance(item, dict) else item for item in page]
+        report(INGESTION_STAGE_DISCOVERY, len(course_codes), None)
+
+        if len(page) < INGESTION_PAGE_SIZE:
+            return list(dict.fromkeys(code.upper() for code in course_codes))  # Remove duplicates, keep order
+
+        offset += 1
+
+
+def __load_checkpoint(checkpoint_path: str, config_object: SemesterConfig) -> dict | None:
+    """Checkpoint of an interrupted run of the same config and term, None when there is none."""
+    if not os.path.exists(checkpoint_path):
+        return None
+
+    with open(checkpoint_path) as file:
+        checkpoint = json.load(file)
+
+    if checkpoint.get("db_table_name") != config_object.db_table_name or \
+            checkpoint.get("term_id") != config_object.api_mycampus_term_id:
+        return None
+
+    return checkpoint
+
+
+def __save_checkpoint(checkpoint_path: str, checkpoint: dict):
+    """Write the checkpoint atomically, an interrupted write never leaves a truncated checkpoint behind."""
+    temporary_path = checkpoint_path + ".tmp"
+
+    with open(temporary_path, "w") as file:
+        json.dump(checkpoint, file)
+
+    os.replace(temporary_path, checkpoint_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Schedulizer.SemesterConfigHandler import decode_config
+    from Schedulizer.DBController.Courses import bootstrap_config_schema
+    from Schedulizer.constants import ENABLED_CONFIGS_FILE_PATH
+
+    parser = argparse.ArgumentParser(description="Load every section of the term of a config into its course table.")
+    parser.add_argument("config_id", help="Config id of Schedulizer/configs/0_enabledConfigs.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run")
+    arguments = parser.parse_args()
+
+    with open(ENABLED_CONFIGS_FILE_PATH) as config_file:
+        config_obj = decode_config(json.load(config_file)[arguments.config_id])
+
+    bootstrap_config_schema(config_obj)
+
+    summary = ingest_term(config_obj, resume=not arguments.restart,
+                         on_progress=lambda stage, done, total: print(f"{stage}: {done}" +
+                                                                      ("" if total is None else f"/{total}")))
+
+    print(f"Loaded {summary['sections']} sections, checked {summary['course_codes']} course codes")
+
+    for failed_code, error in summary["failed_course_codes"].items():
+        print(f"Failed {failed_code}: {error}")
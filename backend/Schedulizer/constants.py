@@ -3,8 +3,6 @@
 
 from datetime import timedelta
 
-from Schedulizer.SemesterConfigHandler import decode_config
-
 # Cache file directory
 CACHE_DIRECTORY_PATH = "cache/"
 
@@ -15,8 +13,99 @@ ICS_CALENDAR_FILENAME = "calendar.ics"
 # Called in MyCampusAPIDecoder.py
 CLASS_INSTRUCTION_IN_PERSON_KEYS = ["in-class", "in-person"]  # API data at .instructionalMethodDescription
 
-# Course record metadata outdated timedelta
+# Course record metadata outdated timedelta, default SemesterConfig.course_max_age
 OUTDATED_COURSE_METADATA_TIMEDELTA = timedelta(days=0, hours=0, minutes=30, seconds=0)
 
+# Default SemesterConfig.course_hard_max_age: outdated records younger than this are served right away while they are
+# refreshed in the background (stale-while-revalidate), older ones make the request wait for their refresh
+COURSE_HARD_MAX_AGE_TIMEDELTA = timedelta(days=0, hours=6, minutes=0, seconds=0)
+
+# Course code freshness states returned by DBController/Courses.py get_courses_freshness
+COURSE_FRESH = "fresh"  # Every record is younger than the max age (default OUTDATED_COURSE_METADATA_TIMEDELTA)
+COURSE_STALE = "stale"  # Records exist, but at least one is older than the max age
+COURSE_EXPIRED = "expired"  # Records exist, but at least one is older than the hard max age
+COURSE_MISSING = "missing"  # No record of the course code
+
+# Most distinct values (dates, locations, sections...) shared between Course and Meeting objects by MeetingClass.py
+# share_value, the least recently used are dropped beyond it. A term repeats a few thousand over all of its sections
+SHARED_COURSE_VALUES_MAX = 8192
+
 # Enabled semester config templates
 ENABLED_CONFIGS_FILE_PATH = "Schedulizer/configs/0_enabledConfigs.json"
+
+# MySQL connection pool defaults, overridable by the SQL_POOL_* environment variables (DBController/MysqlConnection.py)
+SQL_POOL_DEFAULT_SIZE = 10  # Maximum open connections per process
+SQL_POOL_DEFAULT_IDLE_TIMEOUT = 300  # Seconds before an idle connection is closed instead of reused
+SQL_POOL_DEFAULT_CHECKOUT_TIMEOUT = 10  # Seconds to wait for a free connection when the pool is exhausted
+
+# Maximum rows written by a single multi-row INSERT statement of DBController/Courses.py bulk_upsert_courses
+SQL_BULK_UPSERT_BATCH_SIZE = 500
+
+# Course table storage backend, overridable by the SCHEDULIZER_STORAGE and SQLITE_PATH environment variables
+# (DBController/StorageBackend.py)
+STORAGE_BACKEND_DEFAULT = "mysql"  # "mysql" or "sqlite"
+SQLITE_DEFAULT_PATH = ":memory:"  # SQLite database file, ":memory:" keeps the database in memory
+
+# Worker threads of the executor running blocking calls off the event loop, overridable by the
+# SCHEDULIZER_EXECUTOR_WORKERS environment variable (BlockingExecutor.py)
+EXECUTOR_DEFAULT_MAX_WORKERS = 32
+
+# MyCampus http sessions (APIs/MycampusSession.py)
+MYCAMPUS_CONNECT_TIMEOUT = 2  # Seconds to open the connection of an http request
+MYCAMPUS_REQUEST_TIMEOUT = 5  # Seconds to wait for the response of an http request
+MYCAMPUS_SESSION_MAX_AGE = 15 * 60  # Seconds before a session handshakes again, ahead of the Banner session timeout
+MYCAMPUS_SESSION_MAX_IDLE_PER_KEY = 8  # Idle sessions kept open per (mep_code, term_id)
+MYCAMPUS_MAX_ACTIVE_SESSIONS = 16  # Upstream requests in flight at the same time, per process
+MYCAMPUS_SESSION_CHECKOUT_TIMEOUT = 30  # Seconds to wait for a session when MYCAMPUS_MAX_ACTIVE_SESSIONS are borrowed
+
+# Course codes of a single request refreshed concurrently by PrimaryOperations.py op_update_courses_with_overhead
+COURSE_REFRESH_MAX_CONCURRENCY_PER_REQUEST = 4
+# Course refreshes running at the same time over every request, per process
+COURSE_REFRESH_MAX_WORKERS = MYCAMPUS_MAX_ACTIVE_SESSIONS
+
+# Cross-worker coalescing of course refreshes, enabled by the SCHEDULIZER_CROSS_WORKER_REFRESH=1 environment variable
+# (PrimaryOperations.py)
+COURSE_REFRESH_LEASE_TTL = 60  # Seconds before the refresh lease of a crashed worker can be taken over
+COURSE_REFRESH_LEASE_POLL_INTERVAL = 0.25  # Seconds between two checks of a course code refreshed by another worker
+
+# Whole-term ingestion job (TermIngestion.py)
+INGESTION_CHECKPOINT_FILENAME = "ingestion.json"  # Cache file of the progress of an interrupted run, per course table
+INGESTION_PAGE_SIZE = 500  # Sections (and discovered course codes) per MyCampus request
+INGESTION_COURSE_CODE_BATCH_SIZE = 50  # Course codes checked (and fetched when missing) between two checkpoints
+
+# MyCampus upstream client: rate limit, retries and circuit breaker (APIs/UpstreamClient.py)
+MYCAMPUS_RATE_LIMIT_PER_SECOND = 10  # Requests sent per second in steady state
+MYCAMPUS_RATE_LIMIT_BURST = 20  # Requests sent at once after an idle period
+MYCAMPUS_RATE_LIMIT_MAX_WAIT = 10  # Seconds a request waits for the rate limit before failing
+MYCAMPUS_RETRY_MAX_ATTEMPTS = 3  # Attempts of an idempotent GET request, first attempt included
+MYCAMPUS_RETRY_BASE_DELAY = 0.25  # Seconds, maximum backoff before the first retry, doubled every retry (full jitter)
+MYCAMPUS_RETRY_MAX_DELAY = 2  # Seconds, cap of the retry backoff
+MYCAMPUS_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed attempts opening the circuit
+MYCAMPUS_CIRCUIT_RESET_TIMEOUT = 30  # Seconds the circuit stays open before a probe request is let through
+
+# On-disk cache of the raw MyCampus json responses, mode set by the SCHEDULIZER_MYCAMPUS_CACHE environment variable
+# (APIs/MycampusResponseCache.py)
+MYCAMPUS_RESPONSE_CACHE_DIRECTORY = CACHE_DIRECTORY_PATH + "mycampus/"
+MYCAMPUS_RESPONSE_CACHE_MODE_DEFAULT = "off"  # "on" and "replay" are opted into through the environment
+MYCAMPUS_RESPONSE_CACHE_TTL = 5 * 60  # Seconds a cached response is served instead of asking MyCampus again
+MYCAMPUS_RESPONSE_CACHE_MAX_BYTES = 512 * 1024 ** 2  # Total size of the payloads before least recently used eviction
+
+# Bytes read at a time from streamed MyCampus responses (APIs/MycampusAPI.py iter_course_data_sections)
+MYCAMPUS_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Schedule generation (ScheduleGenerator.py)
+SCHEDULE_SLOT_MINUTES = 5  # Length of the time slots of the section occupancy bitsets, meetings are rounded out to it
+SCHEDULE_MAX_RESULTS_DEFAULT = 100  # Schedules returned by a request that does not ask for a number
+SCHEDULE_MAX_RESULTS_LIMIT = 1000  # Most schedules a single request can ask for
+SCHEDULE_MAX_COURSE_CODES = 10  # Most course codes a single request can combine
+LINK_GROUP_INDEX_MAX_ENTRIES = 4096  # Course codes whose link group bundles are kept in memory (LinkGroupIndex.py)
+
+# Ranked schedule search (ScheduleGenerator.py iter_ranked_schedules, ScheduleScoring.py)
+SCHEDULE_TOP_K_DEFAULT = 10  # Best schedules returned by a request that does not ask for a number
+SCHEDULE_TOP_K_LIMIT = 100  # Most best schedules a single request can ask for
+SCHEDULE_TIME_BUDGET_DEFAULT = 2.0  # Seconds a ranked search runs before returning the best schedules found so far
+SCHEDULE_TIME_BUDGET_LIMIT = 10.0  # Most seconds a single request can give a ranked search
+SCHEDULE_PREFERRED_DAY_START = 10 * 60  # Minute of the day, earlier first meetings count as an early start
+# Score weights, see ScheduleScoring.py
+SCHEDULE_SCORE_WEIGHTS_DEFAULT = {"gap_hours": 1.0, "early_start_hours": 0.5, "campus_days": 2.0,
+                                  "virtual_sections": 0.0, "seat_fill": 0.5, "full_sections": 10.0}
@@ -1,16 +1,87 @@
 """Functions called by FastAPI app relating to Schedulizer logic.
+
+The request functions are coroutines: every blocking step (MyCampus requests, DB queries, ics file writes) is awaited
+through BlockingExecutor.run_blocking() so it never stalls the event loop.
 """
 
 import json
-
-from Schedulizer.DBController.Courses import get_course_via_crn
-from Schedulizer.SemesterConfigHandler import decode_config
+import logging
+import uuid
+import requests
+
+from Schedulizer.SemesterConfigHandler import SemesterConfig, decode_config
+from Schedulizer.DBController.Courses import bootstrap_config_schema
+from Schedulizer.APIs.MycampusSession import get_session_pool
+from Schedulizer.APIs.MycampusResponseCache import RESPONSE_CACHE_REPLAY, get_response_cache
+from Schedulizer.BlockingExecutor import run_blocking, iterate_blocking
+from Schedulizer.CourseSerializer import serialize_courses_json
 from Schedulizer.constants import ENABLED_CONFIGS_FILE_PATH
-from Schedulizer.PrimaryOperations import op_update_courses_with_overhead, op_generate_ics
+from Schedulizer.PrimaryOperations import op_update_courses_with_overhead, op_generate_ics, \
+    op_get_courses_via_crns, op_generate_schedules, op_iter_ranked_schedules
+
+
+__loaded_configs: dict[str, SemesterConfig] = {}  # config_id -> decoded and bootstrapped SemesterConfig
+
+__logger = logging.getLogger(__name__)
+
+
+def load_enabled_configs() -> dict[str, SemesterConfig]:
+    """Decode every enabled semester config and bootstrap its DB schema. Called once when the app starts.
+
+    Returns:
+        Dict of config_id -> SemesterConfig of every enabled config.
+    """
+    with open(ENABLED_CONFIGS_FILE_PATH) as file:
+        config_filepath = json.load(file)
+
+    for config_id in config_filepath:
+        get_config(config_id)
+
+    return dict(__loaded_configs)
+
+
+def get_config(config_id: str) -> SemesterConfig:
+    """Get an enabled semester config, decoding it and bootstrapping its DB schema the first time it is requested.
+
+    Args:
+        config_id: Semester config id determines what semester is being processed.
+
+    Returns:
+        SemesterConfig of the given config_id.
+    """
+    config_obj = __loaded_configs.get(config_id)
+
+    if config_obj is None:
+        with open(ENABLED_CONFIGS_FILE_PATH) as file:
+            config_filepath = json.load(file)
+
+        config_obj = decode_config(config_filepath[config_id])
+        bootstrap_config_schema(config_obj)
+
+        __loaded_configs[config_id] = config_obj
+
+    return config_obj
 
 
-def general_crn_build(config_id: str, course_codes: list[str], crn_codes: list[int]):
-    """json string data of given CRN codes pulled from the backend DB.
+def warm_upstream_sessions():
+    """Handshake a MyCampus session for every loaded config ahead of its first course refresh.
+
+    Failures are only logged, the session is then handshaken by the first request instead. Nothing is warmed in the
+    replay mode of the MyCampus response cache, which never contacts MyCampus.
+    """
+    if get_response_cache().mode == RESPONSE_CACHE_REPLAY:
+        return
+
+    for config_id, config_obj in list(__loaded_configs.items()):
+        try:
+            get_session_pool().warm(mep_code=config_obj.api_mycampus_mep_code,
+                                    term_id=config_obj.api_mycampus_term_id)
+        except (requests.exceptions.RequestException, RuntimeError) as exception:
+            __logger.warning(f"Could not warm the MyCampus session of config {config_id}: {exception}")
+
+
+async def general_crn_build(config_id: str, course_codes: list[str], crn_codes: list[int]) -> bytes:
+    """json data of given CRN codes pulled from the backend DB.
 
     Args:
         config_id: Semester config id determines what semester is being processed.
@@ -20,24 +91,23 @@ def general_crn_build(config_id: str, course_codes: list[str], crn_codes: list[i
         crn_codes: List of crn codes of each specific class to process.
 
     Returns:
-        Course data in json form.
+        utf-8 encoded json array of the Course data of every crn code (CourseSerializer.py), in the order of crn_codes.
     """
-    with open(ENABLED_CONFIGS_FILE_PATH) as file:
-        config_filepath = json.load(file)
-
-    config_obj = decode_config(config_filepath[config_id])
+    config_obj = await run_blocking(get_config, config_id)
 
-    op_update_courses_with_overhead(config_object=config_obj, course_codes=course_codes)
+    await __update_courses(config_obj=config_obj, course_codes=course_codes)
 
-    result = ", ".join(
-        get_course_via_crn(course_table=config_obj.db_table_name, crn=crn).to_json() for crn in crn_codes)
+    courses = await run_blocking(op_get_courses_via_crns, config_object=config_obj, crn_codes=crn_codes)
 
-    return result
+    return serialize_courses_json(courses)
 
 
-def generate_crn_download_path(config_id: str, course_codes: list[str], crn_codes: list[int]):
+async def generate_crn_download_path(config_id: str, course_codes: list[str], crn_codes: list[int]):
     """Generates an ics calendar file given a list of crn codes.
 
+    Every call writes its own cache file (unique cache id), so concurrent downloads never overwrite each other. The
+    caller owns the file and should remove it once it has been sent.
+
     Args:
         config_id: Semester config id determines what semester is being processed.
         course_codes: List of course codes which the given crn codes belong to. The program will update the backend DB
@@ -48,13 +118,75 @@ def generate_crn_download_path(config_id: str, course_codes: list[str], crn_code
     Returns:
         Cache file path of the created ics file.
     """
-    with open(ENABLED_CONFIGS_FILE_PATH) as file:
-        config_filepath = json.load(file)
-
-    config_obj = decode_config(config_filepath[config_id])
+    config_obj = await run_blocking(get_config, config_id)
 
-    op_update_courses_with_overhead(config_object=config_obj, course_codes=course_codes)
+    await __update_courses(config_obj=config_obj, course_codes=course_codes)
 
-    result = op_generate_ics(config_object=config_obj, crn_codes=crn_codes, cache_id="test")
+    result = await run_blocking(op_generate_ics, config_object=config_obj, crn_codes=crn_codes,
+                                cache_id=uuid.uuid4().hex)
 
     return result
+
+
+async def general_schedule_build(config_id: str, course_codes: list[str], max_results: int) -> dict:
+    """Conflict-free schedules of the given course codes.
+
+    Args:
+        config_id: Semester config id determines what semester is being processed.
+        course_codes: List of course codes to combine. The program will update the backend DB (with overhead).
+        max_results: Most schedules to return.
+
+    Returns:
+        Dict of "schedules" (list of the crn codes of every schedule) and "is_complete" (op_generate_schedules).
+    """
+    config_obj = await run_blocking(get_config, config_id)
+
+    await __update_courses(config_obj=config_obj, course_codes=course_codes)
+
+    return await run_blocking(op_generate_schedules, config_object=config_obj, course_codes=course_codes,
+                              max_results=max_results)
+
+
+async def general_ranked_schedule_stream(config_id: str, course_codes: list[str], weights: dict[str, float] | None,
+                                         top_k: int, time_budget: float):
+    """Best scored conflict-free schedules of the given course codes, as a stream of json lines.
+
+    The course codes are refreshed and the arguments checked before returning, so errors are raised before anything is
+    streamed. The search then runs on the blocking executor, one line sent as soon as each event is found.
+
+    Args:
+        config_id: Semester config id determines what semester is being processed.
+        course_codes: List of course codes to combine. The program will update the backend DB (with overhead).
+        weights: Score weights to override, None for the defaults (ScheduleScoring.py).
+        top_k: Number of best schedules to find.
+        time_budget: Seconds the search runs for.
+
+    Returns:
+        Async iterator of the json lines (bytes) of the search events (op_iter_ranked_schedules).
+    """
+    config_obj = await run_blocking(get_config, config_id)
+
+    await __update_courses(config_obj=config_obj, course_codes=course_codes)
+
+    events = await run_blocking(op_iter_ranked_schedules, config_object=config_obj, course_codes=course_codes,
+                                weights=weights, top_k=top_k, time_budget=time_budget)
+
+    return __iter_json_lines(events)
+
+
+async def __iter_json_lines(events):
+    """json line (bytes) of every event of a blocking iterator, produced on the blocking executor."""
+    async for event in iterate_blocking(events):
+        yield json.dumps(event).encode() + b"\n"
+
+
+async def __update_courses(config_obj: SemesterConfig, course_codes: list[str]):
+    """Refresh the outdated course codes of a request.
+
+    A course code that could not be refreshed is only logged: its previously stored records (if any) are still served,
+    and CRNs that have no record at all are reported by op_get_courses_via_crns.
+    """
+    failures = await run_blocking(op_update_courses_with_overhead, config_object=config_obj, course_codes=course_codes)
+
+    for course_code, exception in failures.items():
+        __logger.warning(f"Could not refresh course code {course_code} of config {config_obj.name}: {exception!r}")
@@ -7,22 +7,67 @@ Remember to get to the docs it looks like this: http://localhost:8000/docs
 """
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 
-from SchedulizerCalls import general_crn_build, generate_crn_download_path
+from SchedulizerCalls import general_crn_build, generate_crn_download_path, general_schedule_build, \
+    general_ranked_schedule_stream, load_enabled_configs, warm_upstream_sessions
+from Schedulizer.APIs.MycampusSession import get_session_pool
+from Schedulizer.APIs.UpstreamClient import get_upstream_client
+from Schedulizer.BlockingExecutor import get_executor, run_blocking, shutdown_executor
+from Schedulizer.CacheFilePathManipulation import remove_file_path
+from Schedulizer.DBController.Courses import get_course_write_stats
+from Schedulizer.constants import SCHEDULE_MAX_RESULTS_DEFAULT, SCHEDULE_TOP_K_DEFAULT, SCHEDULE_TIME_BUDGET_DEFAULT
 
 app = FastAPI()
 
 
+@app.on_event("startup")
+async def startup():
+    """Decode the enabled semester configs and bootstrap their DB schema before serving requests."""
+    await run_blocking(load_enabled_configs)
+
+    get_executor().submit(warm_upstream_sessions)  # In the background, MyCampus being slow must not delay startup
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Let the blocking calls still running finish before the process exits."""
+    shutdown_executor()
+    get_session_pool().close_all()
+
+
 @app.get("/")
 async def root():
     return {"Hello": "World"}
 
 
+@app.get("/upstream/stats")
+async def upstream_stats() -> dict:
+    """Counters of the MyCampus client (requests, retries, failures, requests failed fast) and its circuit state.
+
+    Returns:
+        Stats dict of UpstreamClient.get_stats, circuit_state is "closed", "open" or "half-open".
+    """
+    return get_upstream_client().get_stats()
+
+
+@app.get("/db/stats")
+async def db_stats() -> dict:
+    """Course records written by the refreshes since the process started.
+
+    Returns:
+        Dict with the number of "changed" records (inserted or updated), "unchanged" records (only their metadata
+        timestamp bumped, their content matched the refreshed data) and "removed" records (deleted, their sections
+        were removed upstream).
+    """
+    return get_course_write_stats()
+
+
 @app.post("/crn/{config_id}")
-async def crn(config_id: str, course_codes: list[str], crn_codes: list[int]) -> str:
-    """json string data of given CRN codes pulled from the backend DB.
+async def crn(config_id: str, course_codes: list[str], crn_codes: list[int]) -> Response:
+    """json data of given CRN codes pulled from the backend DB.
 
     Args:
         config_id: Semester config id determines what semester is being processed.
@@ -32,9 +77,12 @@ async def crn(config_id: str, course_codes: list[str], crn_codes: list[int]) ->
         crn_codes: List of crn codes of each specific class to process.
 
     Returns:
-        Course data in a json string form from the backend DB based on CRN codes.
+        json array of the Course data from the backend DB based on CRN codes, already serialized (CourseSerializer.py)
+        so it is sent as is.
     """
-    return general_crn_build(config_id=config_id, course_codes=course_codes, crn_codes=crn_codes)
+    return Response(content=await general_crn_build(config_id=config_id, course_codes=course_codes,
+                                                    crn_codes=crn_codes),
+                    media_type="application/json")
 
 
 @app.post("/crn/{config_id}/download")
@@ -51,8 +99,51 @@ async def crn_download(config_id: str, course_codes: list[str], crn_codes: list[
     Returns:
         Download for the created ics calendar file
     """
-    cache_path = generate_crn_download_path(config_id=config_id, course_codes=course_codes, crn_codes=crn_codes)
-    return FileResponse(path=cache_path, filename="calendar.ics", media_type='text/ics')
+    cache_path = await generate_crn_download_path(config_id=config_id, course_codes=course_codes, crn_codes=crn_codes)
+    return FileResponse(path=cache_path, filename="calendar.ics", media_type='text/ics',
+                        background=BackgroundTask(remove_file_path, cache_path))  # Remove once sent
+
+
+@app.post("/schedules/{config_id}")
+async def schedules(config_id: str, course_codes: list[str], max_results: int = SCHEDULE_MAX_RESULTS_DEFAULT) -> dict:
+    """Conflict-free schedules combining sections of every given course code, linked sections kept together.
+
+    Args:
+        config_id: Semester config id determines what semester is being processed.
+        course_codes: List of course codes to combine. The program will update the backend DB (with overhead).
+        max_results: Most schedules to return, at most SCHEDULE_MAX_RESULTS_LIMIT.
+
+    Returns:
+        Dict of "schedules", the list of the crn codes of every schedule, and "is_complete", False when more schedules
+        exist than max_results.
+    """
+    return await general_schedule_build(config_id=config_id, course_codes=course_codes, max_results=max_results)
+
+
+@app.post("/schedules/{config_id}/ranked")
+async def ranked_schedules(config_id: str, course_codes: list[str], weights: dict[str, float] | None = None,
+                           top_k: int = SCHEDULE_TOP_K_DEFAULT,
+                           time_budget_ms: int = int(SCHEDULE_TIME_BUDGET_DEFAULT * 1000)) -> StreamingResponse:
+    """Best scored conflict-free schedules of the given course codes, streamed as they are found.
+
+    Args:
+        config_id: Semester config id determines what semester is being processed.
+        course_codes: List of course codes to combine. The program will update the backend DB (with overhead).
+        weights: Score weights to override (gap_hours, early_start_hours, campus_days, virtual_sections, seat_fill,
+            full_sections), the others keep SCHEDULE_SCORE_WEIGHTS_DEFAULT.
+        top_k: Number of best schedules to find, at most SCHEDULE_TOP_K_LIMIT.
+        time_budget_ms: Milliseconds the search runs for before the best schedules found so far are returned, at most
+            SCHEDULE_TIME_BUDGET_LIMIT seconds.
+
+    Returns:
+        Stream of json lines (application/x-ndjson): {"event": "schedule", "score", "crns", "metrics"} every time a
+        schedule enters the top_k found so far (lower score is better), then {"event": "done", "schedules",
+        "is_complete"} with the top_k from best to worst, is_complete False when the time budget ran out first.
+    """
+    lines = await general_ranked_schedule_stream(config_id=config_id, course_codes=course_codes, weights=weights,
+                                                 top_k=top_k, time_budget=time_budget_ms / 1000)
+
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 if __name__ == "__main__":
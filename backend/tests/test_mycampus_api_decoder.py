@@ -0,0 +1,75 @@
+"""Equivalence tests of the MyCampus decoder (Schedulizer/APIs/MycampusAPIDecoder.py) against the original reference
+decoder (Schedulizer/APIs/MycampusAPIDocumentation/MycampusAPIDecoderReference.py).
+
+Run from the backend directory:
+    $ python -m pytest tests
+"""
+
+import copy
+import glob
+import json
+import os
+import unittest
+
+from Schedulizer.APIs.MycampusAPIDecoder import decode_api_json_to_course_obj, iter_decode_api_sections
+from Schedulizer.APIs.MycampusAPIDocumentation.MycampusAPIDecoderReference import \
+    reference_decode_api_json_to_course_obj
+
+SAMPLES_GLOB = os.path.join(os.path.dirname(__file__), "..", "Schedulizer", "APIs", "MycampusAPIDocumentation",
+                            "*.json")
+
+
+def load_samples() -> dict[str, dict]:
+    """Response samples of MycampusAPIDocumentation by file name."""
+    samples = {}
+
+    for sample_path in sorted(glob.glob(SAMPLES_GLOB)):
+        with open(sample_path) as file:
+            samples[os.path.basename(sample_path)] = json.load(file)
+
+    return samples
+
+
+def get_reference_json(payload: dict) -> list[dict]:
+    return [course.to_json() for course in reference_decode_api_json_to_course_obj(payload)]
+
+
+class TestMycampusAPIDecoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.samples = load_samples()
+
+    def test_samples_found(self):
+        self.assertEqual(len(self.samples), 3)
+
+    def test_samples_match_reference(self):
+        for name, payload in self.samples.items():
+            with self.subTest(sample=name):
+                decoded = [course.to_json() for course in decode_api_json_to_course_obj(payload)]
+
+                self.assertTrue(decoded)
+                self.assertEqual(decoded, get_reference_json(payload))
+
+    def test_iter_sections_match_reference(self):
+        for name, payload in self.samples.items():
+            with self.subTest(sample=name):
+                decoded = [course.to_json() for course in iter_decode_api_sections(iter(payload["data"]))]
+
+                self.assertEqual(decoded, get_reference_json(payload))
+
+    def test_repeated_sections_match_reference(self):
+        # The sections of every sample in one payload, twice under new crn codes, so the parsed strings are looked up
+        sections = [section for payload in self.samples.values() for section in payload["data"]] * 2
+        sections = [copy.deepcopy(section) for section in sections]
+
+        for index, section in enumerate(sections):
+            section["courseReferenceNumber"] = str(10000 + index)
+
+        payload = {"success": True, "totalCount": len(sections), "data": sections}
+
+        self.assertEqual([course.to_json() for course in decode_api_json_to_course_obj(payload)],
+                         get_reference_json(payload))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests of the on-disk MyCampus response cache (Schedulizer/APIs/MycampusResponseCache.py).
+
+Run from the backend directory:
+    $ python -m pytest tests
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+from Schedulizer.APIs.MycampusResponseCache import MycampusResponseCache, RESPONSE_CACHE_ON
+
+
+class TestMycampusResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = MycampusResponseCache(directory=self.directory.name, mode=RESPONSE_CACHE_ON, ttl=60,
+                                           max_bytes=1 << 20)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stream_stored_once_consumed(self):
+        chunks = self.cache.stream_or_fetch("UOIT", "202201", "PHY1020U", lambda: iter([b'{"success":', b"true}"]),
+                                            is_valid=lambda: True)
+
+        self.assertEqual(b"".join(chunks), b'{"success":true}')
+        self.assertEqual(self.cache.get("UOIT", "202201", "PHY1020U"), {"success": True})
+
+    def test_invalid_stream_not_stored(self):
+        chunks = self.cache.stream_or_fetch("UOIT", "202201", "PHY1020U", lambda: iter([b'{"success":false}']),
+                                            is_valid=lambda: False)
+
+        self.assertEqual(b"".join(chunks), b'{"success":false}')
+        self.assertIsNone(self.cache.get("UOIT", "202201", "PHY1020U"))
+        self.assertEqual(self.cache.list_entries(), [])
+
+    def test_stream_closed_early_not_stored(self):
+        chunks = self.cache.stream_or_fetch("UOIT", "202201", "PHY1020U", lambda: iter([b'{"data":', b"[]}"]))
+
+        next(chunks)
+        chunks.close()
+
+        self.assertIsNone(self.cache.get("UOIT", "202201", "PHY1020U"))
+
+    def test_get_evicted_while_read_is_miss(self):
+        self.cache.put("UOIT", "202201", "PHY1020U", {"success": True})
+
+        with mock.patch("Schedulizer.APIs.MycampusResponseCache.os.utime", side_effect=FileNotFoundError):
+            self.assertIsNone(self.cache.get("UOIT", "202201", "PHY1020U"))
+
+
+if __name__ == "__main__":
+    unittest.main()
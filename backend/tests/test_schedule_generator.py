@@ -0,0 +1,115 @@
+"""Tests of the conflict-free schedule generator (Schedulizer/ScheduleGenerator.py) against brute force enumeration, on
+small synthetic terms (Schedulizer/Benchmarks/SyntheticTerm.py).
+
+Run from the backend directory:
+    $ python -m pytest tests
+"""
+
+import itertools
+import unittest
+
+from Schedulizer.Benchmarks.ScheduleGeneratorBenchmark import get_sections_by_course_code, build_course_bundles_list, \
+    WINDOW_START, WINDOW_END
+from Schedulizer.LinkGroupIndex import get_occupancy
+from Schedulizer.ScheduleGenerator import iter_schedules, iter_ranked_schedules
+from Schedulizer.ScheduleScoring import SectionScore, EMPTY_DAY_TIMES, get_schedule_weights, add_day_times, \
+    get_time_cost
+
+# (course count, sections per course code, seed) of the small terms, small enough to check every combination
+SMALL_TERMS = [(3, 8, 3), (3, 8, 0), (3, 8, 1), (4, 8, 5)]
+
+
+def brute_force_schedules(sections_by_course_code: dict[str, list]) -> list[list[int]]:
+    """Every conflict-free schedule, by checking every combination of one lecture, laboratory and tutorial per course
+    code, kept when no two sections share an occupancy slot."""
+    occupancies = {}
+    course_code_bundles = []
+
+    for sections in sections_by_course_code.values():
+        components = {}
+
+        for section in sections:
+            occupancies[section.crn] = get_occupancy(section, WINDOW_START, WINDOW_END)
+            components.setdefault(section.link_tag[0], []).append(section.crn)
+
+        course_code_bundles.append(list(itertools.product(*(components[key] for key in sorted(components)))))
+
+    schedules = []
+
+    for bundles in itertools.product(*course_code_bundles):
+        crns = [crn for bundle in bundles for crn in bundle]
+
+        if all(not occupancies[first] & occupancies[second] for first, second in itertools.combinations(crns, 2)):
+            schedules.append(crns)
+
+    return schedules
+
+
+def get_schedule_score(crns: list[int], sections: dict, weights: dict[str, float]) -> float:
+    """Score of a complete schedule, computed directly from its sections."""
+    day_times = EMPTY_DAY_TIMES
+    cost = 0.0
+
+    for crn in crns:
+        section_score = SectionScore(sections[crn], weights)
+        day_times = add_day_times(day_times, section_score.meetings)
+        cost += section_score.cost
+
+    return round(cost + get_time_cost(day_times, weights), 4)
+
+
+class TestIterSchedules(unittest.TestCase):
+    def test_matches_brute_force(self):
+        for course_count, sections_per_course, seed in SMALL_TERMS:
+            with self.subTest(course_count=course_count, seed=seed):
+                sections_by_course_code = get_sections_by_course_code(course_count=course_count,
+                                                                      sections_per_course=sections_per_course,
+                                                                      seed=seed)
+
+                schedules = sorted(sorted(crns) for crns in iter_schedules(
+                    build_course_bundles_list(sections_by_course_code)))
+
+                self.assertEqual(schedules, sorted(sorted(crns) for crns in brute_force_schedules(
+                    sections_by_course_code)))
+
+    def test_schedules_unique(self):
+        schedules = [tuple(sorted(crns)) for crns in iter_schedules(
+            build_course_bundles_list(get_sections_by_course_code(course_count=3, sections_per_course=8, seed=3)))]
+
+        self.assertTrue(schedules)
+        self.assertEqual(len(schedules), len(set(schedules)))
+
+
+class TestIterRankedSchedules(unittest.TestCase):
+    def test_top_k_matches_brute_force_ranking(self):
+        for (course_count, sections_per_course, seed), weights, top_k in itertools.product(
+                SMALL_TERMS, (None, {"virtual_sections": 2.0, "gap_hours": 3.0}), (1, 10)):
+            with self.subTest(course_count=course_count, seed=seed, weights=weights, top_k=top_k):
+                sections_by_course_code = get_sections_by_course_code(course_count=course_count,
+                                                                      sections_per_course=sections_per_course,
+                                                                      seed=seed)
+
+                for index, section in enumerate(section for sections in sections_by_course_code.values()
+                                                for section in sections):
+                    section.is_virtual = index % 5 == 0
+
+                course_bundles_list = build_course_bundles_list(sections_by_course_code)
+                sections = {crn: section for course_bundles in course_bundles_list
+                            for crn, section in course_bundles.sections.items()}
+                merged_weights = get_schedule_weights(weights)
+
+                brute_force = {tuple(sorted(crns)): get_schedule_score(crns, sections, merged_weights)
+                               for crns in brute_force_schedules(sections_by_course_code)}
+
+                *_, done = iter_ranked_schedules(course_bundles_list, weights=weights, top_k=top_k, time_budget=60)
+
+                self.assertTrue(done["is_complete"])
+                self.assertEqual([schedule["score"] for schedule in done["schedules"]],
+                                 sorted(brute_force.values())[:top_k])
+
+                for schedule in done["schedules"]:
+                    self.assertEqual(brute_force[tuple(sorted(schedule["crns"]))], schedule["score"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""Tests of the course storage (Schedulizer/DBController/StorageBackend.py) on the embedded SQLite backend.
+
+Run from the backend directory:
+    $ python -m pytest tests
+"""
+
+import unittest
+from datetime import datetime, time, date, timedelta
+
+from Schedulizer.CourseClass import Course
+from Schedulizer.DBController.Courses import get_courses_freshness
+from Schedulizer.DBController.Schema import get_meetings_table, COURSE_TABLE_SCHEMA_VERSION, SCHEMA_VERSIONS_TABLE
+from Schedulizer.DBController.SqliteStorage import SqliteCourseStorage
+from Schedulizer.DBController.StorageBackend import set_storage
+from Schedulizer.MeetingClass import Meeting
+from Schedulizer.constants import COURSE_FRESH, COURSE_STALE, COURSE_EXPIRED, COURSE_MISSING
+
+COURSE_TABLE = "config_202201"
+
+
+def get_meeting(weekday_int: int, hour: int) -> Meeting:
+    return Meeting(time_start=time(hour, 10), time_end=time(hour + 1), weekday_int=weekday_int,
+                   date_start=date(2022, 1, 10), date_end=date(2022, 4, 30), repeat_timedelta_days=7,
+                   location="OT-North Oshawa | Science Building | UA1350")
+
+
+def get_course(fac: str, uid: str, crn: int, class_time: list[Meeting], seats_filled: int = 10) -> Course:
+    return Course(fac=fac, uid=uid, crn=crn, class_type="Lecture", title="Physics II", section=f"{crn % 1000:03}",
+                  class_time=class_time, is_linked=False, link_tag="", seats_filled=seats_filled, max_capacity=50,
+                  instructors="Ada Lovelace", is_virtual=False)
+
+
+def get_course_code_courses(fac: str, uid: str, first_crn: int, count: int) -> list[Course]:
+    return [get_course(fac, uid, first_crn + index, [get_meeting(4, 9), get_meeting(1, 11)]) for index in range(count)]
+
+
+class TestBulkUpsertCourses(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteCourseStorage(":memory:")
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+
+        self.courses = get_course_code_courses("PHY", "1020U", 40100, 4)
+        self.other_courses = get_course_code_courses("CHEM", "1800U", 40200, 2)
+
+        self.storage.bulk_upsert_courses(COURSE_TABLE, self.courses + self.other_courses)
+
+    def get_crns(self, fac: str, uid: str) -> list[int]:
+        return [c.crn for c in self.storage.get_courses_via_fac_uid(COURSE_TABLE, fac, uid)]
+
+    def get_meeting_count(self, crns: list[int]) -> int:
+        with self.storage.connection() as connection:
+            cur = connection.cursor()
+            self.storage.execute(cur, "SELECT COUNT(*) FROM %s WHERE crn IN (%s)" % (
+                get_meetings_table(COURSE_TABLE), ", ".join(["%s"] * len(crns))), crns)
+            count = cur.fetchone()[0]
+            cur.close()
+
+        return count
+
+    def test_upsert_inserts(self):
+        self.assertEqual(self.get_crns("PHY", "1020U"), [c.crn for c in self.courses])
+        self.assertEqual(self.storage.get_write_stats(), {"changed": 6, "unchanged": 0, "removed": 0})
+
+    def test_upsert_unchanged(self):
+        counts = self.storage.bulk_upsert_courses(COURSE_TABLE, self.courses)
+
+        self.assertEqual(counts, {"changed": 0, "unchanged": len(self.courses), "removed": 0})
+
+    def test_upsert_changed(self):
+        changed_course = get_course("PHY", "1020U", self.courses[0].crn, [get_meeting(2, 14)], seats_filled=11)
+        counts = self.storage.bulk_upsert_courses(COURSE_TABLE, [changed_course] + self.courses[1:])
+
+        self.assertEqual(counts, {"changed": 1, "unchanged": len(self.courses) - 1, "removed": 0})
+        self.assertEqual(self.storage.get_courses_via_crns(COURSE_TABLE, [changed_course.crn])[0].to_json(),
+                         changed_course.to_json())
+
+    def test_complete_refresh_removes_missing_crns(self):
+        received = self.courses[:2]
+        removed_crns = [c.crn for c in self.courses[2:]]
+
+        counts = self.storage.bulk_upsert_courses(COURSE_TABLE, received, fac="PHY", uid="1020U",
+                                                  received_crns={c.crn for c in received})
+
+        self.assertEqual(counts, {"changed": 0, "unchanged": 2, "removed": 2})
+        self.assertEqual(self.get_crns("PHY", "1020U"), [c.crn for c in received])
+        self.assertEqual(self.get_meeting_count(removed_crns), 0)
+        self.assertEqual(self.get_meeting_count([c.crn for c in received]), 4)
+
+    def test_complete_refresh_leaves_other_course_codes(self):
+        self.storage.bulk_upsert_courses(COURSE_TABLE, self.courses[:1], fac="PHY", uid="1020U",
+                                         received_crns={self.courses[0].crn})
+
+        other_crns = [c.crn for c in self.other_courses]
+
+        self.assertEqual(self.get_crns("CHEM", "1800U"), other_crns)
+        self.assertEqual(self.get_meeting_count(other_crns), 4)
+        self.assertEqual([c.to_json() for c in self.storage.get_courses_via_fac_uid(COURSE_TABLE, "CHEM", "1800U")],
+                         [c.to_json() for c in self.other_courses])
+
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteCourseStorage(":memory:")
+
+    def get_columns(self, table: str) -> list[str]:
+        with self.storage.connection() as connection:
+            cur = connection.cursor()
+            cur.execute("PRAGMA table_info(%s)" % table)
+            columns = [row[1] for row in cur.fetchall()]
+            cur.close()
+
+        return columns
+
+    def test_fresh_table_reaches_latest_version(self):
+        self.assertEqual(self.storage.get_course_table_version(COURSE_TABLE), 0)
+
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+
+        self.assertEqual(COURSE_TABLE_SCHEMA_VERSION, 5)
+        self.assertEqual(self.storage.get_course_table_version(COURSE_TABLE), 5)
+        self.assertIn("fingerprint", self.get_columns(COURSE_TABLE))
+        self.assertIn("week_minute_start", self.get_columns(get_meetings_table(COURSE_TABLE)))
+
+    def test_unversioned_table_migrated_again(self):
+        # A table created before versioning has no recorded version, every migration must be safe to re-run on it
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+
+        with self.storage.connection() as connection:
+            cur = connection.cursor()
+            self.storage.execute(cur, "DELETE FROM %s" % SCHEMA_VERSIONS_TABLE)
+            cur.close()
+
+        self.storage.verified_tables.clear()
+
+        self.assertEqual(self.storage.migrate_all_course_tables(), [COURSE_TABLE])
+        self.assertEqual(self.storage.get_course_table_version(COURSE_TABLE), 5)
+
+    def test_drop_course_table(self):
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+        self.storage.drop_course_table(COURSE_TABLE)
+
+        self.assertEqual(self.storage.get_course_table_version(COURSE_TABLE), 0)
+        self.assertEqual(self.storage.migrate_all_course_tables(), [])
+
+
+class TestSelectCourses(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteCourseStorage(":memory:")
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+
+    def test_round_trip(self):
+        # Meetings out of weekday order, they must come back in their class_time order
+        courses = [get_course("PHY", "1020U", 40100, [get_meeting(4, 9), get_meeting(1, 11), get_meeting(2, 8)]),
+                   get_course("PHY", "1020U", 40101, []),
+                   get_course("PHY", "1020U", 40102, [get_meeting(3, 13)])]
+
+        self.storage.bulk_upsert_courses(COURSE_TABLE, courses)
+
+        self.assertEqual([c.to_json() for c in self.storage.get_courses_via_fac_uid(COURSE_TABLE, "PHY", "1020U")],
+                         [c.to_json() for c in courses])
+        self.assertEqual([c.to_json() for c in self.storage.get_courses_via_crns(COURSE_TABLE, [40101, 40102])],
+                         [c.to_json() for c in courses[1:]])
+
+    def test_missing_crns_left_out(self):
+        self.assertEqual(self.storage.get_courses_via_crns(COURSE_TABLE, [40100]), [])
+
+
+class TestRefreshLeases(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteCourseStorage(":memory:")
+
+    def test_acquired_once(self):
+        self.assertTrue(self.storage.try_acquire_lease("config_202201:PHY1020U", "first", ttl_seconds=60))
+        self.assertFalse(self.storage.try_acquire_lease("config_202201:PHY1020U", "second", ttl_seconds=60))
+        self.assertTrue(self.storage.try_acquire_lease("config_202201:CHEM1800U", "second", ttl_seconds=60))
+
+    def test_acquired_after_release(self):
+        self.storage.try_acquire_lease("config_202201:PHY1020U", "first", ttl_seconds=60)
+        self.storage.release_lease("config_202201:PHY1020U", "second")  # Not the holder, the lease is kept
+
+        self.assertFalse(self.storage.try_acquire_lease("config_202201:PHY1020U", "second", ttl_seconds=60))
+
+        self.storage.release_lease("config_202201:PHY1020U", "first")
+
+        self.assertTrue(self.storage.try_acquire_lease("config_202201:PHY1020U", "second", ttl_seconds=60))
+
+    def test_acquired_after_expiry(self):
+        self.storage.try_acquire_lease("config_202201:PHY1020U", "first", ttl_seconds=-1)  # Already expired
+
+        self.assertTrue(self.storage.try_acquire_lease("config_202201:PHY1020U", "second", ttl_seconds=60))
+        self.assertFalse(self.storage.try_acquire_lease("config_202201:PHY1020U", "first", ttl_seconds=60))
+
+
+class TestCoursesFreshness(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteCourseStorage(":memory:")
+        self.storage.bootstrap_course_table(COURSE_TABLE)
+        set_storage(self.storage)
+
+        self.storage.bulk_upsert_courses(COURSE_TABLE, get_course_code_courses("PHY", "1020U", 40100, 2) +
+                                         get_course_code_courses("CHEM", "1800U", 40200, 2) +
+                                         get_course_code_courses("SSCI", "1470U", 40300, 2))
+
+    def tearDown(self):
+        set_storage(None)
+
+    def set_metadata(self, crn: int, metadata: datetime):
+        with self.storage.connection() as connection:
+            cur = connection.cursor()
+            self.storage.execute(cur, "UPDATE %s SET metadata=%%s WHERE crn=%%s" % COURSE_TABLE, (metadata, crn))
+            cur.close()
+
+    def test_oldest_metadata(self):
+        old_metadata = datetime.utcnow().replace(microsecond=0) - timedelta(hours=2)
+        self.set_metadata(40101, old_metadata)
+
+        oldest_metadata = self.storage.get_courses_oldest_metadata(COURSE_TABLE, ["PHY1020U", "CHEM1800U", "MATH1020U"])
+
+        self.assertEqual(set(oldest_metadata), {"PHY1020U", "CHEM1800U"})
+        self.assertEqual(oldest_metadata["PHY1020U"], old_metadata)
+        self.assertLess(datetime.utcnow() - oldest_metadata["CHEM1800U"], timedelta(minutes=1))
+
+    def test_freshness(self):
+        self.set_metadata(40201, datetime.utcnow() - timedelta(hours=2))
+        self.set_metadata(40300, datetime.utcnow() - timedelta(hours=12))
+
+        freshness = get_courses_freshness(COURSE_TABLE, ["PHY1020U", "CHEM1800U", "SSCI1470U", "MATH1020U"],
+                                          max_age=timedelta(hours=1), hard_max_age=timedelta(hours=6))
+
+        self.assertEqual(freshness, {COURSE_FRESH: ["PHY1020U"], COURSE_STALE: ["CHEM1800U"],
+                                     COURSE_EXPIRED: ["SSCI1470U"], COURSE_MISSING: ["MATH1020U"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
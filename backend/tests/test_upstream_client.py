@@ -0,0 +1,94 @@
+"""Tests of the MyCampus client layer (Schedulizer/APIs/UpstreamClient.py).
+
+Run from the backend directory:
+    $ python -m pytest tests
+"""
+
+import unittest
+
+import requests
+
+from Schedulizer.APIs.UpstreamClient import UpstreamClient, CircuitBreaker, TokenBucket, CIRCUIT_CLOSED, \
+    CIRCUIT_HALF_OPEN
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, outcomes: list):
+        """Session whose requests return or raise the given outcomes in order."""
+        self.outcomes = list(outcomes)
+
+    def request(self, method: str, url: str, timeout=None, stream: bool = False):
+        outcome = self.outcomes.pop(0)
+
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        return outcome
+
+
+def get_client(circuit_breaker: CircuitBreaker) -> UpstreamClient:
+    return UpstreamClient(rate_limiter=TokenBucket(rate=1000, burst=1000), circuit_breaker=circuit_breaker,
+                          max_attempts=3, retry_base_delay=0, retry_max_delay=0)
+
+
+def get_half_open_circuit_breaker() -> CircuitBreaker:
+    circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    circuit_breaker.record_failure()  # Opens the circuit, half-open right away (reset_timeout of 0)
+
+    return circuit_breaker
+
+
+class TestHalfOpenProbe(unittest.TestCase):
+    def test_chunked_encoding_error_releases_probe(self):
+        circuit_breaker = get_half_open_circuit_breaker()
+        client = get_client(circuit_breaker)
+
+        self.assertEqual(circuit_breaker.get_state(), CIRCUIT_HALF_OPEN)
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client.get(FakeSession([requests.exceptions.ChunkedEncodingError("body cut short")]), "https://mycampus")
+
+        # The failed probe opened the circuit again, the next probe goes through and closes it
+        self.assertEqual(circuit_breaker.get_state(), CIRCUIT_HALF_OPEN)
+        self.assertEqual(client.get(FakeSession([FakeResponse(200)]), "https://mycampus").status_code, 200)
+        self.assertEqual(circuit_breaker.get_state(), CIRCUIT_CLOSED)
+
+    def test_chunked_encoding_error_not_retried(self):
+        client = get_client(CircuitBreaker(failure_threshold=5, reset_timeout=60))
+        session = FakeSession([requests.exceptions.ChunkedEncodingError("body cut short"), FakeResponse(200)])
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client.get(session, "https://mycampus")
+
+        self.assertEqual(len(session.outcomes), 1)
+        self.assertEqual(client.get_stats()["failures"], 1)
+        self.assertEqual(client.get_stats()["circuit_consecutive_failures"], 1)
+
+    def test_unexpected_exception_releases_probe(self):
+        circuit_breaker = get_half_open_circuit_breaker()
+        client = get_client(circuit_breaker)
+
+        with self.assertRaises(KeyboardInterrupt):
+            client.get(FakeSession([KeyboardInterrupt()]), "https://mycampus")
+
+        self.assertEqual(client.get(FakeSession([FakeResponse(200)]), "https://mycampus").status_code, 200)
+        self.assertEqual(circuit_breaker.get_state(), CIRCUIT_CLOSED)
+
+    def test_connection_error_retried(self):
+        client = get_client(CircuitBreaker(failure_threshold=5, reset_timeout=60))
+        session = FakeSession([requests.exceptions.ConnectionError("reset"), FakeResponse(200)])
+
+        self.assertEqual(client.get(session, "https://mycampus").status_code, 200)
+        self.assertEqual(client.get_stats()["retries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()